@@ -0,0 +1,157 @@
+"""
+Group-by and pivot aggregation over integer group codes.
+
+Every key column is factorized once per data version; the codes of several
+keys are combined into one group id per row, and each aggregation runs as a
+single vectorized groupby over those ids.
+"""
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+AGGREGATIONS = ("count", "sum", "mean", "median", "min", "max", "std", "nunique",
+                "p25", "p75", "p90")
+# Aggregations that need numeric values
+NUMERIC_AGGREGATIONS = ("sum", "mean", "median", "std", "p25", "p75", "p90")
+# A pivot spreads each distinct value of the pivot column into its own column
+MAX_PIVOT_COLUMNS = 200
+
+
+class AggregateError(Exception):
+    """The requested grouping does not fit the data"""
+
+
+def aggregate_series(grouped, aggregation):
+    if aggregation.startswith("p"):
+        return grouped.quantile(int(aggregation[1:]) / 100)
+    return getattr(grouped, aggregation)()
+
+
+class GroupByEngine:
+    """
+    Group-by results for one version of the (filtered) cleaned data. Key
+    codes are cached per column and finished results per request, so
+    changing only the aggregations or value columns reuses the grouping.
+    """
+
+    def __init__(self, df, version, filter_text="", max_cached=16):
+        self.df = df
+        self.version = version
+        self.filter_text = filter_text
+        self.codes = {}
+        self.max_cached = max_cached
+        self.results = OrderedDict()
+
+    def key_codes(self, column):
+        """Codes sorted by value (missing values as their own, last group) and the values they stand for"""
+        if column not in self.codes:
+            codes, uniques = pd.factorize(self.df[column], sort=True, use_na_sentinel=False)
+            self.codes[column] = (codes.astype(np.int64), uniques)
+        return self.codes[column]
+
+    def group_ids(self, keys):
+        """
+        Dense group id per row, ordered by key values, plus a frame of each
+        group's key values and its row count. When the key codes fit a
+        mixed-radix number of modest size, groups are found with one
+        bincount and their key values decoded from it; otherwise the
+        combined codes are factorized.
+        """
+        combined, uniques = self.key_codes(keys[0])
+        size = len(uniques)
+        compacted = False
+        for key in keys[1:]:
+            codes, uniques = self.key_codes(key)
+            if size * len(uniques) >= 2 ** 62:
+                # Compact the ids seen so far before the mixed-radix number overflows
+                combined, seen = pd.factorize(combined, sort=True)
+                size = len(seen)
+                compacted = True
+            combined = combined * len(uniques) + codes
+            size *= len(uniques)
+
+        if not compacted and size <= max(4 * len(combined), 1024):
+            counts = np.bincount(combined, minlength=size)
+            present = np.flatnonzero(counts)
+            remap = np.zeros(size, dtype=np.int64)
+            remap[present] = np.arange(len(present))
+            digits = present
+            groups = {}
+            for key in reversed(keys):
+                uniques = self.key_codes(key)[1]
+                digits, digit = np.divmod(digits, len(uniques))
+                groups[key] = uniques.take(digit)
+            groups = pd.DataFrame({key: groups[key] for key in keys})
+            groups["rows"] = counts[present]
+            return remap[combined], groups
+
+        _, first_rows, ids, counts = np.unique(combined, return_index=True, return_inverse=True,
+                                               return_counts=True)
+        groups = self.df[keys].iloc[first_rows].reset_index(drop=True)
+        groups["rows"] = counts
+        return ids.reshape(-1), groups
+
+    def aggregate(self, keys, values, aggregations, pivot=None):
+        """
+        One row per group of keys with a "rows" count and a "<value>_<aggregation>"
+        column per value and aggregation. With pivot, every distinct value of
+        the pivot column becomes a column group instead of part of the key.
+        """
+        keys = list(keys)
+        values = list(values)
+        aggregations = list(aggregations)
+        request = (tuple(keys), tuple(values), tuple(aggregations), pivot)
+        if request in self.results:
+            self.results.move_to_end(request)
+            return self.results[request]
+
+        self.validate(keys, values, aggregations, pivot)
+        group_keys = keys + ([pivot] if pivot else [])
+        ids, result = self.group_ids(group_keys)
+        for value in values:
+            grouped = self.df[value].groupby(ids, sort=True)
+            for aggregation in aggregations:
+                result[f"{value}_{aggregation}"] = aggregate_series(grouped, aggregation).to_numpy()
+
+        if pivot:
+            result = self.spread(result, keys, pivot)
+
+        self.results[request] = result
+        while len(self.results) > self.max_cached:
+            self.results.popitem(last=False)
+        return result
+
+    def validate(self, keys, values, aggregations, pivot):
+        columns = set(self.df.columns)
+        missing = [col for col in keys + values + ([pivot] if pivot else []) if col not in columns]
+        if missing:
+            raise AggregateError(f"No such column(s): {', '.join(missing)}")
+        if not keys:
+            raise AggregateError("Pick at least one key column to group by.")
+        if pivot in keys:
+            raise AggregateError("The pivot column cannot also be a key column.")
+        if values and not aggregations:
+            raise AggregateError("Pick at least one aggregation.")
+        unknown = [agg for agg in aggregations if agg not in AGGREGATIONS]
+        if unknown:
+            raise AggregateError(f"Unknown aggregation(s): {', '.join(unknown)}")
+        numeric_needed = [agg for agg in aggregations if agg in NUMERIC_AGGREGATIONS]
+        for value in values:
+            series = self.df[value]
+            if numeric_needed and not (pd.api.types.is_numeric_dtype(series)
+                                       and not pd.api.types.is_bool_dtype(series)):
+                raise AggregateError(f"'{value}' is not numeric, so it only supports "
+                                     f"count, min, max and nunique (not {', '.join(numeric_needed)}).")
+        if pivot and len(self.key_codes(pivot)[1]) > MAX_PIVOT_COLUMNS:
+            raise AggregateError(f"'{pivot}' has {len(self.key_codes(pivot)[1]):,} distinct values; "
+                                 f"pivoting allows at most {MAX_PIVOT_COLUMNS}.")
+
+    @staticmethod
+    def spread(result, keys, pivot):
+        """Turn the pivot column's values into column groups: "<measure> | <pivot value>" """
+        wide = result.set_index(keys + [pivot]).unstack(pivot)
+        measures = wide.columns.get_level_values(0).unique()
+        wide.columns = [str(pivot_value) if len(measures) == 1 else f"{measure} | {pivot_value}"
+                        for measure, pivot_value in wide.columns]
+        return wide.reset_index()
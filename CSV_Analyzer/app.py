@@ -1,16 +1,42 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 import seaborn as sns
-import threading
+import glob
+import os
+import time
 from datetime import datetime
 
+from aggregate import AGGREGATIONS, AggregateError
+from charts import (LINE_POINTS_PER_PIXEL, MAX_HISTOGRAM_BINS, ChartCache, ChartError,
+                    build_correlation_heatmap)
+from correlation import cluster_order, correlation_matrix, correlation_positions, top_pairs
+from data_grid import VirtualGrid
+from excel import ExcelError, is_excel_file, list_sheets
+from exporter import describe_format
+from filters import FilterError
+from jobs import FINISHED, OUTDATED, QUEUED, JobScheduler
+from loader import PARSER_ENGINES, format_duration, format_throughput
+from optimize import describe_report
+from outofcore import should_use_out_of_core
+from pipeline import CleaningPipeline, PipelineError
+from profiling import DatasetProfile
+from row_index import RowHashIndex
+from session import DataSession, SessionError, dtype_label, replay_pipeline, should_stream
+
 # Set seaborn style for better visuals
 sns.set_style("whitegrid")
 
+FILTER_HELP = ("Examples:\n"
+               "price >= 10 and price < 20\n"
+               "age between 30 and 40\n"
+               "city in (Paris, \"New York\")\n"
+               "name contains smith; email is not null\n"
+               "Use backticks for column names with spaces: `unit price` > 5")
+# How often the Tk thread picks up results of background jobs
+JOB_POLL_MS = 50
+
 class EnhancedCSVAnalyzerApp:
     def __init__(self, root):
         self.root = root
@@ -28,10 +54,44 @@ class EnhancedCSVAnalyzerApp:
         
         # Set icon and styling
         self.root.option_add('*TCombobox*Listbox.font', ('Segoe UI', 10))
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.bind("<Control-z>", self.undo)
+        self.root.bind("<Control-y>", self.redo)
         
-        self.df = None
-        self.cleaned_df = None
+        # The dataset and every operation on it; the window only presents it
+        self.session = DataSession()
+        self.session.listeners.append(self.on_session_event)
         self.current_figure = None
+        self.density_scatter = None
+        self.current_histogram = None
+        # Built figures by (chart type, columns, options, filter, data version)
+        self.chart_cache = ChartCache()
+        self.chart_request = 0
+        self.chart_started = 0
+        self.chart_canvas = None
+        self.is_loading = False
+        self.load_job = None
+        self.export_job = None
+        self.pre_load_state = None
+        
+        # Single-pass sketch statistics instead of exact describe()/nunique()
+        self.approximate_stats = tk.BooleanVar(value=False)
+        self.approximate_stats.trace_add(
+            "write", lambda *args: setattr(self.session, "approximate", self.approximate_stats.get()))
+        self.pipeline_title = None
+        self.pipeline_steps_label = None
+        self.undo_btn = None
+        self.redo_btn = None
+        # Loads, profiles, pipeline runs and charts run as background jobs
+        self.jobs = JobScheduler(current_version=lambda: self.session.data_version)
+        self.jobs.listeners.append(self.refresh_jobs_panel)
+        self.jobs_tree = None
+        self.jobs_tick = None
+        # Background profile builds by profile key, waited on instead of recomputed
+        self.profile_jobs = {}
+        self.groupby_result = None
+        self.groupby_grid = None
+        self.correlation_display = None
         
         # ===== Custom Colors =====
         self.colors = {
@@ -87,11 +147,16 @@ class EnhancedCSVAnalyzerApp:
         # Sidebar Menu
         menu_items = [
             ("📁 Load Data", self.load_csv),
+            ("📂 Load Folder", self.load_folder),
             ("🏠 Dashboard", self.show_dashboard),
             ("🧹 Data Cleaning", self.show_cleaning_panel),
             ("📈 Visualizations", self.show_visualization_panel),
             ("📊 Statistics", self.show_statistics_panel),
-            ("💾 Export Data", self.export_cleaned_csv)
+            ("🧮 Group By", self.show_groupby_panel),
+            ("🔗 Correlations", self.show_correlation_panel),
+            ("💾 Export Data", self.export_cleaned_csv),
+            ("⏱️ Background Jobs", self.show_jobs_panel),
+            ("🗑️ Clear Cache", self.purge_cache)
         ]
         
         for i, (text, command) in enumerate(menu_items):
@@ -114,6 +179,83 @@ class EnhancedCSVAnalyzerApp:
             btn.bind("<Enter>", lambda e, b=btn: b.config(bg="#4a5568"))
             btn.bind("<Leave>", lambda e, b=btn: b.config(bg=self.colors['sidebar']))
         
+        # Optional dtype optimization pass after loading
+        self.optimize_on_load = tk.BooleanVar(value=True)
+        tk.Checkbutton(
+            self.sidebar,
+            text="⚡ Optimize dtypes on load",
+            variable=self.optimize_on_load,
+            font=("Segoe UI", 9),
+            bg=self.colors['sidebar'],
+            fg="white",
+            selectcolor=self.colors['sidebar'],
+            activebackground=self.colors['sidebar'],
+            activeforeground="white",
+            anchor="w",
+            padx=20
+        ).pack(fill="x", padx=10, pady=(15, 2))
+        
+        # Out-of-core mode keeps the dataset in memory-mapped column files
+        self.out_of_core = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            self.sidebar,
+            text="💽 Out-of-core mode (huge files)",
+            variable=self.out_of_core,
+            font=("Segoe UI", 9),
+            bg=self.colors['sidebar'],
+            fg="white",
+            selectcolor=self.colors['sidebar'],
+            activebackground=self.colors['sidebar'],
+            activeforeground="white",
+            anchor="w",
+            padx=20
+        ).pack(fill="x", padx=10, pady=2)
+        
+        # read_csv parser engine; "auto" picks multithreaded pyarrow when it is installed
+        engine_frame = tk.Frame(self.sidebar, bg=self.colors['sidebar'])
+        engine_frame.pack(fill="x", padx=30, pady=2)
+        tk.Label(
+            engine_frame,
+            text="🧩 CSV parser",
+            font=("Segoe UI", 9),
+            bg=self.colors['sidebar'],
+            fg="white"
+        ).pack(side="left")
+        self.parser_engine = tk.StringVar(value="auto")
+        ttk.Combobox(
+            engine_frame,
+            textvariable=self.parser_engine,
+            values=PARSER_ENGINES,
+            state="readonly",
+            width=8,
+            font=("Segoe UI", 9)
+        ).pack(side="right")
+        
+        # Memory budget for the undo history
+        budget_frame = tk.Frame(self.sidebar, bg=self.colors['sidebar'])
+        budget_frame.pack(fill="x", padx=30, pady=2)
+        tk.Label(
+            budget_frame,
+            text="↩️ Undo memory (MB)",
+            font=("Segoe UI", 9),
+            bg=self.colors['sidebar'],
+            fg="white"
+        ).pack(side="left")
+        self.history_budget = tk.IntVar(value=self.session.history.budget_bytes // (1024 * 1024))
+        budget_box = tk.Spinbox(
+            budget_frame,
+            from_=0,
+            to=65536,
+            increment=64,
+            width=6,
+            textvariable=self.history_budget,
+            command=self.set_history_budget,
+            font=("Segoe UI", 9)
+        )
+        budget_box.pack(side="right")
+        budget_box.bind("<Return>", lambda e: self.set_history_budget())
+        budget_box.bind("<FocusOut>", lambda e: self.set_history_budget())
+        
         # Status at bottom of sidebar
         self.status_frame = tk.Frame(self.sidebar, bg="#1a202c", height=80)
         self.status_frame.pack(side="bottom", fill="x", pady=(20, 0))
@@ -130,6 +272,34 @@ class EnhancedCSVAnalyzerApp:
         )
         self.status_label.pack(anchor="w")
         
+        # Cancel button shown while a streaming load is running
+        self.cancel_load_btn = tk.Button(
+            self.status_frame,
+            text="✖ Cancel Loading",
+            font=("Segoe UI", 9),
+            bg="#f72585",
+            fg="white",
+            padx=10,
+            pady=2,
+            cursor="hand2",
+            relief="flat",
+            command=self.cancel_loading
+        )
+        
+        # Cancel button shown while an export is being written
+        self.cancel_export_btn = tk.Button(
+            self.status_frame,
+            text="✖ Cancel Export",
+            font=("Segoe UI", 9),
+            bg="#f72585",
+            fg="white",
+            padx=10,
+            pady=2,
+            cursor="hand2",
+            relief="flat",
+            command=self.cancel_export
+        )
+        
         # ===== Main Content Area =====
         self.content_area = tk.Frame(self.main_container, bg=self.colors['light'])
         self.content_area.pack(side="right", fill="both", expand=True, padx=2, pady=2)
@@ -158,6 +328,46 @@ class EnhancedCSVAnalyzerApp:
         )
         self.file_info_label.pack(side="right", padx=20)
         
+        # ===== Filter Bar (applies to the preview, charts and statistics) =====
+        self.filter_bar = tk.Frame(self.content_area, bg="white")
+        self.filter_bar.pack(fill="x", padx=20, pady=(0, 10))
+        
+        tk.Label(
+            self.filter_bar,
+            text="🔎 Filter:",
+            font=("Segoe UI", 10, "bold"),
+            bg="white",
+            fg=self.colors['dark']
+        ).pack(side="left", padx=(20, 10), pady=8)
+        
+        self.filter_entry = tk.Entry(self.filter_bar, font=("Segoe UI", 10), relief="solid", bd=1)
+        self.filter_entry.pack(side="left", fill="x", expand=True, ipady=3)
+        self.filter_entry.bind("<Return>", self.apply_filter)
+        
+        for text, command, color in (("Apply", self.apply_filter, self.colors['primary']),
+                                     ("Clear", self.clear_filter, "#718096")):
+            tk.Button(
+                self.filter_bar,
+                text=text,
+                font=("Segoe UI", 9, "bold"),
+                bg=color,
+                fg="white",
+                padx=12,
+                pady=2,
+                cursor="hand2",
+                relief="flat",
+                command=command
+            ).pack(side="left", padx=(10, 0))
+        
+        self.filter_info_label = tk.Label(
+            self.filter_bar,
+            text="All rows",
+            font=("Segoe UI", 9),
+            bg="white",
+            fg="#718096"
+        )
+        self.filter_info_label.pack(side="left", padx=(10, 20))
+        
         # ===== Card Container for Content =====
         self.card_container = tk.Frame(self.content_area, bg=self.colors['light'])
         self.card_container.pack(fill="both", expand=True, padx=20, pady=(0, 20))
@@ -172,6 +382,13 @@ class EnhancedCSVAnalyzerApp:
             length=300
         )
         
+        # Results of background jobs are picked up here, on the Tk thread
+        self.poll_jobs()
+        
+    def poll_jobs(self):
+        self.jobs.drain()
+        self.root.after(JOB_POLL_MS, self.poll_jobs)
+    
     def show_welcome_card(self):
         self.clear_content()
         
@@ -261,7 +478,7 @@ class EnhancedCSVAnalyzerApp:
         upload_btn.bind("<Leave>", lambda e: upload_btn.config(bg=self.colors['primary']))
     
     def show_dashboard(self):
-        if self.df is None:
+        if self.session.df is None:
             self.show_message("No Data", "Please load a CSV file first.", "info")
             return
         
@@ -272,7 +489,7 @@ class EnhancedCSVAnalyzerApp:
         
         tk.Label(
             dashboard_card,
-            text="🏠 Data Dashboard",
+            text="🏠 Data Dashboard (partial - still loading...)" if self.is_loading else "🏠 Data Dashboard",
             font=("Segoe UI", 16, "bold"),
             bg="white",
             fg=self.colors['dark']
@@ -282,12 +499,19 @@ class EnhancedCSVAnalyzerApp:
         metrics_frame = tk.Frame(dashboard_card, bg="white")
         metrics_frame.pack(fill="x", pady=(0, 20))
         
+        profile = self.get_profile()
+        memory_text = f"{profile.memory_mb:.2f} MB"
+        if self.session.cleaned_store is not None:
+            memory_text += " on disk (mapped)"
+        elif self.session.optimization_report is not None:
+            memory_text += f" (was {self.session.optimization_report['memory_before'] / 1024 / 1024:.2f} MB)"
+        
         metrics = [
-            ("📊 Total Rows", f"{self.cleaned_df.shape[0]:,}", "#4361ee"),
-            ("📈 Total Columns", f"{self.cleaned_df.shape[1]}", "#7209b7"),
-            ("⚠️ Missing Values", f"{self.cleaned_df.isnull().sum().sum():,}", "#f8961e"),
-            ("🔍 Duplicate Rows", f"{self.cleaned_df.duplicated().sum():,}", "#f72585"),
-            ("💾 Memory Usage", f"{self.cleaned_df.memory_usage(deep=True).sum() / 1024 / 1024:.2f} MB", "#4cc9f0"),
+            ("📊 Total Rows", f"{self.session.cleaned_df.shape[0]:,}", "#4361ee"),
+            ("📈 Total Columns", f"{self.session.cleaned_df.shape[1]}", "#7209b7"),
+            ("⚠️ Missing Values", f"{profile.missing_total:,}", "#f8961e"),
+            ("🔍 Duplicate Rows", f"{profile.duplicate_rows:,}", "#f72585"),
+            ("💾 Memory Usage", memory_text, "#4cc9f0"),
             ("📅 Last Updated", datetime.now().strftime("%Y-%m-%d %H:%M"), "#38b000")
         ]
         
@@ -318,6 +542,18 @@ class EnhancedCSVAnalyzerApp:
             
             metrics_frame.grid_columnconfigure(i%3, weight=1)
         
+        # Before/after memory report from the dtype optimization pass
+        if self.session.optimization_report is not None:
+            tk.Label(
+                dashboard_card,
+                text=f"⚡ Dtype optimization: {describe_report(self.session.optimization_report)}",
+                font=("Segoe UI", 9),
+                bg="white",
+                fg="#718096",
+                wraplength=900,
+                justify="left"
+            ).pack(anchor="w", pady=(0, 15))
+        
         # Quick Actions
         actions_frame = tk.Frame(dashboard_card, bg="#f1f5f9", padx=20, pady=20)
         actions_frame.pack(fill="x", pady=(0, 20))
@@ -369,28 +605,9 @@ class EnhancedCSVAnalyzerApp:
             fg=self.colors['dark']
         ).pack(anchor="w", pady=(0, 15))
         
-        # Create table for quick preview
-        table_frame = tk.Frame(preview_frame, bg="white")
-        table_frame.pack(fill="both", expand=True)
-        
-        # Add scrollbars
-        h_scrollbar = ttk.Scrollbar(table_frame, orient="horizontal")
-        v_scrollbar = ttk.Scrollbar(table_frame, orient="vertical")
-        
-        self.dash_tree = ttk.Treeview(
-            table_frame,
-            show="headings",
-            xscrollcommand=h_scrollbar.set,
-            yscrollcommand=v_scrollbar.set,
-            height=8
-        )
-        
-        h_scrollbar.config(command=self.dash_tree.xview)
-        v_scrollbar.config(command=self.dash_tree.yview)
-        
-        h_scrollbar.pack(side="bottom", fill="x")
-        v_scrollbar.pack(side="right", fill="y")
-        self.dash_tree.pack(side="left", fill="both", expand=True)
+        # Virtualized table: scrolls through every row but only renders what fits
+        self.dash_grid = VirtualGrid(preview_frame, height=8, column_width=100, bg="white")
+        self.dash_grid.pack(fill="both", expand=True)
         
         # Configure treeview style
         style = ttk.Style()
@@ -412,46 +629,40 @@ class EnhancedCSVAnalyzerApp:
             relief="flat"
         )
         
-        # Populate table with first 10 rows
-        preview_df = self.cleaned_df.head(10)
-        self.dash_tree["columns"] = list(preview_df.columns)
-        
-        for col in preview_df.columns:
-            self.dash_tree.heading(col, text=col)
-            self.dash_tree.column(col, width=100, anchor="center", minwidth=50)
-        
-        for _, row in preview_df.iterrows():
-            self.dash_tree.insert("", "end", values=list(row))
+        self.dash_grid.set_data(self.session.cleaned_df)
     
     def remove_all_missing(self):
-        original_rows = len(self.cleaned_df)
-        original_missing = self.cleaned_df.isnull().sum().sum()
-        
-        self.cleaned_df = self.cleaned_df.dropna()
+        if self.loading_in_progress():
+            return
         
-        removed_rows = original_rows - len(self.cleaned_df)
-        removed_missing = original_missing - self.cleaned_df.isnull().sum().sum()
+        original_rows = len(self.session.cleaned_df)
+        # Picks up the profile being built in the background, which the session then reuses
+        self.get_profile()
+        removed_rows, removed_missing = self.session.remove_missing_rows()
+        self.update_pipeline_view()
         
         message = (f"Removed all missing values!\n\n"
                   f"• Removed {removed_rows} rows with missing values\n"
                   f"• Eliminated {removed_missing} missing values\n"
-                  f"• New dataset has {len(self.cleaned_df):,} rows\n"
-                  f"• Data retained: {(len(self.cleaned_df)/original_rows*100):.1f}%")
+                  f"• New dataset has {len(self.session.cleaned_df):,} rows\n"
+                  f"• Data retained: {(len(self.session.cleaned_df)/original_rows*100):.1f}%")
         
         self.show_message("Missing Values Removed", message, "success")
         self.show_dashboard()
     
     def remove_all_duplicates(self):
-        original_rows = len(self.cleaned_df)
-        duplicate_count = self.cleaned_df.duplicated().sum()
+        if self.loading_in_progress():
+            return
         
-        self.cleaned_df = self.cleaned_df.drop_duplicates()
+        original_rows = len(self.session.cleaned_df)
+        duplicate_count = self.session.remove_duplicates()
+        self.update_pipeline_view()
         
         message = (f"Removed all duplicate rows!\n\n"
                   f"• Removed {duplicate_count} duplicate rows\n"
                   f"• Original rows: {original_rows:,}\n"
-                  f"• New row count: {len(self.cleaned_df):,}\n"
-                  f"• Data retained: {(len(self.cleaned_df)/original_rows*100):.1f}%")
+                  f"• New row count: {len(self.session.cleaned_df):,}\n"
+                  f"• Data retained: {(len(self.session.cleaned_df)/original_rows*100):.1f}%")
         
         self.show_message("Duplicates Removed", message, "success")
         self.show_dashboard()
@@ -462,6 +673,178 @@ class EnhancedCSVAnalyzerApp:
     def show_quick_summary(self):
         self.show_statistics_panel()
     
+    def get_profile(self, original=False, approximate=None, filtered=False):
+        """
+        Profile of the cleaned (or original) dataset from the session, picking up
+        a background build of it when one is running. approximate defaults to the
+        "Approximate statistics" setting; filtered profiles the rows matching the filter bar.
+        """
+        if approximate is None:
+            approximate = self.approximate_stats.get()
+        if original or not filtered or not self.session.filter_text:
+            key = ("original" if original else "cleaned", approximate)
+            profile = self.session.profiles.get(key)
+            if profile is None or profile.version != self.session.data_version:
+                self.wait_for_profile_job(key)
+        return self.session.profile(original, approximate, filtered)
+    
+    def snapshot(self):
+        """The current data version, for a job to read while the app moves on"""
+        return self.session.snapshot()
+    
+    def get_view(self):
+        """The cleaned data with the filter bar's filter applied"""
+        return self.session.view()
+    
+    def on_session_event(self, event, detail):
+        """Keep the window in line with the session: caches, filter bar and undo buttons"""
+        if event == "data":
+            self.chart_cache.discard_versions_before(self.session.data_version)
+            if not detail:
+                self.prefetch_profile()
+        elif event == "filter":
+            self.filter_entry.delete(0, tk.END)
+            self.update_filter_info()
+            self.update_status(f"Filter cleared: {detail}")
+        elif event == "history":
+            if detail is not None:
+                self.update_status(f"{detail} is too large for the undo budget")
+            self.update_history_buttons()
+    
+    def apply_filter(self, event=None):
+        if self.session.df is None:
+            self.show_message("No Data", "Please load a CSV file first.", "info")
+            return
+        if self.loading_in_progress():
+            return
+        
+        start = time.perf_counter()
+        try:
+            mask = self.session.set_filter(self.filter_entry.get())
+        except FilterError as e:
+            self.show_message("Invalid Filter", f"{e}\n\n{FILTER_HELP}", "warning")
+            return
+        
+        self.update_filter_info(time.perf_counter() - start)
+        self.update_status(f"Filter matched {int(mask.sum()):,} rows" if mask is not None
+                           else "Filter cleared")
+        self.refresh_data_preview()
+    
+    def clear_filter(self):
+        self.filter_entry.delete(0, tk.END)
+        if self.session.filter_text:
+            self.session.set_filter("")
+            self.update_filter_info()
+            self.update_status("Filter cleared")
+            self.refresh_data_preview()
+    
+    def update_filter_info(self, seconds=None):
+        mask = self.session.filter_mask() if self.session.cleaned_df is not None else None
+        if mask is None:
+            self.filter_info_label.config(text="All rows")
+            return
+        text = f"{int(mask.sum()):,} of {len(mask):,} rows"
+        if seconds is not None:
+            text += f" ({seconds * 1000:.0f} ms)"
+        self.filter_info_label.config(text=text)
+    
+    def prefetch_profile(self):
+        """Start building the cleaned-data profile in the background after a cleaning step"""
+        key = ("cleaned", self.approximate_stats.get())
+        previous = self.profile_jobs.pop(key, None)
+        if previous is not None:
+            self.jobs.cancel(previous)
+        
+        snapshot = self.snapshot()
+        row_index = self.session.row_index
+        index = row_index if row_index is not None and row_index.version == snapshot.version else None
+        
+        def build_profile(job):
+            row_index = index
+            if row_index is None:
+                if snapshot.cleaned_store is not None:
+                    row_index = RowHashIndex(snapshot.cleaned_store.row_hashes(), snapshot.version)
+                else:
+                    row_index = RowHashIndex.build(snapshot.cleaned, snapshot.version)
+            job.check_cancelled()
+            duplicates = row_index.duplicate_count()
+            if snapshot.cleaned_store is not None:
+                profile = DatasetProfile.from_store(snapshot.cleaned_store, snapshot.version,
+                                                    duplicates, key[1])
+            else:
+                profile = DatasetProfile.from_frame(snapshot.cleaned, snapshot.version,
+                                                    duplicates, key[1])
+            return profile, row_index
+        
+        self.profile_jobs[key] = self.jobs.submit(
+            "Profile cleaned data", build_profile, kind="profile", version=snapshot.version,
+            on_done=lambda result: self.on_profile_built(key, *result)
+        )
+    
+    def on_profile_built(self, key, profile, row_index):
+        self.profile_jobs.pop(key, None)
+        session = self.session
+        session.profiles[key] = profile
+        if session.row_index is None or session.row_index.version != session.data_version:
+            session.row_index = row_index
+    
+    def wait_for_profile_job(self, key):
+        """Result of a background profile build for the current version, or None"""
+        job = self.profile_jobs.pop(key, None)
+        if job is None or job.version != self.session.data_version or job.status in FINISHED:
+            return None
+        if job.status == QUEUED:
+            # Waiting behind other jobs would take longer than building it here
+            self.jobs.cancel(job)
+            return None
+        try:
+            profile, row_index = job.result()
+        except Exception:
+            return None
+        self.on_profile_built(key, profile, row_index)
+        return profile
+    
+    def update_history_buttons(self):
+        history = self.session.history
+        for button, stack in ((self.undo_btn, history.undo_stack),
+                              (self.redo_btn, history.redo_stack)):
+            if button is not None and button.winfo_exists():
+                button.config(state="normal" if stack else "disabled")
+    
+    def undo(self, event=None):
+        self.step_history(undo=True)
+    
+    def redo(self, event=None):
+        self.step_history(undo=False)
+    
+    def step_history(self, undo):
+        """Apply an undo or redo and bring every view back in line with the data"""
+        if self.session.cleaned_df is None or self.loading_in_progress():
+            return
+        
+        entry = self.session.step_history(undo)
+        if entry is None:
+            return
+        
+        self.update_status(f"{'Undid' if undo else 'Redid'}: {entry.label}\n"
+                           f"{len(self.session.cleaned_df):,} rows")
+        self.update_history_buttons()
+        self.update_pipeline_view()
+        self.refresh_data_preview()
+    
+    def set_history_budget(self):
+        try:
+            megabytes = int(self.history_budget.get())
+        except (tk.TclError, ValueError):
+            return
+        self.session.history.set_budget(megabytes * 1024 * 1024)
+        self.update_history_buttons()
+    
+    def on_close(self):
+        self.jobs.shutdown()
+        self.session.close()
+        self.root.destroy()
+    
     def clear_content(self):
         for widget in self.card_container.winfo_children():
             widget.destroy()
@@ -632,49 +1015,510 @@ class EnhancedCSVAnalyzerApp:
         return lines
 
     def load_csv(self):
+        if self.is_loading:
+            self.show_message("Loading In Progress",
+                            "A file is already being loaded. Cancel it or wait for it to finish.", "warning")
+            return
+        
         self.update_status("Selecting file...")
         
-        path = filedialog.askopenfilename(
+        paths = filedialog.askopenfilenames(
             filetypes=[
                 ("CSV Files", "*.csv"),
-                ("Excel Files", "*.xlsx"),
+                ("Excel Files", "*.xlsx *.xlsm *.xls"),
                 ("All Files", "*.*")
             ]
         )
         
-        if not path:
+        if not paths:
             self.update_status("Ready")
             return
+        if len(paths) > 1:
+            self.load_files(list(paths))
+            return
+        path = paths[0]
+        if is_excel_file(path):
+            self.load_excel(path)
+            return
         
         self.update_status("Loading file...")
         
-        # Show loading animation
-        self.progress.place(relx=0.5, rely=0.5, anchor="center")
-        self.progress.start()
+        # Files bigger than half the RAM switch to out-of-core mode automatically
+        if should_use_out_of_core(path):
+            self.out_of_core.set(True)
+        out_of_core = self.out_of_core.get()
+        # Large files stream in chunks with progress, cancel and a partial preview;
+        # only an explicitly chosen pyarrow engine parses them in one call
+        engine = self.parser_engine.get()
+        streaming = should_stream(path, engine, out_of_core)
+        optimize = self.optimize_on_load.get()
+        self.begin_loading(determinate=streaming)
+        
+        # Load as a background job; the result is handed back to the Tk thread
+        def load_data(job):
+            start = time.perf_counter()
+            
+            def on_chunk(index, chunk, bytes_read, total_bytes):
+                if index == 0:
+                    self.jobs.post(self.on_first_chunk_loaded, path, chunk)
+                self.jobs.post(self.on_load_progress, bytes_read, total_bytes,
+                               time.perf_counter() - start)
+            
+            return self.session.read_csv(path, engine, optimize, out_of_core, streaming,
+                                         on_chunk=on_chunk, cancel_event=job.cancel_event,
+                                         on_status=self.post_status)
+        
+        self.submit_load(f"Load {os.path.basename(path)}", load_data)
+    
+    def post_status(self, message):
+        """Worker side: show message in the status bar"""
+        self.jobs.post(self.update_status, message)
+    
+    def load_excel(self, path):
+        """Ask for a sheet and row range, then stream that part of the workbook in the background"""
+        try:
+            sheets = list_sheets(path)
+        except ExcelError as e:
+            # Already says which file could not be opened, or which package is missing
+            self.update_status("Ready")
+            self.show_message("Excel Error", str(e), "error")
+            return
+        except Exception as e:
+            self.update_status("Ready")
+            self.show_message("Error", f"Error reading workbook:\n{str(e)}", "error")
+            return
+        
+        options = self.ask_excel_options(path, sheets)
+        if options is None:
+            self.update_status("Ready")
+            return
+        sheet, first_row, last_row = options
+        
+        self.update_status(f"Loading sheet {sheet}...")
+        optimize = self.optimize_on_load.get()
+        self.begin_loading(determinate=True)
+        
+        def load_data(job):
+            start = time.perf_counter()
+            
+            def on_chunk(index, chunk, rows_read, total_rows):
+                if index == 0:
+                    self.jobs.post(self.on_first_chunk_loaded, path, chunk)
+                self.jobs.post(self.on_sheet_progress, rows_read, total_rows,
+                               time.perf_counter() - start)
+            
+            return self.session.read_excel(path, sheet, first_row, last_row, optimize,
+                                           on_chunk=on_chunk, cancel_event=job.cancel_event,
+                                           on_status=self.post_status)
+        
+        self.submit_load(f"Load {os.path.basename(path)} [{sheet}]", load_data)
+    
+    def ask_excel_options(self, path, sheets):
+        """Sheet and data-row range picker; returns (sheet, first_row, last_row) or None"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Excel Import")
+        dialog.configure(bg="white", padx=25, pady=20)
+        dialog.transient(self.root)
+        dialog.grab_set()
+        
+        tk.Label(dialog, text=f"📗 {os.path.basename(path)}", font=("Segoe UI", 14, "bold"),
+                 bg="white", fg="#212529").grid(row=0, column=0, columnspan=2, sticky="w", pady=(0, 15))
+        
+        tk.Label(dialog, text="Sheet:", font=("Segoe UI", 11), bg="white").grid(row=1, column=0, sticky="w")
+        labels = [name if rows is None else f"{name} ({rows:,} rows)" for name, rows in sheets]
+        sheet_box = ttk.Combobox(dialog, values=labels, state="readonly", width=35, font=("Segoe UI", 10))
+        sheet_box.current(0)
+        sheet_box.grid(row=1, column=1, sticky="w", pady=5)
+        
+        tk.Label(dialog, text="First row:", font=("Segoe UI", 11), bg="white").grid(row=2, column=0, sticky="w")
+        first_entry = tk.Entry(dialog, width=12, font=("Segoe UI", 10))
+        first_entry.insert(0, "1")
+        first_entry.grid(row=2, column=1, sticky="w", pady=5)
         
-        # Load in background thread
-        def load_data():
+        tk.Label(dialog, text="Last row:", font=("Segoe UI", 11), bg="white").grid(row=3, column=0, sticky="w")
+        last_entry = tk.Entry(dialog, width=12, font=("Segoe UI", 10))
+        last_entry.grid(row=3, column=1, sticky="w", pady=5)
+        
+        tk.Label(dialog, text="Rows count from the first row below the header; leave Last row empty "
+                              "to read to the end of the sheet.",
+                 font=("Segoe UI", 9), bg="white", fg="#718096", wraplength=380,
+                 justify="left").grid(row=4, column=0, columnspan=2, sticky="w", pady=(5, 15))
+        
+        result = [None]
+        
+        def accept(event=None):
             try:
-                self.df = pd.read_csv(path)
-                self.cleaned_df = self.df.copy()
-                
-                self.root.after(0, self.on_data_loaded, path)
-            except Exception as e:
-                self.root.after(0, self.show_message, "Error", 
-                              f"Error loading file:\n{str(e)}", "error")
-            finally:
-                self.root.after(0, self.progress.stop)
-                self.root.after(0, self.progress.place_forget)
+                first_row = int(first_entry.get() or 1)
+                last_row = int(last_entry.get()) if last_entry.get().strip() else None
+                if first_row < 1 or (last_row is not None and last_row < first_row):
+                    raise ValueError
+            except ValueError:
+                messagebox.showwarning("Invalid Rows", "Rows must be whole numbers, with the last row "
+                                                       "not before the first.", parent=dialog)
+                return
+            result[0] = (sheets[sheet_box.current()][0], first_row, last_row)
+            dialog.destroy()
+        
+        button_frame = tk.Frame(dialog, bg="white")
+        button_frame.grid(row=5, column=0, columnspan=2)
+        tk.Button(button_frame, text="Load", bg=self.colors['primary'], fg="white", padx=30, pady=6,
+                  font=("Segoe UI", 10, "bold"), relief="flat", command=accept).pack(side="left", padx=10)
+        tk.Button(button_frame, text="Cancel", bg="#e2e8f0", fg="#212529", padx=30, pady=6,
+                  font=("Segoe UI", 10), relief="flat", command=dialog.destroy).pack(side="left", padx=10)
+        dialog.bind('<Return>', accept)
+        dialog.bind('<Escape>', lambda e: dialog.destroy())
+        
+        dialog.wait_window()
+        return result[0]
+    
+    def begin_loading(self, determinate):
+        """Shared setup for a background load"""
+        self.is_loading = True
+        session = self.session
+        self.pre_load_state = (session.df, session.cleaned_df, self.file_info_label.cget("text"),
+                               session.column_store, session.cleaned_store)
+        
+        # Show loading animation, or a real progress bar for streaming loads
+        # (kept at the bottom so it does not cover the partial dashboard)
+        if determinate:
+            self.progress.config(mode='determinate', maximum=100, value=0)
+            self.progress.place(relx=0.5, rely=0.99, anchor="s")
+            self.cancel_load_btn.pack(anchor="w", padx=20)
+        else:
+            self.progress.config(mode='indeterminate')
+            self.progress.start()
+            self.progress.place(relx=0.5, rely=0.5, anchor="center")
+    
+    def submit_load(self, name, load_data):
+        """
+        Run load_data(job) as the load job; it returns the LoadedData for
+        on_data_loaded, profiled in the job so the dashboard does not build it on the Tk thread.
+        """
+        def load_and_profile(job):
+            loaded = load_data(job)
+            try:
+                job.check_cancelled()
+                self.post_status("Profiling data...")
+                self.session.profile_loaded(loaded)
+                job.check_cancelled()
+            except BaseException:
+                # Never reaches the session, so nothing else would delete its column files
+                if loaded.store is not None:
+                    loaded.store.remove()
+                raise
+            return loaded
+        
+        self.load_job = self.jobs.submit(
+            name, load_and_profile, kind="load",
+            on_done=self.on_data_loaded,
+            on_error=lambda error: self.on_load_failed(str(error)),
+            on_cancel=self.on_load_cancelled,
+            on_finish=self.finish_loading
+        )
+    
+    def load_folder(self):
+        """Load every CSV file in a folder as one dataset"""
+        if self.is_loading:
+            self.show_message("Loading In Progress",
+                            "A file is already being loaded. Cancel it or wait for it to finish.", "warning")
+            return
+        
+        folder = filedialog.askdirectory()
+        if not folder:
+            return
+        
+        paths = sorted(glob.glob(os.path.join(folder, "*.csv")))
+        if not paths:
+            self.show_message("No CSV Files", f"No .csv files found in:\n{folder}", "info")
+            return
+        self.load_files(paths)
+    
+    def load_files(self, paths):
+        """
+        Parse several files in parallel worker processes and combine them into one
+        dataset, taking the union of their columns. Always loads into memory.
+        """
+        if any(is_excel_file(path) for path in paths):
+            self.update_status("Ready")
+            self.show_message("One Workbook at a Time",
+                              "Excel workbooks are loaded one at a time so a sheet can be picked; "
+                              "select a single workbook, or only CSV files.", "info")
+            return
+        self.update_status(f"Loading {len(paths)} files...")
+        optimize = self.optimize_on_load.get()
+        engine = self.parser_engine.get()
+        self.begin_loading(determinate=True)
+        
+        def load_data(job):
+            start = time.perf_counter()
+            
+            def on_file(done, total, timing):
+                self.jobs.post(self.on_file_loaded, done, total, timing,
+                               time.perf_counter() - start)
+            
+            return self.session.read_csv_files(paths, engine, optimize, on_file=on_file,
+                                               cancel_event=job.cancel_event,
+                                               on_status=self.post_status)
+        
+        self.submit_load(f"Load {len(paths)} files", load_data)
+    
+    def on_file_loaded(self, done, total, timing, elapsed):
+        """Progress of a multi-file load, one step per finished file"""
+        if not self.is_loading:
+            return
+        
+        self.progress.config(value=done / total * 100)
+        eta = elapsed * (total - done) / done
+        self.update_status(f"Loaded {done} / {total} files "
+                           f"({os.path.basename(timing['file'])}: {timing['seconds']:.1f}s)\n"
+                           f"ETA {format_duration(eta)}")
+    
+    def on_first_chunk_loaded(self, path, chunk):
+        """Show partial metrics as soon as the first chunk of a streaming load arrives"""
+        if not self.is_loading:
+            return
+        
+        self.session.replace_data(chunk, chunk.copy())
+        
+        filename = os.path.basename(path)
+        self.file_info_label.config(text=f"{filename} | loading...")
+        self.show_dashboard()
+    
+    def on_load_progress(self, bytes_read, total_bytes, elapsed):
+        """Report bytes read and estimated time remaining in the status bar"""
+        if not self.is_loading:
+            return
+        
+        fraction = bytes_read / total_bytes if total_bytes else 1.0
+        self.progress.config(value=fraction * 100)
+        
+        eta = elapsed * (total_bytes - bytes_read) / bytes_read if bytes_read else 0
+        self.update_status(f"Loading {bytes_read / 1024 / 1024:,.0f} / "
+                           f"{total_bytes / 1024 / 1024:,.0f} MB ({fraction * 100:.0f}%)\n"
+                           f"{format_throughput(bytes_read, elapsed)}, ETA {format_duration(eta)}")
+    
+    def on_sheet_progress(self, rows_read, total_rows, elapsed):
+        """Rows read so far; workbooks that do not record their size get no percentage or ETA"""
+        if not self.is_loading:
+            return
+        
+        if not total_rows:
+            self.update_status(f"Loading sheet: {rows_read:,} rows read")
+            return
+        fraction = min(rows_read / total_rows, 1.0)
+        self.progress.config(value=fraction * 100)
+        eta = elapsed * (total_rows - rows_read) / rows_read if rows_read else 0
+        self.update_status(f"Loading sheet: {rows_read:,} / {total_rows:,} rows "
+                           f"({fraction * 100:.0f}%)\nETA {format_duration(eta)}")
+    
+    def cancel_loading(self):
+        if self.load_job is not None:
+            self.jobs.cancel(self.load_job)
+            self.update_status("Cancelling...")
+    
+    def restore_pre_load_state(self):
+        """Put back the dataset that was open before a load was cancelled or failed"""
+        self.is_loading = False
+        if self.pre_load_state is None:
+            return
         
-        threading.Thread(target=load_data, daemon=True).start()
+        previous_df, previous_cleaned_df, file_info, column_store, cleaned_store = self.pre_load_state
+        self.pre_load_state = None
+        if self.session.df is previous_df:
+            return
+        
+        # A partial preview replaced the old dataset, so bring it back
+        self.session.replace_data(previous_df, previous_cleaned_df, column_store, cleaned_store)
+        self.file_info_label.config(text=file_info)
+        
+        if self.session.df is None:
+            self.show_welcome_card()
+        else:
+            self.show_dashboard()
+    
+    def on_load_cancelled(self):
+        self.restore_pre_load_state()
+        self.update_status("Loading cancelled")
+    
+    def on_load_failed(self, error):
+        self.restore_pre_load_state()
+        self.update_status("Loading failed")
+        self.show_message("Error", f"Error loading file:\n{error}", "error")
+    
+    def finish_loading(self):
+        self.is_loading = False
+        self.load_job = None
+        self.progress.stop()
+        self.progress.place_forget()
+        self.cancel_load_btn.pack_forget()
+    
+    def loading_in_progress(self):
+        """Tell the user to wait while a streaming load is still running"""
+        if self.is_loading:
+            self.show_message("Loading In Progress",
+                            "Please wait until the file has finished loading.", "info")
+            return True
+        return False
+    
+    def show_jobs_panel(self):
+        """Queued, running and finished background jobs with their timings"""
+        self.clear_content()
+        
+        jobs_card = tk.Frame(self.card_container, bg="white", padx=20, pady=20)
+        jobs_card.pack(fill="both", expand=True)
+        
+        header_frame = tk.Frame(jobs_card, bg="white")
+        header_frame.pack(fill="x", pady=(0, 20))
+        
+        tk.Label(
+            header_frame,
+            text="⏱️ Background Jobs",
+            font=("Segoe UI", 16, "bold"),
+            bg="white",
+            fg=self.colors['dark']
+        ).pack(side="left")
+        
+        for text, command in (("🧹 Clear Finished", self.jobs.clear_finished),
+                              ("⛔ Cancel Selected", self.cancel_selected_jobs)):
+            tk.Button(
+                header_frame,
+                text=text,
+                font=("Segoe UI", 10),
+                bg=self.colors['primary'],
+                fg="white",
+                padx=15,
+                pady=5,
+                cursor="hand2",
+                relief="flat",
+                command=command
+            ).pack(side="right", padx=(10, 0))
+        
+        tk.Label(
+            jobs_card,
+            text=f"{self.jobs.max_workers} worker threads. Jobs read a snapshot of one data version; "
+                 f"results for a version that has since changed are marked outdated and dropped.",
+            font=("Segoe UI", 9),
+            bg="white",
+            fg="#64748b",
+            wraplength=900,
+            justify="left"
+        ).pack(anchor="w", pady=(0, 10))
+        
+        tree_frame = tk.Frame(jobs_card, bg="white")
+        tree_frame.pack(fill="both", expand=True)
+        
+        v_scroll = ttk.Scrollbar(tree_frame, orient="vertical")
+        self.jobs_tree = ttk.Treeview(
+            tree_frame,
+            columns=("Job", "Kind", "Status", "Version", "Waited", "Ran", "Details"),
+            show="headings",
+            yscrollcommand=v_scroll.set,
+            height=15
+        )
+        v_scroll.config(command=self.jobs_tree.yview)
+        v_scroll.pack(side="right", fill="y")
+        self.jobs_tree.pack(side="left", fill="both", expand=True)
+        
+        for name, width in (("Job", 260), ("Kind", 80), ("Status", 90), ("Version", 70),
+                            ("Waited", 80), ("Ran", 80), ("Details", 260)):
+            self.jobs_tree.heading(name, text=name)
+            self.jobs_tree.column(name, width=width)
+        
+        self.refresh_jobs_panel()
+    
+    def refresh_jobs_panel(self):
+        if self.jobs_tree is None or not self.jobs_tree.winfo_exists():
+            return
+        
+        selected = set(self.jobs_tree.selection())
+        self.jobs_tree.delete(*self.jobs_tree.get_children())
+        for job in reversed(self.jobs.jobs):
+            ran = job.run_seconds
+            item = self.jobs_tree.insert("", "end", iid=str(job.id), values=(
+                job.name,
+                job.kind,
+                job.status,
+                "" if job.version is None else job.version,
+                f"{job.wait_seconds:.2f}s",
+                "" if ran is None else f"{ran:.2f}s",
+                job.error or ""
+            ))
+            if item in selected:
+                self.jobs_tree.selection_add(item)
+        
+        # Keep the running times ticking while anything is active
+        if self.jobs.active() and self.jobs_tick is None:
+            self.jobs_tick = self.root.after(500, self.tick_jobs_panel)
+    
+    def tick_jobs_panel(self):
+        self.jobs_tick = None
+        self.refresh_jobs_panel()
+    
+    def cancel_selected_jobs(self):
+        if self.jobs_tree is None:
+            return
+        selected = set(self.jobs_tree.selection())
+        for job in self.jobs.active():
+            if str(job.id) in selected:
+                if job.kind == "load":
+                    self.cancel_loading()
+                else:
+                    self.jobs.cancel(job)
+    
+    def purge_cache(self):
+        if self.loading_in_progress():
+            return
+        
+        entries = len(self.session.dataset_cache.entries())
+        if entries == 0:
+            self.show_message("Cache Empty", "There are no cached datasets to remove.", "info")
+            return
+        
+        size_mb = self.session.dataset_cache.total_size() / 1024 / 1024
+        if not self.show_message("Clear Cache",
+                               f"Delete {entries} cached datasets ({size_mb:.1f} MB)?",
+                               "question"):
+            return
+        
+        removed, freed = self.session.dataset_cache.purge()
+        # Files are sniffed again on their next load
+        self.session.dialects.clear()
+        self.update_status(f"Cache cleared ({freed / 1024 / 1024:.1f} MB freed)")
+        self.show_message("Cache Cleared",
+                         f"Removed {removed} cached datasets\n\n"
+                         f"• Freed: {freed / 1024 / 1024:.1f} MB\n"
+                         f"• Remembered CSV dialects were reset\n"
+                         f"• Location: {self.session.dataset_cache.cache_dir}",
+                         "success")
     
-    def on_data_loaded(self, path):
-        self.update_status("Data loaded successfully")
+    def on_data_loaded(self, loaded):
+        self.is_loading = False
+        previous_store = self.pre_load_state[3] if self.pre_load_state is not None else None
+        self.pre_load_state = None
+        # A partial preview took the previous out-of-core dataset out of the session
+        # without deleting its column files, so set_data() below cannot release them
+        if previous_store is not None and previous_store is not self.session.column_store:
+            previous_store.remove()
+        self.session.set_data(loaded)
+        self.clear_filter()
+        self.approximate_stats.set(self.session.approximate)
+        
+        cache = self.session.dataset_cache
+        self.update_status(f"Data loaded successfully\n"
+                           f"Cache {loaded.cache_status} ({cache.hits} hits / {cache.misses} misses)" +
+                           (f"\n{loaded.parse_info}" if loaded.parse_info else ""))
+        
+        path, sheet, shard_report = loaded.path, loaded.sheet, loaded.shard_report
+        df = self.session.df
         
         # Update file info
-        filename = path.split('/')[-1]
+        filename = os.path.basename(path)
+        if sheet is not None:
+            filename = f"{filename} [{sheet}]"
+        if shard_report is not None:
+            filename = f"{len(shard_report['files'])} files from {os.path.basename(os.path.dirname(path))}"
         self.file_info_label.config(
-            text=f"{filename} | {self.df.shape[0]} rows × {self.df.shape[1]} cols"
+            text=f"{filename} | {df.shape[0]} rows × {df.shape[1]} cols"
         )
         
         # Show dashboard
@@ -682,14 +1526,33 @@ class EnhancedCSVAnalyzerApp:
         
         # Show success message
         self.show_message("Success", 
-                         f"CSV file loaded successfully!\n\n"
+                         f"{'Excel' if sheet is not None else 'CSV'} file loaded successfully!\n\n"
                          f"• File: {filename}\n"
-                         f"• Rows: {self.df.shape[0]:,}\n"
-                         f"• Columns: {self.df.shape[1]}\n"
-                         f"• Missing values: {self.df.isnull().sum().sum():,}\n"
-                         f"• Duplicate rows: {self.df.duplicated().sum():,}",
+                         f"• Rows: {df.shape[0]:,}\n"
+                         f"• Columns: {df.shape[1]}\n"
+                         f"• Missing values: {self.get_profile().missing_total:,}\n"
+                         f"• Duplicate rows: {self.get_profile().duplicate_rows:,}" +
+                         (self.describe_shard_report(shard_report) if shard_report else ""),
                          "success")
     
+    def describe_shard_report(self, shard_report, max_files=8):
+        """Per-file timings and schema differences for the multi-file load message"""
+        files = shard_report["files"]
+        lines = [f"\n\nParsed {len(files)} files in {format_duration(shard_report['seconds'])}:"]
+        for timing in files[:max_files]:
+            lines.append(f"• {os.path.basename(timing['file'])}: {timing['rows']:,} rows, "
+                         f"{timing['seconds']:.2f}s")
+        if len(files) > max_files:
+            lines.append(f"• ... and {len(files) - max_files} more")
+        
+        schema = shard_report["schema"]
+        if schema["missing"]:
+            lines.append(f"\n{len(schema['missing'])} columns are missing from some files "
+                         f"(filled with nulls): {', '.join(map(str, schema['missing']))}")
+        for col, (dtypes, target) in schema["promoted"].items():
+            lines.append(f"• '{col}': {' / '.join(dtypes)} → {target}")
+        return "\n".join(lines)
+    
     def show_data_preview(self):
         self.clear_content()
         
@@ -709,14 +1572,15 @@ class EnhancedCSVAnalyzerApp:
         stats_grid = tk.Frame(stats_card, bg="white")
         stats_grid.pack(fill="x")
         
+        profile = self.get_profile(original=True)
         stats_data = [
-            ("Total Rows", f"{self.df.shape[0]:,}"),
-            ("Total Columns", f"{self.df.shape[1]}"),
-            ("Missing Values", f"{self.df.isnull().sum().sum():,}"),
-            ("Duplicate Rows", f"{self.df.duplicated().sum():,}"),
-            ("Memory Usage", f"{self.df.memory_usage(deep=True).sum() / 1024 / 1024:.2f} MB"),
-            ("Data Types", f"{len(self.df.select_dtypes(include=['number']).columns)} numeric, "
-                         f"{len(self.df.select_dtypes(include=['object']).columns)} text")
+            ("Total Rows", f"{self.session.df.shape[0]:,}"),
+            ("Total Columns", f"{self.session.df.shape[1]}"),
+            ("Missing Values", f"{profile.missing_total:,}"),
+            ("Duplicate Rows", f"{profile.duplicate_rows:,}"),
+            ("Memory Usage", f"{profile.memory_mb:.2f} MB"),
+            ("Data Types", f"{len(self.session.df.select_dtypes(include=['number']).columns)} numeric, "
+                         f"{len(self.session.df.select_dtypes(include=['object', 'category']).columns)} text")
         ]
         
         for i, (label, value) in enumerate(stats_data):
@@ -745,36 +1609,20 @@ class EnhancedCSVAnalyzerApp:
         preview_card = tk.Frame(self.card_container, bg="white", padx=20, pady=20)
         preview_card.pack(fill="both", expand=True)
         
+        # With a filter the matching cleaned rows are shown instead of the data as loaded
+        preview_data = self.get_view() if self.session.filter_text else self.session.df
         tk.Label(
             preview_card,
-            text="👁️ Data Preview (First 50 rows)",
+            text=f"👁️ Data Preview ({len(preview_data):,} rows"
+                 f"{', filtered: ' + self.session.filter_text if self.session.filter_text else ''})",
             font=("Segoe UI", 14, "bold"),
             bg="white",
             fg=self.colors['dark']
         ).pack(anchor="w", pady=(0, 15))
         
-        # Create table using ttk Treeview with better styling
-        table_frame = tk.Frame(preview_card, bg="white")
-        table_frame.pack(fill="both", expand=True)
-        
-        # Add scrollbars
-        h_scrollbar = ttk.Scrollbar(table_frame, orient="horizontal")
-        v_scrollbar = ttk.Scrollbar(table_frame, orient="vertical")
-        
-        self.tree = ttk.Treeview(
-            table_frame,
-            show="headings",
-            xscrollcommand=h_scrollbar.set,
-            yscrollcommand=v_scrollbar.set,
-            height=15
-        )
-        
-        h_scrollbar.config(command=self.tree.xview)
-        v_scrollbar.config(command=self.tree.yview)
-        
-        h_scrollbar.pack(side="bottom", fill="x")
-        v_scrollbar.pack(side="right", fill="y")
-        self.tree.pack(side="left", fill="both", expand=True)
+        # Virtualized table: rows are fetched from the DataFrame as the user scrolls
+        self.preview_grid = VirtualGrid(preview_card, height=15, column_width=120, bg="white")
+        self.preview_grid.pack(fill="both", expand=True)
         
         # Configure treeview style
         style = ttk.Style()
@@ -796,34 +1644,60 @@ class EnhancedCSVAnalyzerApp:
             relief="flat"
         )
         
-        # Populate table
-        preview_df = self.df.head(50)
-        self.tree["columns"] = list(preview_df.columns)
-        
-        for col in preview_df.columns:
-            self.tree.heading(col, text=col)
-            self.tree.column(col, width=120, anchor="center", minwidth=50)
-        
-        for _, row in preview_df.iterrows():
-            self.tree.insert("", "end", values=list(row))
+        self.preview_grid.set_data(preview_data)
     
     def show_cleaning_panel(self):
-        if self.df is None:
+        if self.session.df is None:
             self.show_message("No Data", "Please load a CSV file first.", "info")
             return
+        if self.loading_in_progress():
+            return
         
         self.clear_content()
         
         cleaning_card = tk.Frame(self.card_container, bg="white", padx=20, pady=20)
         cleaning_card.pack(fill="both", expand=True)
         
+        header_frame = tk.Frame(cleaning_card, bg="white")
+        header_frame.pack(fill="x", pady=(0, 20))
+        
         tk.Label(
-            cleaning_card,
+            header_frame,
             text="🧹 Data Cleaning Tools",
             font=("Segoe UI", 16, "bold"),
             bg="white",
             fg=self.colors['dark']
-        ).pack(anchor="w", pady=(0, 20))
+        ).pack(side="left")
+        
+        # Undo / redo (also Ctrl+Z / Ctrl+Y)
+        self.redo_btn = tk.Button(
+            header_frame,
+            text="↪️ Redo",
+            font=("Segoe UI", 10),
+            bg="#64748b",
+            fg="white",
+            padx=15,
+            pady=5,
+            cursor="hand2",
+            relief="flat",
+            command=self.redo
+        )
+        self.redo_btn.pack(side="right", padx=(5, 0))
+        
+        self.undo_btn = tk.Button(
+            header_frame,
+            text="↩️ Undo",
+            font=("Segoe UI", 10),
+            bg="#64748b",
+            fg="white",
+            padx=15,
+            pady=5,
+            cursor="hand2",
+            relief="flat",
+            command=self.undo
+        )
+        self.undo_btn.pack(side="right")
+        self.update_history_buttons()
         
         # Column selection
         selection_frame = tk.Frame(cleaning_card, bg="white")
@@ -839,7 +1713,7 @@ class EnhancedCSVAnalyzerApp:
         
         self.clean_column = ttk.Combobox(
             selection_frame,
-            values=list(self.cleaned_df.columns),
+            values=list(self.session.cleaned_df.columns),
             state="readonly",
             width=30,
             font=("Segoe UI", 10)
@@ -920,7 +1794,7 @@ class EnhancedCSVAnalyzerApp:
             fg=self.colors['dark']
         ).pack(anchor="w", pady=(0, 10))
         
-        # Duplicate removal button
+        # Duplicate removal buttons (whole row, or the selected column only)
         dup_btn = tk.Button(
             extra_frame,
             text="Remove Duplicate Rows",
@@ -937,6 +1811,22 @@ class EnhancedCSVAnalyzerApp:
         dup_btn.bind("<Enter>", lambda e: dup_btn.config(bg="#e63946"))
         dup_btn.bind("<Leave>", lambda e: dup_btn.config(bg="#f72585"))
         
+        dup_col_btn = tk.Button(
+            extra_frame,
+            text="Remove Duplicates in Column",
+            font=("Segoe UI", 11),
+            bg="#b5179e",
+            fg="white",
+            padx=30,
+            pady=10,
+            cursor="hand2",
+            relief="flat",
+            command=lambda: self.remove_duplicates_specific([self.clean_column.get()])
+        )
+        dup_col_btn.pack(side="left", padx=10)
+        dup_col_btn.bind("<Enter>", lambda e: dup_col_btn.config(bg="#7209b7"))
+        dup_col_btn.bind("<Leave>", lambda e: dup_col_btn.config(bg="#b5179e"))
+        
         # Outlier removal button
         outlier_btn = tk.Button(
             extra_frame,
@@ -953,22 +1843,142 @@ class EnhancedCSVAnalyzerApp:
         outlier_btn.pack(side="left", padx=10)
         outlier_btn.bind("<Enter>", lambda e: outlier_btn.config(bg="#f3722c"))
         outlier_btn.bind("<Leave>", lambda e: outlier_btn.config(bg=self.colors['warning']))
+        
+        self.create_pipeline_section(cleaning_card)
     
-    def remove_duplicates_specific(self):
-        original_rows = len(self.cleaned_df)
-        duplicate_count = self.cleaned_df.duplicated().sum()
+    def create_pipeline_section(self, parent):
+        """Recorded cleaning steps with save / replay controls"""
+        pipeline_frame = tk.Frame(parent, bg="#f1f5f9", padx=20, pady=20)
+        pipeline_frame.pack(fill="x", pady=(20, 0))
         
-        if duplicate_count == 0:
-            self.show_message("No Duplicates", "No duplicate rows found in the dataset.", "info")
+        self.pipeline_title = tk.Label(
+            pipeline_frame,
+            font=("Segoe UI", 12, "bold"),
+            bg="#f1f5f9",
+            fg=self.colors['dark']
+        )
+        self.pipeline_title.pack(anchor="w", pady=(0, 10))
+        
+        self.pipeline_steps_label = tk.Label(
+            pipeline_frame,
+            font=("Segoe UI", 10),
+            bg="#f1f5f9",
+            fg="#64748b",
+            justify="left"
+        )
+        self.pipeline_steps_label.pack(anchor="w", pady=(0, 10))
+        self.update_pipeline_view()
+        
+        buttons = [
+            ("Save Pipeline", self.save_pipeline, self.colors['primary']),
+            ("Run Saved Pipeline", self.run_saved_pipeline, self.colors['success']),
+            ("Clear Recorded Steps", self.clear_pipeline, "#64748b")
+        ]
+        for text, command, color in buttons:
+            tk.Button(
+                pipeline_frame,
+                text=text,
+                font=("Segoe UI", 10),
+                bg=color,
+                fg="white",
+                padx=20,
+                pady=8,
+                cursor="hand2",
+                relief="flat",
+                command=command
+            ).pack(side="left", padx=(0, 10))
+    
+    def update_pipeline_view(self):
+        if self.pipeline_title is None or not self.pipeline_title.winfo_exists():
+            return
+        steps = self.session.pipeline.describe()
+        self.pipeline_title.config(text=f"📜 Cleaning Pipeline ({len(steps)} recorded steps)")
+        self.pipeline_steps_label.config(
+            text="\n".join(f"{i}. {step}" for i, step in enumerate(steps, 1)) if steps
+                 else "No steps yet - every cleaning action above is recorded here."
+        )
+    
+    def save_pipeline(self):
+        if len(self.session.pipeline) == 0:
+            self.show_message("Empty Pipeline", "Apply some cleaning steps first.", "info")
             return
         
-        self.cleaned_df = self.cleaned_df.drop_duplicates()
+        path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("Cleaning Pipelines", "*.json"), ("All Files", "*.*")]
+        )
+        if path:
+            try:
+                self.session.pipeline.save(path)
+                self.update_status(f"Saved {len(self.session.pipeline)} cleaning steps")
+            except OSError as e:
+                self.show_message("Error", f"Failed to save pipeline:\n{str(e)}", "error")
+    
+    def run_saved_pipeline(self):
+        """Load a saved pipeline and replay it on the data as originally loaded"""
+        if self.loading_in_progress():
+            return
+        
+        path = filedialog.askopenfilename(
+            filetypes=[("Cleaning Pipelines", "*.json"), ("All Files", "*.*")]
+        )
+        if not path:
+            return
+        
+        try:
+            pipeline = CleaningPipeline.load(path)
+        except (OSError, ValueError, KeyError, PipelineError) as e:
+            self.show_message("Error", f"Failed to run pipeline:\n{str(e)}", "error")
+            return
+        
+        # Replayed as a job on the data as loaded; if the data changes before it
+        # finishes, the result belongs to an old version and is dropped
+        snapshot = self.snapshot()
+        
+        def run_pipeline(job):
+            return replay_pipeline(pipeline, snapshot)
+        
+        self.update_status(f"Running {len(pipeline)} cleaning steps...")
+        job = self.jobs.submit(
+            f"Pipeline {os.path.basename(path)}", run_pipeline, kind="cleaning",
+            version=snapshot.version,
+            on_done=lambda result: self.on_pipeline_done(pipeline, *result, job.run_seconds),
+            on_error=lambda e: self.show_message("Error", f"Failed to run pipeline:\n{str(e)}", "error"),
+            on_cancel=lambda: self.update_status("Pipeline run discarded: the data changed meanwhile")
+        )
+    
+    def on_pipeline_done(self, pipeline, cleaned, summary, seconds):
+        self.session.apply_pipeline(pipeline, cleaned)
+        self.update_status(f"Ran {len(pipeline)} cleaning steps in {format_duration(seconds)}")
+        self.show_message("Pipeline Applied",
+                         "\n".join(f"• {line}" for line in summary) +
+                         f"\n\nNew dataset has {len(self.session.cleaned_df):,} rows",
+                         "success")
+        self.show_cleaning_panel()
+    
+    def clear_pipeline(self):
+        """Forget the recorded steps; the cleaned data itself is left as it is"""
+        self.session.pipeline.clear()
+        self.show_cleaning_panel()
+    
+    def remove_duplicates_specific(self, subset=None):
+        original_rows = len(self.session.cleaned_df)
+        duplicate_count = self.session.remove_duplicates(subset)
+        self.update_pipeline_view()
+        
+        if duplicate_count == 0:
+            if subset:
+                self.show_message("No Duplicates",
+                                f"No duplicate values found in {', '.join(subset)}.", "info")
+            else:
+                self.show_message("No Duplicates", "No duplicate rows found in the dataset.", "info")
+            return
         
         message = (f"Duplicate rows removed!\n\n"
                   f"• Removed {duplicate_count} duplicate rows\n"
                   f"• Original rows: {original_rows:,}\n"
-                  f"• New row count: {len(self.cleaned_df):,}\n"
-                  f"• Data retained: {(len(self.cleaned_df)/original_rows*100):.1f}%")
+                  f"• New row count: {len(self.session.cleaned_df):,}\n"
+                  f"• Data retained: {(len(self.session.cleaned_df)/original_rows*100):.1f}%")
         
         self.update_status(f"Removed {duplicate_count} duplicate rows")
         self.show_message("Duplicates Removed", message, "success")
@@ -982,92 +1992,58 @@ class EnhancedCSVAnalyzerApp:
             return
         
         try:
-            original_missing = self.cleaned_df[col].isnull().sum()
-            original_rows = len(self.cleaned_df)
-            
-            if method == "Mean Imputation":
-                if pd.api.types.is_numeric_dtype(self.cleaned_df[col]):
-                    self.cleaned_df[col] = self.cleaned_df[col].fillna(
-                        self.cleaned_df[col].mean()
-                    )
-                    message = f"Replaced {original_missing} missing values in '{col}' with mean: {self.cleaned_df[col].mean():.2f}"
-                else:
-                    self.show_message("Invalid Operation", 
-                                    "Mean imputation only works for numeric columns", "warning")
-                    return
-            
-            elif method == "Median Imputation":
-                if pd.api.types.is_numeric_dtype(self.cleaned_df[col]):
-                    self.cleaned_df[col] = self.cleaned_df[col].fillna(
-                        self.cleaned_df[col].median()
-                    )
-                    message = f"Replaced {original_missing} missing values in '{col}' with median: {self.cleaned_df[col].median():.2f}"
-                else:
-                    self.show_message("Invalid Operation",
-                                    "Median imputation only works for numeric columns", "warning")
-                    return
-            
-            elif method == "Mode Imputation":
-                mode_val = self.cleaned_df[col].mode()[0] if not self.cleaned_df[col].mode().empty else ""
-                self.cleaned_df[col] = self.cleaned_df[col].fillna(mode_val)
-                message = f"Replaced {original_missing} missing values in '{col}' with mode: '{mode_val}'"
-            
-            elif method == "Drop Rows":
-                self.cleaned_df = self.cleaned_df.dropna(subset=[col])
-                rows_removed = original_rows - len(self.cleaned_df)
-                message = f"Removed {rows_removed} rows with missing values in '{col}'\nNew dataset has {len(self.cleaned_df)} rows"
-            
-            elif method == "Forward Fill":
-                self.cleaned_df[col] = self.cleaned_df[col].ffill()
-                current_missing = self.cleaned_df[col].isnull().sum()
-                message = f"Applied forward fill to '{col}'\nMissing values reduced from {original_missing} to {current_missing}"
-            
-            elif method == "Backward Fill":
-                self.cleaned_df[col] = self.cleaned_df[col].bfill()
-                current_missing = self.cleaned_df[col].isnull().sum()
-                message = f"Applied backward fill to '{col}'\nMissing values reduced from {original_missing} to {current_missing}"
-            
-            # Update status and show message
-            self.update_status(f"Applied {method} to {col}")
-            self.show_message("Cleaning Applied Successfully", message, "success")
-            
-            # Refresh data preview
-            self.refresh_data_preview()
-            
+            result = self.session.clean_column(method, col)
+        except SessionError as e:
+            self.show_message("Invalid Operation", str(e), "warning")
+            return
         except Exception as e:
             self.show_message("Error", f"Failed to apply cleaning method:\n{str(e)}", "error")
+            return
+        
+        missing, value = result["missing_before"], result["value"]
+        rows = len(self.session.cleaned_df)
+        if method in ("Mean Imputation", "Median Imputation"):
+            message = (f"Replaced {missing} missing values in '{col}' with "
+                       f"{method.split()[0].lower()}: {value:.2f}")
+        elif method == "Mode Imputation":
+            message = f"Replaced {missing} missing values in '{col}' with mode: '{value}'"
+        elif method == "Drop Rows":
+            message = (f"Removed {result['rows_removed']} rows with missing values in '{col}'\n"
+                       f"New dataset has {rows} rows")
+        else:
+            message = (f"Applied {method.split()[0].lower()} fill to '{col}'\n"
+                       f"Missing values reduced from {missing} to {result['missing_after']}")
+        
+        self.update_pipeline_view()
+        # Update status and show message
+        self.update_status(f"Applied {method} to {col}")
+        self.show_message("Cleaning Applied Successfully", message, "success")
+        
+        # Refresh data preview
+        self.refresh_data_preview()
     
     def remove_outliers(self):
         col = self.clean_column.get()
         if not col:
             return
         
-        if not pd.api.types.is_numeric_dtype(self.cleaned_df[col]):
-            self.show_message("Invalid Operation",
-                            "Outlier removal only works for numeric columns", "warning")
+        original_count = len(self.session.cleaned_df)
+        try:
+            removed_count, (low, high) = self.session.remove_outliers(col)
+        except SessionError as e:
+            self.show_message("Invalid Operation", str(e), "warning")
             return
-        
-        original_count = len(self.cleaned_df)
-        
-        Q1 = self.cleaned_df[col].quantile(0.25)
-        Q3 = self.cleaned_df[col].quantile(0.75)
-        IQR = Q3 - Q1
-        
-        self.cleaned_df = self.cleaned_df[
-            (self.cleaned_df[col] >= Q1 - 1.5 * IQR) &
-            (self.cleaned_df[col] <= Q3 + 1.5 * IQR)
-        ]
-        
-        removed_count = original_count - len(self.cleaned_df)
+        self.update_pipeline_view()
         
         # Show detailed message
+        rows = len(self.session.cleaned_df)
         message = (
             f"Outlier removal completed for column: '{col}'\n\n"
             f"• Removed {removed_count} outliers\n"
             f"• Original rows: {original_count:,}\n"
-            f"• New row count: {len(self.cleaned_df):,}\n"
-            f"• IQR range: [{Q1 - 1.5*IQR:.2f}, {Q3 + 1.5*IQR:.2f}]\n"
-            f"• Data retained: {(len(self.cleaned_df)/original_count*100):.1f}%"
+            f"• New row count: {rows:,}\n"
+            f"• IQR range: [{low:.2f}, {high:.2f}]\n"
+            f"• Data retained: {(rows/original_count*100):.1f}%"
         )
         
         self.update_status(f"Removed {removed_count} outliers from {col}")
@@ -1078,18 +2054,21 @@ class EnhancedCSVAnalyzerApp:
     
     def refresh_data_preview(self):
         """Refresh the data preview table with cleaned data"""
-        if hasattr(self, 'tree') and self.tree:
-            # Clear existing data
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-            
-            # Add cleaned data
-            preview_df = self.cleaned_df.head(50)
-            for _, row in preview_df.iterrows():
-                self.tree.insert("", "end", values=list(row))
+        self.update_filter_info()
+        if hasattr(self, 'preview_grid') and self.preview_grid.winfo_exists():
+            self.preview_grid.set_data(self.get_view(), keep_position=True)
+    
+    def compute_exact_stats(self):
+        """Replace the sketch-based figures with exact ones for the current data"""
+        self.update_status("Computing exact statistics...")
+        self.root.update_idletasks()
+        self.approximate_stats.set(False)
+        self.get_profile(filtered=True).numeric_summary()
+        self.update_status("Exact statistics ready")
+        self.show_statistics_panel()
     
     def show_visualization_panel(self):
-        if self.df is None:
+        if self.session.df is None:
             self.show_message("No Data", "Please load a CSV file first.", "info")
             return
         
@@ -1219,6 +2198,37 @@ class EnhancedCSVAnalyzerApp:
         self.save_chart_btn.bind("<Enter>", lambda e: self.save_chart_btn.config(bg="#06d6a0"))
         self.save_chart_btn.bind("<Leave>", lambda e: self.save_chart_btn.config(bg="#38b000"))
         
+        # Bin-count slider, shown while a histogram is displayed
+        self.bins_frame = tk.Frame(controls_frame, bg="white")
+        tk.Label(
+            self.bins_frame,
+            text="Bins:",
+            font=("Segoe UI", 10, "bold"),
+            bg="white",
+            fg=self.colors['dark']
+        ).pack(side="left", padx=(0, 5))
+        self.bins_var = tk.IntVar(value=30)
+        tk.Scale(
+            self.bins_frame,
+            from_=1,
+            to=MAX_HISTOGRAM_BINS,
+            orient="horizontal",
+            length=220,
+            showvalue=False,
+            variable=self.bins_var,
+            command=self.rebin_histogram,
+            bg="white",
+            highlightthickness=0
+        ).pack(side="left")
+        tk.Label(
+            self.bins_frame,
+            textvariable=self.bins_var,
+            width=4,
+            font=("Segoe UI", 10),
+            bg="white",
+            fg=self.colors['dark']
+        ).pack(side="left", padx=(5, 0))
+        
         # Chart display area
         self.chart_display = tk.Frame(chart_container, bg="#f8fafc", height=450)
         self.chart_display.pack(fill="both", expand=True)
@@ -1248,13 +2258,13 @@ class EnhancedCSVAnalyzerApp:
             # Single column needed
             if viz_type in ["Bar Chart", "Pie Chart"]:
                 # For bar/pie charts, show categorical first, then numeric
-                categorical_cols = list(self.cleaned_df.select_dtypes(include=['object']).columns)
-                numeric_cols = list(self.cleaned_df.select_dtypes(include=['number']).columns)
+                categorical_cols = list(self.session.cleaned_df.select_dtypes(include=['object', 'category']).columns)
+                numeric_cols = list(self.session.cleaned_df.select_dtypes(include=['number']).columns)
                 available_cols = categorical_cols + numeric_cols
             else:
                 # For histogram/boxplot, show numeric first
-                numeric_cols = list(self.cleaned_df.select_dtypes(include=['number']).columns)
-                categorical_cols = list(self.cleaned_df.select_dtypes(include=['object']).columns)
+                numeric_cols = list(self.session.cleaned_df.select_dtypes(include=['number']).columns)
+                categorical_cols = list(self.session.cleaned_df.select_dtypes(include=['object', 'category']).columns)
                 available_cols = numeric_cols + categorical_cols
             
             self.viz_x['values'] = available_cols
@@ -1266,8 +2276,8 @@ class EnhancedCSVAnalyzerApp:
         
         elif viz_type in ["Scatter Plot", "Line Chart"]:
             # Two columns needed
-            numeric_cols = list(self.cleaned_df.select_dtypes(include=['number']).columns)
-            all_cols = list(self.cleaned_df.columns)
+            numeric_cols = list(self.session.cleaned_df.select_dtypes(include=['number']).columns)
+            all_cols = list(self.session.cleaned_df.columns)
             
             self.viz_x['values'] = all_cols
             self.viz_y['values'] = numeric_cols
@@ -1290,20 +2300,7 @@ class EnhancedCSVAnalyzerApp:
         if not columns:
             return
         
-        formatted_values = []
-        for col in columns:
-            dtype = str(self.cleaned_df[col].dtype)
-            if dtype.startswith('int') or dtype.startswith('float'):
-                type_indicator = " (numeric)"
-            elif dtype == 'object':
-                type_indicator = " (text)"
-            elif dtype == 'datetime64[ns]':
-                type_indicator = " (date)"
-            else:
-                type_indicator = f" ({dtype})"
-            
-            formatted_values.append(f"{col}{type_indicator}")
-        
+        formatted_values = [f"{col}{self.get_column_type_indicator(col)}" for col in columns]
         combobox['values'] = formatted_values
         
         # Store mapping of formatted values to actual column names
@@ -1311,18 +2308,13 @@ class EnhancedCSVAnalyzerApp:
     
     def get_column_type_indicator(self, column):
         """Get type indicator for a column"""
-        if column not in self.cleaned_df.columns:
+        if column not in self.session.cleaned_df.columns:
             return ""
         
-        dtype = str(self.cleaned_df[column].dtype)
-        if dtype.startswith('int') or dtype.startswith('float'):
+        label = dtype_label(self.session.cleaned_df[column].dtype)
+        if label in ("Integer", "Float"):
             return " (numeric)"
-        elif dtype == 'object':
-            return " (text)"
-        elif dtype == 'datetime64[ns]':
-            return " (date)"
-        else:
-            return f" ({dtype})"
+        return f" ({label.lower()})"
     
     def get_actual_column_name(self, combobox, formatted_value):
         """Extract actual column name from formatted combobox value"""
@@ -1351,37 +2343,49 @@ class EnhancedCSVAnalyzerApp:
             if y_col_formatted:
                 y_col = self.get_actual_column_name(self.viz_y, y_col_formatted)
         
-        # Clear previous chart
-        for widget in self.chart_display.winfo_children():
-            widget.destroy()
+        if viz_type == "Scatter Plot" and not y_col:
+            self.show_message("Y-Axis Needed", 
+                            "Please select Y-axis column for scatter plot.", "warning")
+            return
         
-        # Generate the selected visualization
-        try:
-            if viz_type == "Histogram":
-                self.create_histogram(x_col)
-            elif viz_type == "Box Plot":
-                self.create_boxplot(x_col)
-            elif viz_type == "Scatter Plot":
-                if y_col:
-                    self.create_scatter_plot(x_col, y_col)
-                else:
-                    self.show_message("Y-Axis Needed", 
-                                    "Please select Y-axis column for scatter plot.", "warning")
-                    return
-            elif viz_type == "Line Chart":
-                self.create_line_chart(x_col, y_col)
-            elif viz_type == "Bar Chart":
-                self.create_bar_chart(x_col)
-            elif viz_type == "Pie Chart":
-                self.create_pie_chart(x_col)
-            
-            # Enable save button
-            self.save_chart_btn.config(state="normal")
-            
-        except Exception as e:
-            self.show_message("Chart Error", f"Failed to create chart:\n{str(e)}", "error")
-            # Disable save button on error
-            self.save_chart_btn.config(state="disabled")
+        # The line chart is downsampled for the canvas width, so that is part of the key
+        target_points = 0
+        if viz_type == "Line Chart":
+            target_points = max(500, self.chart_display.winfo_width() * LINE_POINTS_PER_PIXEL)
+        key = (viz_type, x_col, y_col, target_points, self.session.filter_text, self.session.data_version)
+        
+        self.chart_request += 1
+        self.chart_started = time.perf_counter()
+        chart = self.chart_cache.get(key)
+        if chart is not None:
+            self.show_chart(chart)
+            self.update_status("Chart shown from cache")
+            return
+        
+        self.clear_chart()
+        tk.Label(self.chart_display, text="⏳ Rendering chart...", font=("Segoe UI", 12),
+                 bg="#f8fafc", fg="#718096").pack(expand=True)
+        self.save_chart_btn.config(state="disabled")
+        self.update_status(f"Rendering {viz_type.lower()}...")
+        
+        # Data prep and Agg rendering run as a job against this data version;
+        # a chart still waiting for an older request is no longer wanted
+        request = self.chart_request
+        snapshot = self.snapshot()
+        self.jobs.cancel_kind("chart")
+        
+        def render(job):
+            return self.session.build_chart(snapshot.view, viz_type, x_col, y_col, target_points,
+                                            snapshot.version, snapshot.filter_text, self.colors,
+                                            schedule=self.root.after_idle).render()
+        
+        job = self.jobs.submit(
+            f"{viz_type}: {x_col}" + (f" / {y_col}" if y_col else ""), render,
+            kind="chart", version=snapshot.version,
+            on_done=lambda chart: self.on_chart_ready(request, key, chart),
+            on_error=lambda error: self.on_chart_failed(request, error),
+            on_cancel=lambda: self.on_chart_dropped(request, job)
+        )
     
     def save_chart(self):
         if self.current_figure is None:
@@ -1418,163 +2422,71 @@ class EnhancedCSVAnalyzerApp:
             except Exception as e:
                 self.show_message("Save Failed", f"Error saving chart:\n{str(e)}", "error")
     
-    def create_histogram(self, col):
-        if not pd.api.types.is_numeric_dtype(self.cleaned_df[col]):
-            self.show_message("Invalid Column", 
-                            "Histogram requires numeric columns.", "warning")
+    def on_chart_ready(self, request, key, chart):
+        viz_type, x_col, y_col, target_points, filter_text, version = key
+        self.chart_cache.put(key, chart)
+        self.session.keep_histogram_bins(chart, x_col, filter_text, version)
+        if request != self.chart_request or not self.chart_display.winfo_exists():
+            # A newer chart was requested meanwhile (or the panel closed); this one only went to the cache
             return
-        
-        self.current_figure = plt.Figure(figsize=(10, 6), dpi=100)
-        ax = self.current_figure.add_subplot(111)
-        
-        data = self.cleaned_df[col].dropna()
-        ax.hist(data, bins=min(30, len(data)//10), edgecolor='white', alpha=0.7, 
-                color=self.colors['primary'])
-        
-        ax.set_xlabel(col, fontsize=11)
-        ax.set_ylabel('Frequency', fontsize=11)
-        ax.set_title(f'Histogram of {col}', fontsize=13, fontweight='bold')
-        ax.grid(True, alpha=0.3)
-        
-        # Add statistics
-        stats_text = f"Mean: {data.mean():.2f}\nStd: {data.std():.2f}\nN: {len(data):,}"
-        ax.text(0.02, 0.98, stats_text, transform=ax.transAxes, fontsize=10,
-                verticalalignment='top', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
-        
-        canvas = FigureCanvasTkAgg(self.current_figure, self.chart_display)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=10)
+        self.show_chart(chart)
+        self.update_status(f"Chart ready in {time.perf_counter() - self.chart_started:.2f}s")
     
-    def create_boxplot(self, col):
-        if not pd.api.types.is_numeric_dtype(self.cleaned_df[col]):
-            self.show_message("Invalid Column", 
-                            "Box plot requires numeric columns.", "warning")
+    def on_chart_dropped(self, request, job):
+        if (job.status == OUTDATED and request == self.chart_request
+                and self.chart_display.winfo_exists()):
+            # The data changed while drawing; start over on the current data
+            self.generate_visualization()
+    
+    def on_chart_failed(self, request, error):
+        if request != self.chart_request or not self.chart_display.winfo_exists():
             return
-        
-        self.current_figure = plt.Figure(figsize=(10, 6), dpi=100)
-        ax = self.current_figure.add_subplot(111)
-        
-        data = self.cleaned_df[col].dropna()
-        bp = ax.boxplot(data, patch_artist=True, vert=False)
-        
-        # Customize boxplot colors
-        bp['boxes'][0].set_facecolor(self.colors['primary'])
-        bp['boxes'][0].set_alpha(0.7)
-        bp['medians'][0].set_color('red')
-        bp['medians'][0].set_linewidth(2)
-        
-        ax.set_xlabel(col, fontsize=11)
-        ax.set_title(f'Box Plot of {col}', fontsize=13, fontweight='bold')
-        ax.grid(True, alpha=0.3)
-        
-        # Add statistics
-        Q1 = data.quantile(0.25)
-        Q3 = data.quantile(0.75)
-        IQR = Q3 - Q1
-        
-        stats_text = (f"Q1: {Q1:.2f}\n"
-                     f"Median: {data.median():.2f}\n"
-                     f"Q3: {Q3:.2f}\n"
-                     f"IQR: {IQR:.2f}\n"
-                     f"N: {len(data):,}")
-        ax.text(0.02, 0.98, stats_text, transform=ax.transAxes, fontsize=10,
-                verticalalignment='top', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
-        
-        canvas = FigureCanvasTkAgg(self.current_figure, self.chart_display)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=10)
+        self.clear_chart()
+        self.save_chart_btn.config(state="disabled")
+        if isinstance(error, ChartError):
+            self.show_message(error.title, str(error), "warning")
+        else:
+            self.show_message("Chart Error", f"Failed to create chart:\n{str(error)}", "error")
+        self.update_status("Ready")
     
-    def create_scatter_plot(self, x_col, y_col):
-        self.current_figure = plt.Figure(figsize=(10, 6), dpi=100)
-        ax = self.current_figure.add_subplot(111)
-        
-        ax.scatter(self.cleaned_df[x_col], self.cleaned_df[y_col], 
-                  alpha=0.6, color=self.colors['primary'], edgecolors='white')
-        
-        ax.set_xlabel(f"{x_col} (X-Axis)", fontsize=11)
-        ax.set_ylabel(f"{y_col} (Y-Axis)", fontsize=11)
-        ax.set_title(f'Scatter Plot: {x_col} vs {y_col}', fontsize=13, fontweight='bold')
-        ax.grid(True, alpha=0.3)
-        
-        canvas = FigureCanvasTkAgg(self.current_figure, self.chart_display)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=10)
+    def clear_chart(self):
+        for widget in self.chart_display.winfo_children():
+            widget.destroy()
+        self.chart_canvas = None
+        self.current_histogram = None
+        self.bins_frame.pack_forget()
     
-    def create_line_chart(self, x_col, y_col=None):
-        self.current_figure = plt.Figure(figsize=(10, 6), dpi=100)
-        ax = self.current_figure.add_subplot(111)
-        
-        if y_col:
-            data = self.cleaned_df[[x_col, y_col]].head(100)
-            ax.plot(data.index, data[x_col], marker='o', linewidth=2, label=f"{x_col} (X)",
-                   color=self.colors['primary'])
-            ax.plot(data.index, data[y_col], marker='s', linewidth=2, label=f"{y_col} (Y)",
-                   color=self.colors['accent'])
-            ax.legend()
-            title = f'Line Chart: {x_col} vs {y_col}'
+    def show_chart(self, chart):
+        self.clear_chart()
+        
+        self.current_figure = chart.figure
+        self.density_scatter = chart.density
+        self.current_histogram = chart.histogram
+        if chart.histogram is not None:
+            self.bins_var.set(chart.histogram.n_bins)
+            self.bins_frame.pack(side="left", padx=10)
         else:
-            data = self.cleaned_df[x_col].head(100)
-            ax.plot(data.index, data, marker='o', linewidth=2, color=self.colors['primary'])
-            title = f'Line Chart: {x_col}'
-        
-        ax.set_xlabel('Index (X-Axis)', fontsize=11)
-        ax.set_ylabel('Value (Y-Axis)', fontsize=11)
-        ax.set_title(title, fontsize=13, fontweight='bold')
-        ax.grid(True, alpha=0.3)
-        
-        canvas = FigureCanvasTkAgg(self.current_figure, self.chart_display)
+            self.bins_frame.pack_forget()
+        canvas = FigureCanvasTkAgg(chart.figure, self.chart_display)
+        self.chart_canvas = canvas
         canvas.draw()
+        if chart.density is not None:
+            # Zoom / pan tools; the density grid is rebinned for the visible range
+            toolbar = NavigationToolbar2Tk(canvas, self.chart_display, pack_toolbar=False)
+            toolbar.update()
+            toolbar.pack(side="bottom", fill="x")
         canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=10)
+        self.save_chart_btn.config(state="normal")
     
-    def create_bar_chart(self, col):
-        top_values = self.cleaned_df[col].value_counts().head(10)
-        
-        self.current_figure = plt.Figure(figsize=(10, 6), dpi=100)
-        ax = self.current_figure.add_subplot(111)
-        
-        colors = plt.cm.Set3(np.linspace(0, 1, len(top_values)))
-        bars = ax.bar(range(len(top_values)), top_values.values, color=colors, edgecolor='white')
-        
-        ax.set_xlabel(col, fontsize=11)
-        ax.set_ylabel('Count', fontsize=11)
-        ax.set_title(f'Bar Chart: Top 10 Values in {col}', fontsize=13, fontweight='bold')
-        ax.set_xticks(range(len(top_values)))
-        ax.set_xticklabels(top_values.index, rotation=45, ha='right')
-        ax.grid(True, alpha=0.3, axis='y')
-        
-        # Add value labels on bars
-        for bar in bars:
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                   f'{int(height)}', ha='center', va='bottom', fontsize=9)
-        
-        canvas = FigureCanvasTkAgg(self.current_figure, self.chart_display)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=10)
-    
-    def create_pie_chart(self, col):
-        value_counts = self.cleaned_df[col].value_counts().head(6)  # Top 6 categories
-        
-        self.current_figure = plt.Figure(figsize=(8, 8), dpi=100)
-        ax = self.current_figure.add_subplot(111)
-        
-        colors = plt.cm.Pastel1(np.linspace(0, 1, len(value_counts)))
-        wedges, texts, autotexts = ax.pie(value_counts.values, 
-                                         labels=value_counts.index,
-                                         autopct='%1.1f%%',
-                                         colors=colors,
-                                         startangle=90,
-                                         textprops={'fontsize': 10})
-        
-        ax.set_title(f'Pie Chart: Distribution of {col}', fontsize=13, fontweight='bold')
-        ax.axis('equal')  # Make the pie chart circular
-        
-        canvas = FigureCanvasTkAgg(self.current_figure, self.chart_display)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=10)
+    def rebin_histogram(self, value=None):
+        """Bin-count slider: regroup the precomputed fine bins and redraw in place"""
+        if self.current_histogram is None or self.chart_canvas is None:
+            return
+        self.current_histogram.set_bins(self.bins_var.get())
+        self.chart_canvas.draw_idle()
     
     def show_statistics_panel(self):
-        if self.df is None:
+        if self.session.df is None:
             self.show_message("No Data", "Please load a CSV file first.", "info")
             return
         
@@ -1583,13 +2495,69 @@ class EnhancedCSVAnalyzerApp:
         stats_card = tk.Frame(self.card_container, bg="white", padx=20, pady=20)
         stats_card.pack(fill="both", expand=True)
         
+        header_frame = tk.Frame(stats_card, bg="white")
+        header_frame.pack(fill="x", pady=(0, 20))
+        
         tk.Label(
-            stats_card,
+            header_frame,
             text="📊 Statistical Analysis",
             font=("Segoe UI", 16, "bold"),
             bg="white",
             fg=self.colors['dark']
-        ).pack(anchor="w", pady=(0, 20))
+        ).pack(side="left")
+        
+        # Statistics describe the rows matching the filter bar, if any
+        view = self.get_view()
+        profile = self.get_profile(filtered=True)
+        
+        # Approximate (sketch) statistics with an on-demand upgrade to exact values
+        if profile.approximate:
+            tk.Button(
+                header_frame,
+                text="🎯 Compute Exact Values",
+                font=("Segoe UI", 10),
+                bg=self.colors['primary'],
+                fg="white",
+                padx=15,
+                pady=5,
+                cursor="hand2",
+                relief="flat",
+                command=self.compute_exact_stats
+            ).pack(side="right", padx=(10, 0))
+        
+        tk.Checkbutton(
+            header_frame,
+            text="≈ Approximate statistics (single pass)",
+            variable=self.approximate_stats,
+            font=("Segoe UI", 10),
+            bg="white",
+            activebackground="white",
+            command=self.show_statistics_panel
+        ).pack(side="right")
+        
+        if profile.approximate:
+            sketch = profile.sketch
+            tk.Label(
+                stats_card,
+                text=(f"Unique counts are HyperLogLog estimates (±{sketch.distinct_error:.1%}, ~95% confidence). "
+                      f"Quartiles come from KLL sketches; the bracketed range holds the true value "
+                      f"(±{sketch.rank_error:.1%} in rank, ~99% confidence). "
+                      f"Counts, means, std, min and max are exact."),
+                font=("Segoe UI", 9),
+                bg="white",
+                fg="#64748b",
+                wraplength=900,
+                justify="left"
+            ).pack(anchor="w", pady=(0, 10))
+        
+        if self.session.filter_text:
+            tk.Label(
+                stats_card,
+                text=f"🔎 Filtered: {self.session.filter_text} ({len(view):,} of {len(self.session.cleaned_df):,} rows)",
+                font=("Segoe UI", 10, "bold"),
+                bg="white",
+                fg=self.colors['primary']
+            ).pack(anchor="w", pady=(0, 10))
         
         # Create notebook for multiple tabs
         notebook = ttk.Notebook(stats_card)
@@ -1640,41 +2608,17 @@ class EnhancedCSVAnalyzerApp:
         col_tree.column("Unique", width=80)
         col_tree.column("Sample Values", width=200)
         
-        # Populate column details
-        for col in self.cleaned_df.columns:
-            non_null = self.cleaned_df[col].count()
-            null_count = self.cleaned_df[col].isnull().sum()
-            null_percent = (null_count / len(self.cleaned_df)) * 100 if len(self.cleaned_df) > 0 else 0
-            unique_count = self.cleaned_df[col].nunique()
-            
-            # Get sample values
-            sample_values = []
-            for val in self.cleaned_df[col].dropna().head(3):
-                sample_values.append(str(val))
-            sample_str = ", ".join(sample_values) if sample_values else "N/A"
-            
-            # Get data type with better formatting
-            dtype = str(self.cleaned_df[col].dtype)
-            if dtype.startswith('int'):
-                dtype_fmt = "Integer"
-            elif dtype.startswith('float'):
-                dtype_fmt = "Float"
-            elif dtype == 'object':
-                dtype_fmt = "Text"
-            elif dtype == 'datetime64[ns]':
-                dtype_fmt = "Date"
-            elif dtype == 'bool':
-                dtype_fmt = "Boolean"
-            else:
-                dtype_fmt = dtype
-            
+        # Populate column details from the cached profile
+        for details in self.session.column_details(profile):
+            sample_str = ", ".join(details["samples"]) if details["samples"] else "N/A"
+            unique_count = details["unique"]
             col_tree.insert("", "end", values=(
-                col,
-                dtype_fmt,
-                f"{non_null:,}",
-                f"{null_count:,}",
-                f"{null_percent:.1f}%",
-                f"{unique_count:,}",
+                details["column"],
+                details["dtype"],
+                f"{details['non_null']:,}",
+                f"{details['nulls']:,}",
+                f"{details['null_percent']:.1f}%",
+                f"≈{unique_count:,}" if profile.approximate else f"{unique_count:,}",
                 sample_str[:50] + "..." if len(sample_str) > 50 else sample_str
             ))
         
@@ -1702,22 +2646,26 @@ class EnhancedCSVAnalyzerApp:
         num_scrollbar.config(command=num_text.yview)
         
         # Display numerical statistics
-        numeric_cols = self.cleaned_df.select_dtypes(include=['number'])
-        if len(numeric_cols.columns) > 0:
+        numeric_names = profile.numeric_columns()
+        if len(numeric_names) > 0:
             num_text.insert("end", "NUMERICAL COLUMNS STATISTICS\n")
             num_text.insert("end", "=" * 50 + "\n\n")
             
-            desc = numeric_cols.describe().T
-            for col in numeric_cols.columns:
+            desc = profile.numeric_summary()
+            for col in numeric_names:
                 num_text.insert("end", f"{col}:\n")
                 num_text.insert("end", "-" * 40 + "\n")
                 num_text.insert("end", f"  Count:    {desc.loc[col, 'count']:,.0f}\n")
                 num_text.insert("end", f"  Mean:     {desc.loc[col, 'mean']:,.2f}\n")
                 num_text.insert("end", f"  Std:      {desc.loc[col, 'std']:,.2f}\n")
                 num_text.insert("end", f"  Min:      {desc.loc[col, 'min']:,.2f}\n")
-                num_text.insert("end", f"  25%:      {desc.loc[col, '25%']:,.2f}\n")
-                num_text.insert("end", f"  50%:      {desc.loc[col, '50%']:,.2f}\n")
-                num_text.insert("end", f"  75%:      {desc.loc[col, '75%']:,.2f}\n")
+                for label in ("25%", "50%", "75%"):
+                    line = f"  {label}:      {desc.loc[col, label]:,.2f}"
+                    if profile.approximate:
+                        line = (f"  {label}:     ≈{desc.loc[col, label]:,.2f}   "
+                                f"[{desc.loc[col, label + '_low']:,.2f} – "
+                                f"{desc.loc[col, label + '_high']:,.2f}]")
+                    num_text.insert("end", line + "\n")
                 num_text.insert("end", f"  Max:      {desc.loc[col, 'max']:,.2f}\n\n")
         else:
             num_text.insert("end", "No numerical columns found in the dataset.\n")
@@ -1748,88 +2696,442 @@ class EnhancedCSVAnalyzerApp:
         overall_scrollbar.config(command=overall_text.yview)
         
         # Display overall statistics
+        overall = self.session.overall_statistics(profile)
         overall_text.insert("end", "DATASET OVERALL STATISTICS\n")
         overall_text.insert("end", "=" * 50 + "\n\n")
         
         overall_text.insert("end", "BASIC INFORMATION:\n")
         overall_text.insert("end", "-" * 40 + "\n")
-        overall_text.insert("end", f"Rows: {self.cleaned_df.shape[0]:,}\n")
-        overall_text.insert("end", f"Columns: {self.cleaned_df.shape[1]}\n")
-        overall_text.insert("end", f"Total cells: {self.cleaned_df.size:,}\n")
-        overall_text.insert("end", f"Memory usage: {self.cleaned_df.memory_usage(deep=True).sum() / 1024 / 1024:.2f} MB\n\n")
+        overall_text.insert("end", f"Rows: {overall['rows']:,}\n")
+        overall_text.insert("end", f"Columns: {overall['columns']}\n")
+        overall_text.insert("end", f"Total cells: {overall['cells']:,}\n")
+        overall_text.insert("end", f"Memory usage: {overall['memory_mb']:.2f} MB\n\n")
         
         overall_text.insert("end", "DATA TYPE DISTRIBUTION:\n")
         overall_text.insert("end", "-" * 40 + "\n")
-        for dtype, count in self.cleaned_df.dtypes.value_counts().items():
-            dtype_str = str(dtype)
-            if dtype_str.startswith('int'):
-                dtype_name = "Integer"
-            elif dtype_str.startswith('float'):
-                dtype_name = "Float"
-            elif dtype_str == 'object':
-                dtype_name = "Text"
-            elif dtype_str == 'datetime64[ns]':
-                dtype_name = "Date"
-            else:
-                dtype_name = dtype_str
+        for dtype_name, count in overall["dtypes"]:
             overall_text.insert("end", f"{dtype_name}: {count}\n")
         overall_text.insert("end", "\n")
         
         overall_text.insert("end", "MISSING VALUES SUMMARY:\n")
         overall_text.insert("end", "-" * 40 + "\n")
-        missing_total = self.cleaned_df.isnull().sum().sum()
-        overall_text.insert("end", f"Total missing values: {missing_total:,}\n")
-        overall_text.insert("end", f"Percentage of missing data: {(missing_total/self.cleaned_df.size*100):.2f}%\n\n")
+        overall_text.insert("end", f"Total missing values: {overall['missing']:,}\n")
+        overall_text.insert("end", f"Percentage of missing data: {overall['missing_percent']:.2f}%\n\n")
         
         overall_text.insert("end", "DUPLICATE ROWS:\n")
         overall_text.insert("end", "-" * 40 + "\n")
-        duplicate_count = self.cleaned_df.duplicated().sum()
-        overall_text.insert("end", f"Duplicate rows: {duplicate_count:,}\n")
-        overall_text.insert("end", f"Percentage duplicates: {(duplicate_count/len(self.cleaned_df)*100):.2f}%\n")
+        overall_text.insert("end", f"Duplicate rows: {overall['duplicates']:,}\n")
+        overall_text.insert("end", f"Percentage duplicates: {overall['duplicate_percent']:.2f}%\n")
         
         overall_text.config(state="disabled")
     
+    def show_correlation_panel(self):
+        if self.session.df is None:
+            self.show_message("No Data", "Please load a CSV file first.", "info")
+            return
+        
+        self.clear_content()
+        
+        corr_card = tk.Frame(self.card_container, bg="white", padx=20, pady=20)
+        corr_card.pack(fill="both", expand=True)
+        
+        header_frame = tk.Frame(corr_card, bg="white")
+        header_frame.pack(fill="x", pady=(0, 20))
+        
+        tk.Label(
+            header_frame,
+            text="🔗 Correlations",
+            font=("Segoe UI", 16, "bold"),
+            bg="white",
+            fg=self.colors['dark']
+        ).pack(side="left")
+        
+        tk.Button(
+            header_frame,
+            text="▶ Compute",
+            font=("Segoe UI", 10, "bold"),
+            bg=self.colors['primary'],
+            fg="white",
+            padx=15,
+            pady=5,
+            cursor="hand2",
+            relief="flat",
+            command=self.compute_correlations
+        ).pack(side="right", padx=(10, 0))
+        
+        # ===== Options =====
+        options_frame = tk.Frame(corr_card, bg="white")
+        options_frame.pack(fill="x", pady=(0, 15))
+        
+        tk.Label(options_frame, text="Method:", font=("Segoe UI", 11, "bold"), bg="white",
+                 fg=self.colors['dark']).pack(side="left", padx=(0, 10))
+        self.corr_method = ttk.Combobox(options_frame, values=["Pearson", "Spearman"],
+                                        state="readonly", width=12, font=("Segoe UI", 10))
+        self.corr_method.current(0)
+        self.corr_method.pack(side="left", padx=(0, 20))
+        
+        self.corr_cluster = tk.BooleanVar(value=True)
+        tk.Checkbutton(options_frame, text="Cluster correlated columns", variable=self.corr_cluster,
+                       font=("Segoe UI", 10), bg="white",
+                       activebackground="white").pack(side="left", padx=(0, 20))
+        
+        tk.Label(options_frame, text="Top pairs:", font=("Segoe UI", 11, "bold"), bg="white",
+                 fg=self.colors['dark']).pack(side="left", padx=(0, 10))
+        self.corr_top_n = tk.Spinbox(options_frame, from_=5, to=200, increment=5, width=5,
+                                     font=("Segoe UI", 10))
+        self.corr_top_n.delete(0, tk.END)
+        self.corr_top_n.insert(0, "20")
+        self.corr_top_n.pack(side="left")
+        
+        self.corr_info = tk.Label(
+            corr_card,
+            text=(f"{len(correlation_positions(self.session.cleaned_df))} numeric columns"
+                  + (f" · 🔎 Filtered: {self.session.filter_text}" if self.session.filter_text else "")),
+            font=("Segoe UI", 9),
+            bg="white",
+            fg="#64748b"
+        )
+        self.corr_info.pack(anchor="w", pady=(0, 10))
+        
+        body = tk.Frame(corr_card, bg="white")
+        body.pack(fill="both", expand=True)
+        
+        self.correlation_display = tk.Frame(body, bg="#f8fafc")
+        self.correlation_display.pack(side="left", fill="both", expand=True, padx=(0, 15))
+        tk.Label(self.correlation_display, text="👆 Pick a method and click 'Compute'",
+                 font=("Segoe UI", 12), bg="#f8fafc", fg="#718096").pack(expand=True)
+        
+        pairs_frame = tk.Frame(body, bg="white")
+        pairs_frame.pack(side="right", fill="y")
+        tk.Label(pairs_frame, text="Strongest pairs", font=("Segoe UI", 11, "bold"), bg="white",
+                 fg=self.colors['dark']).pack(anchor="w", pady=(0, 5))
+        v_scroll = ttk.Scrollbar(pairs_frame, orient="vertical")
+        self.corr_pairs_tree = ttk.Treeview(pairs_frame, columns=("Column A", "Column B", "r"),
+                                            show="headings", yscrollcommand=v_scroll.set, height=20)
+        v_scroll.config(command=self.corr_pairs_tree.yview)
+        v_scroll.pack(side="right", fill="y")
+        self.corr_pairs_tree.pack(side="left", fill="y")
+        for name, width in (("Column A", 130), ("Column B", 130), ("r", 70)):
+            self.corr_pairs_tree.heading(name, text=name)
+            self.corr_pairs_tree.column(name, width=width)
+    
+    def compute_correlations(self):
+        method = self.corr_method.get().lower()
+        cluster = self.corr_cluster.get()
+        try:
+            n_pairs = max(1, int(self.corr_top_n.get()))
+        except ValueError:
+            n_pairs = 20
+        
+        snapshot = self.snapshot()
+        if len(correlation_positions(snapshot.view)) < 2:
+            self.show_message("Not Enough Columns", "Correlations need at least two numeric columns.",
+                              "warning")
+            return
+        
+        # The matrix is cached per data version; clustering and drawing are cheap in comparison
+        key = (method, snapshot.filter_text, snapshot.version)
+        cached = self.session.correlations.get(key)
+        started = time.perf_counter()
+        
+        def compute(job):
+            matrix = cached if cached is not None else correlation_matrix(snapshot.view, method, job)
+            order = cluster_order(matrix) if cluster else np.arange(len(matrix))
+            title = f"{method.title()} correlation" + (" (clustered)" if cluster else "")
+            chart = build_correlation_heatmap(matrix.iloc[order, order], title).render()
+            return matrix, chart, top_pairs(matrix, n_pairs)
+        
+        for widget in self.correlation_display.winfo_children():
+            widget.destroy()
+        tk.Label(self.correlation_display, text="⏳ Computing correlations...", font=("Segoe UI", 12),
+                 bg="#f8fafc", fg="#718096").pack(expand=True)
+        self.update_status(f"Computing {method} correlations...")
+        self.jobs.cancel_kind("correlation")
+        job = self.jobs.submit(
+            f"{method.title()} correlation", compute, kind="correlation", version=snapshot.version,
+            on_done=lambda result: self.on_correlations_ready(key, *result,
+                                                              time.perf_counter() - started),
+            on_error=self.on_correlations_failed,
+            on_cancel=lambda: self.on_correlations_dropped(job)
+        )
+    
+    def on_correlations_ready(self, key, matrix, chart, pairs, seconds):
+        self.session.correlations[key] = matrix
+        if self.correlation_display is None or not self.correlation_display.winfo_exists():
+            return
+        for widget in self.correlation_display.winfo_children():
+            widget.destroy()
+        canvas = FigureCanvasTkAgg(chart.figure, self.correlation_display)
+        canvas.draw()
+        canvas.get_tk_widget().pack(fill="both", expand=True)
+        
+        self.corr_pairs_tree.delete(*self.corr_pairs_tree.get_children())
+        for row in pairs.itertuples(index=False):
+            self.corr_pairs_tree.insert("", "end", values=(row.column_a, row.column_b,
+                                                           f"{row.correlation:+.3f}"))
+        self.update_status(f"{len(matrix)} × {len(matrix)} correlation matrix ready in {seconds:.2f}s")
+    
+    def on_correlations_dropped(self, job):
+        if (job.status == OUTDATED and self.correlation_display is not None
+                and self.correlation_display.winfo_exists()):
+            # The data changed while computing; start over on the current data
+            self.compute_correlations()
+    
+    def on_correlations_failed(self, error):
+        if self.correlation_display is None or not self.correlation_display.winfo_exists():
+            return
+        for widget in self.correlation_display.winfo_children():
+            widget.destroy()
+        self.update_status("Ready")
+        self.show_message("Correlation Error", f"Failed to compute correlations:\n{str(error)}", "error")
+    
+    def show_groupby_panel(self):
+        if self.session.df is None:
+            self.show_message("No Data", "Please load a CSV file first.", "info")
+            return
+        
+        self.clear_content()
+        
+        groupby_card = tk.Frame(self.card_container, bg="white", padx=20, pady=20)
+        groupby_card.pack(fill="both", expand=True)
+        
+        header_frame = tk.Frame(groupby_card, bg="white")
+        header_frame.pack(fill="x", pady=(0, 20))
+        
+        tk.Label(
+            header_frame,
+            text="🧮 Group By & Pivot",
+            font=("Segoe UI", 16, "bold"),
+            bg="white",
+            fg=self.colors['dark']
+        ).pack(side="left")
+        
+        for text, command in (("💾 Export Result", self.export_groupby_result),
+                              ("▶ Compute", self.compute_groupby)):
+            tk.Button(
+                header_frame,
+                text=text,
+                font=("Segoe UI", 10, "bold"),
+                bg=self.colors['primary'],
+                fg="white",
+                padx=15,
+                pady=5,
+                cursor="hand2",
+                relief="flat",
+                command=command
+            ).pack(side="right", padx=(10, 0))
+        
+        if self.session.filter_text:
+            tk.Label(
+                groupby_card,
+                text=f"🔎 Filtered: {self.session.filter_text}",
+                font=("Segoe UI", 9),
+                bg="white",
+                fg="#64748b"
+            ).pack(anchor="w", pady=(0, 10))
+        
+        # ===== Selectors =====
+        selector_frame = tk.Frame(groupby_card, bg="white")
+        selector_frame.pack(fill="x", pady=(0, 15))
+        
+        columns = list(self.session.cleaned_df.columns)
+        numeric_cols = self.session.cleaned_df.select_dtypes(include=['number']).columns.tolist()
+        
+        def column_list(title, names, column):
+            frame = tk.Frame(selector_frame, bg="white")
+            frame.grid(row=0, column=column, sticky="nsew", padx=(0, 20))
+            tk.Label(frame, text=title, font=("Segoe UI", 10, "bold"), bg="white",
+                     fg=self.colors['dark']).pack(anchor="w")
+            listbox = tk.Listbox(frame, selectmode="extended", exportselection=False,
+                                 height=8, width=28, font=("Segoe UI", 10))
+            scroll = ttk.Scrollbar(frame, orient="vertical", command=listbox.yview)
+            listbox.config(yscrollcommand=scroll.set)
+            listbox.pack(side="left", fill="both", expand=True)
+            scroll.pack(side="left", fill="y")
+            for name in names:
+                listbox.insert("end", name)
+            return listbox
+        
+        self.groupby_keys = column_list("Group by:", columns, 0)
+        # Numeric columns first since most aggregations need them
+        value_cols = numeric_cols + [col for col in columns if col not in numeric_cols]
+        self.groupby_values = column_list("Values:", value_cols, 1)
+        
+        options_frame = tk.Frame(selector_frame, bg="white")
+        options_frame.grid(row=0, column=2, sticky="nsew")
+        
+        tk.Label(options_frame, text="Aggregations:", font=("Segoe UI", 10, "bold"), bg="white",
+                 fg=self.colors['dark']).grid(row=0, column=0, columnspan=4, sticky="w")
+        self.groupby_aggregations = {}
+        for i, aggregation in enumerate(AGGREGATIONS):
+            var = tk.BooleanVar(value=aggregation in ("count", "sum", "mean"))
+            self.groupby_aggregations[aggregation] = var
+            tk.Checkbutton(options_frame, text=aggregation, variable=var, bg="white",
+                           font=("Segoe UI", 10)).grid(row=1 + i // 4, column=i % 4, sticky="w")
+        
+        tk.Label(options_frame, text="Pivot column:", font=("Segoe UI", 10, "bold"), bg="white",
+                 fg=self.colors['dark']).grid(row=5, column=0, columnspan=4, sticky="w", pady=(10, 0))
+        self.groupby_pivot = ttk.Combobox(options_frame, values=["(none)"] + columns,
+                                          state="readonly", width=25, font=("Segoe UI", 10))
+        self.groupby_pivot.current(0)
+        self.groupby_pivot.grid(row=6, column=0, columnspan=4, sticky="w")
+        
+        self.groupby_info = tk.Label(groupby_card, text="Pick key columns and press Compute.",
+                                     font=("Segoe UI", 9), bg="white", fg="#64748b")
+        self.groupby_info.pack(anchor="w", pady=(0, 10))
+        
+        self.groupby_grid = VirtualGrid(groupby_card, height=12, column_width=120, bg="white")
+        self.groupby_grid.pack(fill="both", expand=True)
+        self.groupby_result = None
+    
+    def compute_groupby(self):
+        keys = [self.groupby_keys.get(i) for i in self.groupby_keys.curselection()]
+        values = [self.groupby_values.get(i) for i in self.groupby_values.curselection()]
+        aggregations = [name for name, var in self.groupby_aggregations.items() if var.get()]
+        pivot = self.groupby_pivot.get()
+        pivot = None if pivot == "(none)" else pivot
+        
+        # Key codes are shared by every request against the same data version and filter
+        snapshot = self.snapshot()
+        engine = self.session.get_groupby_engine()
+        
+        self.groupby_info.config(text="⏳ Computing...")
+        self.update_status("Computing group-by...")
+        self.jobs.cancel_kind("aggregate")
+        started = time.perf_counter()
+        
+        def aggregate(job):
+            return engine.aggregate(keys, values, aggregations, pivot)
+        
+        self.jobs.submit(
+            "Group by " + ", ".join(keys) + (f" / pivot {pivot}" if pivot else ""), aggregate,
+            kind="aggregate", version=snapshot.version,
+            on_done=lambda result: self.on_groupby_done(result, len(snapshot.view),
+                                                        time.perf_counter() - started),
+            on_error=self.on_groupby_failed,
+            on_cancel=lambda: self.on_groupby_failed(None)
+        )
+    
+    def on_groupby_done(self, result, n_rows, seconds):
+        if self.groupby_grid is None or not self.groupby_grid.winfo_exists():
+            return
+        self.groupby_result = result
+        self.groupby_grid.set_data(result)
+        self.groupby_info.config(text=f"{len(result):,} groups × {result.shape[1]} columns "
+                                      f"from {n_rows:,} rows in {seconds:.2f}s")
+        self.update_status(f"Group-by ready in {seconds:.2f}s")
+    
+    def on_groupby_failed(self, error):
+        if self.groupby_grid is None or not self.groupby_grid.winfo_exists():
+            return
+        self.groupby_info.config(text="Pick key columns and press Compute.")
+        self.update_status("Ready")
+        if isinstance(error, AggregateError):
+            self.show_message("Cannot Group", str(error), "warning")
+        elif error is not None:
+            self.show_message("Group-By Error", f"Failed to aggregate:\n{str(error)}", "error")
+    
+    def export_groupby_result(self):
+        if self.groupby_result is None:
+            self.show_message("No Result", "Compute a group-by first.", "info")
+            return
+        self.export_dataframe(self.groupby_result)
+    
     def export_cleaned_csv(self):
-        if self.cleaned_df is None:
+        if self.session.cleaned_df is None:
             self.show_message("No Data", "No data to export.", "info")
             return
+        if self.loading_in_progress():
+            return
+        
+        profile = self.get_profile()
+        self.export_dataframe(self.session.cleaned_df, (f"• Missing values: {profile.missing_total:,}\n"
+                                                f"• Duplicate rows: {profile.duplicate_rows:,}"))
+    
+    def export_dataframe(self, df, details=""):
+        """Ask for a file and write df in the background, in the format its extension names"""
+        if self.export_job is not None:
+            self.show_message("Export In Progress",
+                              "Please wait until the current export has finished.", "info")
+            return
+        if self.loading_in_progress():
+            return
         
         path = filedialog.asksaveasfilename(
             defaultextension=".csv",
             filetypes=[
                 ("CSV Files", "*.csv"),
+                ("Compressed CSV", "*.csv.gz *.csv.bz2 *.csv.xz"),
+                ("Newline-delimited JSON", "*.ndjson *.jsonl *.ndjson.gz *.jsonl.gz"),
                 ("Excel Files", "*.xlsx"),
                 ("JSON Files", "*.json"),
                 ("All Files", "*.*")
             ]
         )
+        if not path:
+            return
         
-        if path:
-            try:
-                if path.endswith('.csv'):
-                    self.cleaned_df.to_csv(path, index=False)
-                    file_type = "CSV"
-                elif path.endswith('.xlsx'):
-                    self.cleaned_df.to_excel(path, index=False)
-                    file_type = "Excel"
-                elif path.endswith('.json'):
-                    self.cleaned_df.to_json(path, orient='records')
-                    file_type = "JSON"
-                
-                filename = path.split('/')[-1]
-                message = (f"Data exported successfully!\n\n"
-                          f"• File: {filename}\n"
-                          f"• Format: {file_type}\n"
-                          f"• Rows: {self.cleaned_df.shape[0]:,}\n"
-                          f"• Columns: {self.cleaned_df.shape[1]}\n"
-                          f"• Missing values: {self.cleaned_df.isnull().sum().sum():,}\n"
-                          f"• Duplicate rows: {self.cleaned_df.duplicated().sum():,}")
-                
-                self.update_status(f"Exported to {filename}")
-                self.show_message("Export Successful", message, "success")
-                
-            except Exception as e:
-                self.show_message("Export Failed", f"Error during export:\n{str(e)}", "error")
+        filename = os.path.basename(path)
+        file_type = describe_format(path)
+        started = time.perf_counter()
+        
+        # Blocks of rows are written on a worker thread; the frame is never modified
+        # in place, so later cleaning steps do not affect an export in progress
+        def write(job):
+            def on_progress(written, total):
+                self.jobs.post(self.on_export_progress, filename, written, total,
+                               time.perf_counter() - started)
+            self.session.export(path, df, on_progress, job.cancel_event)
+        
+        self.progress.config(mode='determinate', maximum=100, value=0)
+        self.progress.place(relx=0.5, rely=0.99, anchor="s")
+        self.cancel_export_btn.pack(anchor="w", padx=20)
+        self.update_status(f"Exporting {filename}...")
+        self.export_job = self.jobs.submit(
+            f"Export {filename}", write, kind="export",
+            on_done=lambda result: self.on_export_done(filename, file_type, df.shape, details,
+                                                       time.perf_counter() - started),
+            on_error=self.on_export_failed,
+            on_cancel=lambda: self.update_status("Export cancelled"),
+            on_finish=self.finish_export
+        )
+    
+    def on_export_progress(self, filename, written, total, elapsed):
+        if self.export_job is None or self.is_loading:
+            return
+        fraction = written / total if total else 1.0
+        self.progress.config(value=fraction * 100)
+        eta = elapsed * (total - written) / written if written else 0
+        self.update_status(f"Exporting {filename}: {written:,} / {total:,} rows "
+                           f"({fraction * 100:.0f}%)\nETA {format_duration(eta)}")
+    
+    def on_export_done(self, filename, file_type, shape, details, seconds):
+        message = (f"Data exported successfully!\n\n"
+                  f"• File: {filename}\n"
+                  f"• Format: {file_type}\n"
+                  f"• Rows: {shape[0]:,}\n"
+                  f"• Columns: {shape[1]}")
+        if details:
+            message += "\n" + details
+        message += f"\n• Time: {format_duration(seconds)}"
+        
+        self.update_status(f"Exported to {filename}")
+        self.show_message("Export Successful", message, "success")
+    
+    def on_export_failed(self, error):
+        self.update_status("Export failed")
+        self.show_message("Export Failed", f"Error during export:\n{str(error)}", "error")
+    
+    def cancel_export(self):
+        if self.export_job is not None:
+            self.jobs.cancel(self.export_job)
+            self.update_status("Cancelling export...")
+    
+    def finish_export(self):
+        self.export_job = None
+        self.cancel_export_btn.pack_forget()
+        if not self.is_loading:
+            self.progress.place_forget()
     
     def adjust_color(self, color, amount=20):
         """Lighten or darken a color (simplified implementation)"""
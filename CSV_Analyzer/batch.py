@@ -0,0 +1,247 @@
+"""
+Headless batch mode: profile, clean and export many CSV files in parallel.
+
+    python batch.py data/*.csv --pipeline nightly.json --output-dir cleaned --workers 8
+
+Each file is loaded into a DataSession, the engine behind the app, then
+optionally dtype-optimized, profiled, run through a saved cleaning pipeline
+(the JSON written by "Save Pipeline" in the app) and exported. Files are
+spread over a process pool, one file per task.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from cache import DatasetCache, DialectStore
+from exporter import EXPORT_SUFFIXES
+from loader import format_duration
+from pipeline import CleaningPipeline, PipelineError
+from session import DataSession
+
+# --format values are the export suffixes without the leading dot (csv, csv.gz, ndjson, ...)
+EXPORT_FORMATS = tuple(suffix[1:] for suffix in EXPORT_SUFFIXES)
+
+
+def find_csv_files(inputs):
+    """Expand directories and glob patterns into a sorted list of CSV paths"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(glob.glob(os.path.join(item, "*.csv")))
+        elif glob.has_magic(item):
+            paths.extend(glob.glob(item, recursive=True))
+        else:
+            paths.append(item)
+    # Keep the first occurrence of every file
+    return sorted(dict.fromkeys(os.path.abspath(path) for path in paths))
+
+
+def output_stems(paths):
+    """
+    Output name (without extension) for every input: its path relative to the
+    directory the inputs share, so a/sales.csv and b/sales.csv do not write to
+    the same files. Names that still clash (e.g. sales.csv and sales.CSV) get a number.
+    """
+    if not paths:
+        return {}
+    try:
+        root = os.path.commonpath([os.path.dirname(path) for path in paths])
+        names = [os.path.relpath(path, root) for path in paths]
+    except ValueError:
+        # Inputs on different drives share no directory; keep the drive as a folder
+        names = [os.path.join(drive.strip(":\\/"), rest.lstrip("\\/"))
+                 for drive, rest in map(os.path.splitdrive, paths)]
+
+    stems = {}
+    taken = set()
+    for path, name in zip(paths, names):
+        stem = base = os.path.splitext(name)[0]
+        number = 1
+        # Compared case-insensitively, as the output may go to a case-insensitive file system
+        while stem.lower() in taken:
+            number += 1
+            stem = f"{base}_{number}"
+        taken.add(stem.lower())
+        stems[path] = stem
+    return stems
+
+
+def inside(path, directory):
+    try:
+        return os.path.commonpath([path, directory]) == directory
+    except ValueError:
+        return False
+
+
+def profile_summary(profile):
+    return {
+        "rows": profile.n_rows,
+        "columns": profile.n_cols,
+        "missing": profile.missing_total,
+        "duplicate_rows": profile.duplicate_rows,
+        "memory_mb": round(profile.memory_mb, 2)
+    }
+
+
+def process_file(path, options, stem=None):
+    """
+    Load, profile, clean and export one file through a DataSession, as the
+    app would; outputs are named after stem (a path relative to the output
+    directory, by default the file's name). Runs inside a worker process, so
+    it takes and returns plain picklable values; failures are reported in
+    the result instead of being raised.
+    """
+    start = time.perf_counter()
+    result = {"file": path, "ok": False}
+    # Dialects are sniffed per file and not remembered: parallel workers would race on the file
+    session = DataSession(DatasetCache() if options["use_cache"] else DatasetCache(None),
+                          DialectStore(None))
+    try:
+        # Each worker streams its file through the C parser; the pool already uses every CPU
+        session.load(path, engine="c", optimize=options["optimize"], streaming=True)
+
+        stem = stem or os.path.splitext(os.path.basename(path))[0]
+        output_dir = options["output_dir"]
+        os.makedirs(os.path.dirname(os.path.join(output_dir, stem)), exist_ok=True)
+
+        if options["profile"]:
+            profile = session.profile(approximate=False)
+            result["profile"] = profile_summary(profile)
+            profile_path = os.path.join(output_dir, f"{stem}_profile.csv")
+            profile.columns.to_csv(profile_path, index_label="column")
+            result["profile_file"] = profile_path
+
+        if options["pipeline"] is not None:
+            result["steps"] = session.run_pipeline(CleaningPipeline.from_dict(options["pipeline"]))
+
+        if options["format"] is not None:
+            suffix = "_cleaned" if options["pipeline"] is not None else ""
+            output_path = os.path.join(output_dir, f"{stem}{suffix}.{options['format']}")
+            session.export(output_path)
+            result["output"] = output_path
+
+        result["rows_out"] = len(session.cleaned_df)
+        result["ok"] = True
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        session.close()
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def run_batch(paths, options, workers=None, on_result=None):
+    """Process every path on a pool of worker processes; returns the results in input order"""
+    os.makedirs(options["output_dir"], exist_ok=True)
+    stems = output_stems(paths)
+    results = {}
+    if workers == 1:
+        for path in paths:
+            results[path] = process_file(path, options, stems[path])
+            if on_result is not None:
+                on_result(results[path])
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(process_file, path, options, stems[path]): path
+                       for path in paths}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                if on_result is not None:
+                    on_result(results[futures[future]])
+    return [results[path] for path in paths]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Profile, clean and export many CSV files without the GUI.")
+    parser.add_argument("inputs", nargs="+",
+                        help="CSV files, directories or glob patterns (quote globs to use recursive **)")
+    parser.add_argument("-p", "--pipeline",
+                        help="cleaning pipeline JSON saved from the app")
+    parser.add_argument("-o", "--output-dir", default="batch_output",
+                        help="where exports, profiles and the report go (default: batch_output)")
+    parser.add_argument("-f", "--format", choices=EXPORT_FORMATS, default="csv",
+                        help="export format (default: csv)")
+    parser.add_argument("--no-export", action="store_true",
+                        help="profile and clean only, write no data files")
+    parser.add_argument("--no-profile", action="store_true",
+                        help="skip the per-file column profile")
+    parser.add_argument("--no-optimize", action="store_true",
+                        help="keep the dtypes pandas infers instead of downcasting them")
+    parser.add_argument("--cache", action="store_true",
+                        help="reuse (and fill) the app's Parquet cache of parsed files")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(),
+                        help="worker processes (default: number of CPUs)")
+    parser.add_argument("--report", help="path of the JSON run report "
+                                         "(default: <output-dir>/batch_report.json)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    output_dir = os.path.abspath(args.output_dir)
+    paths = find_csv_files(args.inputs)
+    # Outputs of an earlier run are not inputs of this one
+    outputs = [path for path in paths if inside(path, output_dir)]
+    if outputs:
+        print(f"Skipping {len(outputs)} files inside the output directory {output_dir}",
+              file=sys.stderr)
+        paths = [path for path in paths if not inside(path, output_dir)]
+    if not paths:
+        print("No CSV files matched.", file=sys.stderr)
+        return 2
+
+    pipeline = None
+    if args.pipeline:
+        # Loaded once here so a broken pipeline file fails before any work starts
+        try:
+            pipeline = CleaningPipeline.load(args.pipeline).to_dict()
+        except (OSError, ValueError, KeyError, PipelineError) as e:
+            print(f"Cannot load pipeline {args.pipeline}: {e}", file=sys.stderr)
+            return 2
+
+    options = {
+        "output_dir": output_dir,
+        "format": None if args.no_export else args.format,
+        "profile": not args.no_profile,
+        "optimize": not args.no_optimize,
+        "use_cache": args.cache,
+        "pipeline": pipeline
+    }
+    workers = max(1, min(args.workers or 1, len(paths)))
+
+    def on_result(result):
+        name = os.path.basename(result["file"])
+        if result["ok"]:
+            print(f"✓ {name}: {result['rows_out']:,} rows in {result['seconds']:.2f}s")
+        else:
+            print(f"✗ {name}: {result['error']}", file=sys.stderr)
+
+    print(f"Processing {len(paths)} files with {workers} workers")
+    start = time.perf_counter()
+    results = run_batch(paths, options, workers, on_result)
+    elapsed = time.perf_counter() - start
+
+    failed = [result for result in results if not result["ok"]]
+    report_path = args.report or os.path.join(options["output_dir"], "batch_report.json")
+    with open(report_path, "w", encoding="utf-8") as handle:
+        json.dump({
+            "files": len(results),
+            "failed": len(failed),
+            "workers": workers,
+            "seconds": round(elapsed, 3),
+            "results": results
+        }, handle, indent=2, default=str)
+
+    print(f"Done: {len(results) - len(failed)} succeeded, {len(failed)} failed "
+          f"in {format_duration(elapsed)}. Report: {report_path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
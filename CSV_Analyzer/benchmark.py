@@ -0,0 +1,506 @@
+"""
+Reproducible benchmarks of the analyzer's data paths, without the GUI.
+
+    python benchmark.py --rows 10k 1m --output results.json
+    python benchmark.py --rows 10k 1m --compare baseline.json
+
+A synthetic dataset (numeric, text, categorical and date columns with a set
+share of missing values and duplicate rows) is generated from a fixed seed
+for every size, then loading, profiling, every cleaning method (with its
+undo delta), the data preparation behind every chart, filtering, group-by,
+correlation and every export format are timed on it, all through the
+DataSession the app and batch mode use. Each case is run a few times and
+the best run is kept. The results are written as JSON; --compare checks them against an
+earlier run and exits non-zero when a case got slower than the tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import matplotlib
+matplotlib.use("Agg")
+
+import numpy as np
+import pandas as pd
+
+from cache import DatasetCache, DialectStore
+from charts import build_correlation_heatmap
+from excel import MAX_SHEET_ROWS, OPENPYXL_AVAILABLE
+from exporter import EXPORT_SUFFIXES
+from loader import PYARROW_AVAILABLE
+from pipeline import FILL_METHODS, FILTER_METHODS, CleaningPipeline
+from session import DataSession, LoadedData
+
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+GROUPS = ("load", "profile", "clean", "chart", "analysis", "export")
+# Cases are repeated until this many seconds have been spent on them (always at least once)
+REPEAT_BUDGET = 10.0
+# Differences smaller than this are timer noise, whatever the ratio
+NOISE_SECONDS = 0.05
+CHART_COLORS = {"primary": "#2563eb", "accent": "#f59e0b"}
+# Distinct values of each categorical column, cycled through
+CATEGORY_SIZES = (5, 50, 1_000)
+
+
+def parse_rows(text):
+    """Row count from "10k", "1m", "250000" or "2.5m" """
+    text = text.strip().lower().replace("_", "")
+    if text in SIZES:
+        return SIZES[text]
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    try:
+        return int(float(text[:-1] if scale > 1 else text) * scale)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a row count: {text!r}")
+
+
+def size_label(rows):
+    for label, size in SIZES.items():
+        if size == rows:
+            return label
+    return f"{rows:,}"
+
+
+def generate_dataset(rows, numeric=6, text=2, categorical=3, dates=1, null_ratio=0.05,
+                     duplicate_ratio=0.01, seed=0):
+    """
+    Synthetic frame with the given column mix. Numeric columns alternate
+    between normal floats, skewed (lognormal) floats with outliers and
+    integers; text columns hold mostly unique strings, categorical ones a
+    few labels each. null_ratio of every column's values are missing and
+    duplicate_ratio of the rows repeat an earlier row. The same arguments
+    always give the same frame.
+    """
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for i in range(numeric):
+        kind = i % 3
+        if kind == 0:
+            values = rng.normal(100.0, 15.0, rows)
+        elif kind == 1:
+            values = rng.lognormal(3.0, 1.0, rows)
+        else:
+            values = rng.integers(0, 10_000, rows)
+        columns[f"num_{i}"] = pd.Series(values)
+    for i in range(text):
+        codes = pd.Series(rng.integers(0, max(rows, 1) * 10, rows))
+        columns[f"text_{i}"] = "item-" + codes.astype(str)
+    for i in range(categorical):
+        size = CATEGORY_SIZES[i % len(CATEGORY_SIZES)]
+        labels = np.array([f"cat{i}_{j}" for j in range(size)], dtype=object)
+        columns[f"cat_{i}"] = pd.Series(labels[rng.integers(0, size, rows)])
+    start = np.datetime64("2020-01-01T00:00:00", "s")
+    for i in range(dates):
+        seconds = rng.integers(0, 3 * 365 * 86_400, rows)
+        columns[f"date_{i}"] = pd.Series(start + seconds.astype("timedelta64[s]"))
+
+    df = pd.DataFrame(columns)
+    if null_ratio > 0:
+        for col in df.columns:
+            df[col] = df[col].mask(rng.random(rows) < null_ratio)
+
+    n_duplicates = int(rows * duplicate_ratio)
+    if n_duplicates and rows > 1:
+        # Copy earlier rows over a random set of later positions
+        positions = np.arange(rows)
+        targets = rng.choice(np.arange(1, rows), size=min(n_duplicates, rows - 1), replace=False)
+        positions[targets] = (rng.random(len(targets)) * targets).astype(np.int64)
+        df = df.take(positions).reset_index(drop=True)
+    return df
+
+
+def time_case(fn, repeat, prepare=None):
+    """
+    Seconds of every run of fn(); runs stop early once REPEAT_BUDGET is used
+    up. prepare(), when given, runs untimed before every run.
+    """
+    runs = []
+    while len(runs) < max(repeat, 1):
+        if prepare is not None:
+            prepare()
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+        if sum(runs) >= REPEAT_BUDGET:
+            break
+    return runs
+
+
+def columns_of(df, prefix):
+    return [col for col in df.columns if col.startswith(prefix)]
+
+
+def new_session(cache_dir=None):
+    """A session caching parsed files in cache_dir (nothing without one), dialects kept in memory"""
+    return DataSession(DatasetCache(cache_dir), DialectStore(None))
+
+
+def fresh(session):
+    """Clear the filter and every cached result, as a cleaning step would"""
+    session.set_filter("")
+    session.mark_data_changed()
+
+
+def load_cases(session, path, workdir):
+    """Every case reads path through session, as the app's load job does"""
+    cached = new_session(os.path.join(workdir, "cache"))
+    # Fill the cache and remember the dialect once, so only the timed runs differ
+    cached.load(path)
+    session.csv_options(path, "c")
+
+    cases = [("sniff dialect", lambda: session.csv_options(path, "c"), session.dialects.clear),
+             ("read_csv c", lambda: session.read_csv(path, "c", optimize=False, streaming=False),
+              None)]
+    if PYARROW_AVAILABLE:
+        cases.append(("read_csv pyarrow", lambda: session.read_csv(
+            path, "pyarrow", optimize=False, streaming=False), None))
+    cases.append(("streaming c", lambda: session.read_csv(path, "c", optimize=False,
+                                                          streaming=True), None))
+    raw = session.read_csv(path, "c", optimize=False).df
+    cases += [
+        ("optimize dtypes", lambda: session.prepare_frame(path, raw, True), None),
+        ("load + optimize", lambda: session.load(path), None),
+        ("load from cache", lambda: cached.load(path), None),
+        ("out-of-core load", lambda: session.load(path, out_of_core=True), None),
+    ]
+    return cases
+
+
+def profile_cases(session):
+    df = session.cleaned_df
+    numeric = columns_of(df, "num_")
+    categorical = columns_of(df, "cat_")
+
+    def profiled():
+        fresh(session)
+        session.profile()
+
+    def filtered():
+        fresh(session)
+        session.get_row_index()
+        session.set_filter(f"{numeric[0]} >= 100 and {categorical[0]} in (cat0_1, cat0_3)")
+
+    cases = [
+        ("exact profile", lambda: session.profile(approximate=False), lambda: fresh(session)),
+        ("approximate profile", lambda: session.profile(approximate=True), lambda: fresh(session)),
+        # The summary is cached on the profile, so the profile is rebuilt before every run
+        ("numeric summary", lambda: session.profile().numeric_summary(), profiled),
+        ("row hash index", session.get_row_index, lambda: fresh(session)),
+    ]
+    if numeric and categorical:
+        cases.append(("filtered profile", lambda: session.profile(filtered=True), filtered))
+    return cases
+
+
+def clean_cases(session):
+    """
+    Every cleaning method as the app applies it: through the session, with
+    its undo delta and row index update. Each run starts from the loaded
+    data with its profile already built.
+    """
+    df, cleaned = session.df, session.cleaned_df
+    numeric = columns_of(cleaned, "num_")
+    categorical = columns_of(cleaned, "cat_")
+
+    def restore():
+        session.replace_data(df, cleaned)
+        session.history.clear()
+        session.pipeline = CleaningPipeline()
+        session.profile()
+
+    cases = []
+    for method in FILL_METHODS + FILTER_METHODS:
+        if method == "Remove Missing Rows":
+            cases.append((method, session.remove_missing_rows, restore))
+        elif method == "Remove Duplicates":
+            cases.append((method, session.remove_duplicates, restore))
+        elif method == "Mode Imputation" and categorical:
+            cases.append((f"{method} ({categorical[0]})",
+                          lambda method=method: session.clean_column(method, categorical[0]),
+                          restore))
+        elif not numeric:
+            continue
+        elif method == "Remove Outliers":
+            cases.append((f"{method} ({numeric[0]})",
+                          lambda: session.remove_outliers(numeric[0]), restore))
+        else:
+            cases.append((f"{method} ({numeric[0]})",
+                          lambda method=method: session.clean_column(method, numeric[0]),
+                          restore))
+
+    def dropped():
+        restore()
+        session.remove_missing_rows()
+
+    cases.append(("undo Remove Missing Rows", session.undo, dropped))
+    if numeric:
+        pipeline = CleaningPipeline()
+        pipeline.add("Median Imputation", numeric[0])
+        pipeline.add("Remove Duplicates")
+        cases.append(("run saved pipeline", lambda: session.run_pipeline(pipeline), restore))
+    return cases
+
+
+def chart_cases(session):
+    """Every chart is built as the app's chart job builds it: data preparation plus figure, not drawn"""
+    df = session.cleaned_df
+    numeric = columns_of(df, "num_")
+    categorical = columns_of(df, "cat_")
+    cases = []
+    if numeric:
+        x = numeric[0]
+        y = numeric[1] if len(numeric) > 1 else numeric[0]
+        for name, viz_type in (("histogram", "Histogram"), ("box plot", "Box Plot"),
+                               ("scatter plot", "Scatter Plot"), ("line chart", "Line Chart")):
+            cases.append((name, lambda viz_type=viz_type: session.chart(
+                viz_type, x, y, colors=CHART_COLORS), lambda: fresh(session)))
+        cases.append(("correlation heatmap", lambda: build_correlation_heatmap(
+            session.correlation(), "Pearson correlation"), lambda: fresh(session)))
+    if categorical:
+        for name, viz_type in (("bar chart", "Bar Chart"), ("pie chart", "Pie Chart")):
+            cases.append((name, lambda viz_type=viz_type: session.chart(
+                viz_type, categorical[0], colors=CHART_COLORS), lambda: fresh(session)))
+    return cases
+
+
+def analysis_cases(session):
+    """Cached indexes and results are dropped before every run, so each one builds them"""
+    df = session.cleaned_df
+    numeric = columns_of(df, "num_")
+    categorical = columns_of(df, "cat_")
+    cases = []
+    if numeric and categorical:
+        text = f"{numeric[0]} >= 100 and {categorical[0]} in (cat0_1, cat0_3)"
+        cases.append(("filter", lambda: session.set_filter(text), lambda: fresh(session)))
+        keys = categorical[:2]
+        cases.append(("group by", lambda: session.group_by(
+            keys, numeric[:2], ["count", "mean", "p90"]), lambda: fresh(session)))
+    if numeric:
+        for method in ("pearson", "spearman"):
+            cases.append((f"{method} correlation",
+                          lambda method=method: session.correlation(method),
+                          lambda: fresh(session)))
+    return cases
+
+
+def export_cases(session, workdir):
+    cases = []
+    seen = set()
+    for suffix, kind in EXPORT_SUFFIXES.items():
+        # .jsonl is the same writer as .ndjson
+        if kind in seen:
+            continue
+        seen.add(kind)
+        if kind[0] == "xlsx" and (not OPENPYXL_AVAILABLE
+                                  or len(session.cleaned_df) >= MAX_SHEET_ROWS):
+            continue
+        path = os.path.join(workdir, f"export{suffix}")
+        cases.append((suffix[1:], lambda path=path: session.export(path), None))
+    return cases
+
+
+def run_size(rows, options, repeat, groups, skip=(), on_result=None):
+    """
+    Generate one dataset and time every case of the selected groups on it,
+    except those in skip. Everything runs through DataSession, the engine
+    behind the app and batch mode.
+    """
+    results = []
+
+    def record(group, cases):
+        for name, fn, prepare in cases:
+            if name in skip:
+                continue
+            result = {"rows": rows, "group": group, "name": name}
+            try:
+                runs = time_case(fn, repeat, prepare)
+                result["seconds"] = round(min(runs), 6)
+                result["runs"] = [round(run, 6) for run in runs]
+            except Exception as e:
+                result["error"] = f"{type(e).__name__}: {e}"
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+
+    with tempfile.TemporaryDirectory(prefix="csv_analyzer_bench_") as workdir:
+        path = os.path.join(workdir, "data.csv")
+        start = time.perf_counter()
+        session = new_session()
+        df = generate_dataset(rows, **options["dataset"])
+        session.set_data(LoadedData(path, *session.prepare_frame(path, df, options["optimize"])))
+        generated = time.perf_counter() - start
+        if "load" in groups:
+            df.to_csv(path, index=False)
+        del df
+
+        try:
+            if "load" in groups:
+                loader = new_session()
+                try:
+                    record("load", load_cases(loader, path, workdir))
+                finally:
+                    loader.close()
+            if "profile" in groups:
+                record("profile", profile_cases(session))
+            if "clean" in groups:
+                record("clean", clean_cases(session))
+            if "chart" in groups:
+                record("chart", chart_cases(session))
+            if "analysis" in groups:
+                fresh(session)
+                record("analysis", analysis_cases(session))
+            if "export" in groups:
+                fresh(session)
+                record("export", export_cases(session, workdir))
+        finally:
+            session.close()
+    return results, generated
+
+
+def environment():
+    info = {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "pyarrow": PYARROW_AVAILABLE,
+        "openpyxl": OPENPYXL_AVAILABLE,
+    }
+    return info
+
+
+def compare_results(results, baseline, tolerance):
+    """
+    (rows of the comparison, regressions): a case regresses when it is more
+    than tolerance slower than in the baseline and by more than NOISE_SECONDS.
+    """
+    previous = {(item["rows"], item["group"], item["name"]): item
+                for item in baseline["results"] if "seconds" in item}
+    rows = []
+    regressions = []
+    for item in results:
+        old = previous.get((item["rows"], item["group"], item["name"]))
+        if old is None or "seconds" not in item:
+            continue
+        ratio = item["seconds"] / old["seconds"] if old["seconds"] > 0 else float("inf")
+        slower = (ratio > 1 + tolerance and item["seconds"] - old["seconds"] > NOISE_SECONDS)
+        row = dict(item, baseline=old["seconds"], ratio=round(ratio, 3), regression=slower)
+        rows.append(row)
+        if slower:
+            regressions.append(row)
+    return rows, regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Time loading, profiling, cleaning, charts, analysis and exports "
+                    "on synthetic data, without the GUI.")
+    parser.add_argument("-r", "--rows", nargs="+", type=parse_rows,
+                        default=[SIZES["10k"], SIZES["1m"], SIZES["10m"]],
+                        help="dataset sizes, e.g. 10k 1m 10m or 250000 (default: 10k 1m 10m)")
+    parser.add_argument("-g", "--groups", nargs="+", choices=GROUPS, default=list(GROUPS),
+                        help="which groups of cases to run (default: all)")
+    parser.add_argument("--skip", nargs="+", default=[], metavar="CASE",
+                        help="case names to leave out, e.g. csv.xz xlsx for quicker runs")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs per case, the best one is kept (default: 3; long cases run "
+                             f"until {REPEAT_BUDGET:.0f}s have been spent)")
+    parser.add_argument("--numeric", type=int, default=6, help="numeric columns (default: 6)")
+    parser.add_argument("--text", type=int, default=2, help="text columns (default: 2)")
+    parser.add_argument("--categorical", type=int, default=3,
+                        help="categorical columns (default: 3)")
+    parser.add_argument("--dates", type=int, default=1, help="date columns (default: 1)")
+    parser.add_argument("--null-ratio", type=float, default=0.05,
+                        help="share of missing values per column (default: 0.05)")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.01,
+                        help="share of rows that duplicate another row (default: 0.01)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+    parser.add_argument("--no-optimize", action="store_true",
+                        help="benchmark the generated dtypes instead of optimized ones")
+    parser.add_argument("-o", "--output", default="benchmark_results.json",
+                        help="JSON results file (default: benchmark_results.json)")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="results JSON of an earlier run to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown against the baseline (default: 0.25 = 25%%)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        # Read before any work starts so a bad baseline path fails fast
+        try:
+            with open(args.compare, encoding="utf-8") as handle:
+                baseline = json.load(handle)
+        except (OSError, ValueError) as e:
+            print(f"Cannot read baseline {args.compare}: {e}", file=sys.stderr)
+            return 2
+
+    options = {
+        "dataset": {
+            "numeric": args.numeric,
+            "text": args.text,
+            "categorical": args.categorical,
+            "dates": args.dates,
+            "null_ratio": args.null_ratio,
+            "duplicate_ratio": args.duplicate_ratio,
+            "seed": args.seed,
+        },
+        "optimize": not args.no_optimize,
+    }
+
+    def on_result(result):
+        label = f"{size_label(result['rows']):>6} {result['group']:<9} {result['name']:<32}"
+        if "error" in result:
+            print(f"{label} ✗ {result['error']}", file=sys.stderr)
+        else:
+            print(f"{label} {result['seconds']:10.4f}s")
+
+    results = []
+    generated = {}
+    for rows in args.rows:
+        print(f"Generating {rows:,} rows")
+        size_results, seconds = run_size(rows, options, args.repeat, args.groups,
+                                         args.skip, on_result)
+        results.extend(size_results)
+        generated[str(rows)] = round(seconds, 3)
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "options": dict(options, rows=args.rows, groups=args.groups, repeat=args.repeat),
+        "generate_seconds": generated,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"Results written to {args.output}")
+
+    failed = [result for result in results if "error" in result]
+    if baseline is None:
+        return 1 if failed else 0
+
+    if baseline.get("options", {}).get("dataset") != options["dataset"]:
+        print("Warning: the baseline was run on a different dataset configuration", file=sys.stderr)
+    rows, regressions = compare_results(results, baseline, args.tolerance)
+    print(f"\nCompared with {args.compare} (tolerance {args.tolerance:.0%}):")
+    for row in rows:
+        marker = "REGRESSION" if row["regression"] else ""
+        print(f"{size_label(row['rows']):>6} {row['group']:<9} {row['name']:<32} "
+              f"{row['baseline']:10.4f}s -> {row['seconds']:10.4f}s  x{row['ratio']:<6} {marker}")
+    print(f"{len(regressions)} regression(s) in {len(rows)} compared cases")
+    return 1 if regressions or failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
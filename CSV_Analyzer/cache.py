@@ -0,0 +1,199 @@
+"""On-disk cache of parsed datasets stored as Parquet next to a small JSON sidecar"""
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (needed by DataFrame.to_parquet)
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".csv_analyzer_cache")
+MAX_CACHE_BYTES = 2 * 1024 * 1024 * 1024
+
+# Bump when the cached layout changes so old entries are ignored
+CACHE_VERSION = 1
+
+
+class DatasetCache:
+    """
+    Parsed DataFrames keyed by the source file's path, size and modification
+    time. The least recently used entries are evicted once the cache grows
+    past max_bytes. With cache_dir None nothing is cached.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def available(self):
+        return PARQUET_AVAILABLE and self.cache_dir is not None
+
+    def fingerprint(self, path, optimized, variant=""):
+        """
+        Cache key for a source file; changes whenever the file does. variant
+        tells apart different reads of the same file, e.g. one sheet of a workbook.
+        """
+        stat = os.stat(path)
+        raw = f"{CACHE_VERSION}|{os.path.realpath(path)}|{stat.st_size}|{stat.st_mtime_ns}|{optimized}"
+        if variant:
+            raw += f"|{variant}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def entry_paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + ".parquet", base + ".json"
+
+    def get(self, path, optimized, variant=""):
+        """Return (df, metadata) for a cached file, or None on a miss"""
+        if not self.available:
+            return None
+
+        data_path, meta_path = self.entry_paths(self.fingerprint(path, optimized, variant))
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            self.misses += 1
+            return None
+
+        try:
+            df = pd.read_parquet(data_path)
+            with open(meta_path, encoding="utf-8") as handle:
+                metadata = json.load(handle)
+        except Exception:
+            # A corrupt entry is treated as a miss and dropped
+            self.remove_entry(data_path, meta_path)
+            self.misses += 1
+            return None
+
+        # Touch the entry so eviction sees it as recently used
+        os.utime(data_path)
+        self.hits += 1
+        return df, metadata
+
+    def put(self, path, df, optimized, metadata=None, variant=""):
+        """Store a parsed DataFrame; returns False when it cannot be cached"""
+        if not self.available:
+            return False
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data_path, meta_path = self.entry_paths(self.fingerprint(path, optimized, variant))
+        metadata = dict(metadata or {}, source=os.path.realpath(path))
+
+        # Write to temporary names first so a crash never leaves half an entry
+        try:
+            df.to_parquet(data_path + ".tmp", index=False)
+            with open(meta_path + ".tmp", "w", encoding="utf-8") as handle:
+                json.dump(metadata, handle)
+        except Exception:
+            # Mixed-type object columns and similar cannot be stored as Parquet
+            self.remove_entry(data_path + ".tmp", meta_path + ".tmp")
+            return False
+
+        os.replace(data_path + ".tmp", data_path)
+        os.replace(meta_path + ".tmp", meta_path)
+        self.evict()
+        return True
+
+    def entries(self):
+        """List (data_path, meta_path, size, last_used) for every cache entry"""
+        if not os.path.isdir(self.cache_dir):
+            return []
+
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".parquet"):
+                continue
+            data_path = os.path.join(self.cache_dir, name)
+            meta_path = data_path[:-len(".parquet")] + ".json"
+            stat = os.stat(data_path)
+            entries.append((data_path, meta_path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def total_size(self):
+        return sum(size for _, _, size, _ in self.entries())
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits max_bytes"""
+        entries = sorted(self.entries(), key=lambda entry: entry[3])
+        total = sum(entry[2] for entry in entries)
+        for data_path, meta_path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            self.remove_entry(data_path, meta_path)
+            total -= size
+
+    def purge(self):
+        """Delete every cache entry; returns (entries_removed, bytes_freed)"""
+        entries = self.entries()
+        for data_path, meta_path, _, _ in entries:
+            self.remove_entry(data_path, meta_path)
+        return len(entries), sum(size for _, _, size, _ in entries)
+
+    @staticmethod
+    def remove_entry(*paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+class DialectStore:
+    """
+    read_csv options (delimiter, encoding, header) sniffed for each file,
+    kept in a small JSON file so that reloading a file skips sniffing. Each
+    entry records the file's size and mtime, and a file rewritten since
+    then is sniffed again. With path None dialects are only kept in memory.
+    """
+
+    def __init__(self, path=os.path.join(CACHE_DIR, "dialects.json")):
+        self.path = path
+        self.dialects = None
+
+    def load(self):
+        if self.dialects is None:
+            self.dialects = {}
+            if self.path is None:
+                return self.dialects
+            try:
+                with open(self.path, encoding="utf-8") as handle:
+                    self.dialects = json.load(handle)
+            except (OSError, ValueError):
+                pass
+        return self.dialects
+
+    def stamp(self, path):
+        stat = os.stat(path)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def get(self, path):
+        """The remembered dialect, or None when there is none or the file changed since"""
+        entry = self.load().get(os.path.realpath(path))
+        if entry is None or entry.get("stamp") != self.stamp(path):
+            return None
+        return entry["dialect"]
+
+    def put(self, path, dialect):
+        self.load()[os.path.realpath(path)] = {"stamp": self.stamp(path), "dialect": dialect}
+        self.save()
+
+    def clear(self):
+        self.dialects = {}
+        self.save()
+
+    def save(self):
+        if self.path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path + ".tmp", "w", encoding="utf-8") as handle:
+                json.dump(self.dialects, handle)
+            os.replace(self.path + ".tmp", self.path)
+        except OSError:
+            # Remembering dialects is a convenience; a read-only home just means sniffing again
+            pass
@@ -0,0 +1,506 @@
+"""
+Chart building for the visualization panel. Data reduction turns millions of
+rows into something matplotlib can draw quickly, and the build_* functions
+create finished Figures without touching Tk, so they can run on a worker thread.
+"""
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib import colormaps
+from matplotlib.colors import LogNorm
+from matplotlib.figure import Figure
+import seaborn as sns
+
+# Scatter plots with more points than this are drawn as a density image
+DENSITY_SCATTER_ROWS = 100_000
+# Density grid resolution (columns, rows); roughly one cell per couple of screen pixels
+DENSITY_BINS = (320, 200)
+# Line charts keep about this many points per horizontal pixel of the canvas
+LINE_POINTS_PER_PIXEL = 2
+# Markers are only drawn on lines with at most this many points
+LINE_MARKER_POINTS = 200
+# Histograms are counted once at this resolution and merged down to the bin
+# count picked on the slider; 5040 has many divisors, which come out exactly even
+FINE_HISTOGRAM_BINS = 5040
+MAX_HISTOGRAM_BINS = 300
+# Heatmap cells get their value written in up to this many columns, and tick labels up to LABELED
+HEATMAP_ANNOTATED_COLUMNS = 15
+HEATMAP_LABELED_COLUMNS = 80
+
+
+def numeric_values(series):
+    """Series as a float64 array (categoricals and datetimes included); None if not possible"""
+    try:
+        return series.to_numpy(dtype="float64", na_value=np.nan)
+    except (TypeError, ValueError):
+        return None
+
+
+def density_grid(x, y, extent=None, bins=DENSITY_BINS):
+    """
+    Count points per cell of a bins[0] x bins[1] grid over extent
+    (x0, x1, y0, y1), which defaults to the data range. Points outside the
+    extent are ignored. Returns (counts[rows, columns], extent).
+    """
+    if extent is None:
+        extent = (x.min(), x.max(), y.min(), y.max()) if len(x) else (0.0, 1.0, 0.0, 1.0)
+    x0, x1, y0, y1 = extent
+    # A single distinct value still needs a non-empty range to bin over
+    if x1 <= x0:
+        x0, x1 = x0 - 0.5, x1 + 0.5
+    if y1 <= y0:
+        y0, y1 = y0 - 0.5, y1 + 0.5
+
+    nx, ny = bins
+    inside = (x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)
+    x, y = x[inside], y[inside]
+    ix = np.minimum(((x - x0) * (nx / (x1 - x0))).astype(np.int64), nx - 1)
+    iy = np.minimum(((y - y0) * (ny / (y1 - y0))).astype(np.int64), ny - 1)
+    counts = np.bincount(iy * nx + ix, minlength=nx * ny).reshape(ny, nx)
+    return counts, (x0, x1, y0, y1)
+
+
+class DensityScatter:
+    """
+    Scatter plot drawn as a log-scaled density image. Whenever the axes
+    limits change (zoom or pan), the grid is recomputed for the visible range
+    only, so zooming in reveals detail instead of enlarging pixels.
+    """
+
+    def __init__(self, ax, x, y, cmap="viridis", schedule=None):
+        valid = ~(np.isnan(x) | np.isnan(y))
+        self.ax = ax
+        self.x = x[valid]
+        self.y = y[valid]
+        # schedule(callback) defers the rebin until both limits have changed (e.g. root.after_idle)
+        self.schedule = schedule
+        self.pending = False
+        self.extent = None
+
+        counts, extent = density_grid(self.x, self.y)
+        self.image = ax.imshow(self.mask(counts), extent=extent, origin="lower",
+                               aspect="auto", cmap=cmap, norm=self.norm(counts),
+                               interpolation="nearest")
+        self.extent = extent
+        ax.set_xlim(extent[0], extent[1])
+        ax.set_ylim(extent[2], extent[3])
+
+        ax.callbacks.connect("xlim_changed", self.on_limits_changed)
+        ax.callbacks.connect("ylim_changed", self.on_limits_changed)
+
+    @property
+    def n_points(self):
+        return len(self.x)
+
+    @staticmethod
+    def mask(counts):
+        # Empty cells stay transparent instead of taking the lowest colour
+        return np.ma.masked_equal(counts, 0)
+
+    @staticmethod
+    def norm(counts):
+        return LogNorm(vmin=1, vmax=max(2, int(counts.max())))
+
+    def on_limits_changed(self, ax):
+        if self.schedule is None:
+            self.rebin()
+        elif not self.pending:
+            self.pending = True
+            self.schedule(self.rebin)
+
+    def rebin(self):
+        self.pending = False
+        x0, x1 = sorted(self.ax.get_xlim())
+        y0, y1 = sorted(self.ax.get_ylim())
+        if (x0, x1, y0, y1) == self.extent:
+            return
+
+        counts, extent = density_grid(self.x, self.y, (x0, x1, y0, y1))
+        self.extent = extent
+        self.image.set_data(self.mask(counts))
+        self.image.set_extent(extent)
+        self.image.set_norm(self.norm(counts))
+        self.ax.figure.canvas.draw_idle()
+
+
+def minmax_indices(y, n_buckets):
+    """
+    Positions of the minimum and maximum of y in each of n_buckets equal
+    buckets, in their original order. Keeps every spike; vectorized.
+    """
+    n = len(y)
+    size = int(np.ceil(n / n_buckets))
+    padded = np.full(size * n_buckets, np.nan)
+    padded[:n] = y
+    buckets = padded.reshape(n_buckets, size)
+    filled = ~np.isnan(buckets).all(axis=1)
+    offsets = np.arange(n_buckets)[filled] * size
+    lows = np.nanargmin(buckets[filled], axis=1) + offsets
+    highs = np.nanargmax(buckets[filled], axis=1) + offsets
+    return np.unique(np.concatenate([lows, highs]))
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets (Steinarsson 2013): keep the first and
+    last point and, from each of n_out - 2 buckets, the point forming the
+    largest triangle with the previously kept point and the next bucket's
+    average. Returns the positions of the kept points.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = (np.arange(n_out - 1) * ((n - 2) / (n_out - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[previous] - avg_x) * (y[start:end] - y[previous]) -
+                      (x[previous] - x[start:end]) * (avg_y - y[previous]))
+        previous = start + int(area.argmax()) if end > start else start
+        selected[bucket + 1] = previous
+    return selected
+
+
+def downsample_line(x, y, n_out):
+    """
+    Reduce a line series to about n_out points while keeping its shape.
+    Very long series are first cut down with min/max bucketing (so no spike
+    is lost), then LTTB picks the final points. NaN points are dropped.
+    Returns (x, y).
+    """
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[valid], y[valid]
+    if len(x) <= n_out:
+        return x, y
+
+    if len(x) > 32 * n_out:
+        keep = minmax_indices(y, 4 * n_out)
+        x, y = x[keep], y[keep]
+    keep = lttb_indices(x, y, n_out)
+    return x[keep], y[keep]
+
+
+class ChartError(Exception):
+    """The selected columns cannot be drawn as the selected chart type"""
+
+    def __init__(self, title, message):
+        super().__init__(message)
+        self.title = title
+
+
+def default_histogram_bins(n_values):
+    # The old n // 10 rule gave zero bins for columns with fewer than ten values
+    return max(min(30, n_values // 10), min(n_values, 5))
+
+
+class HistogramBins:
+    """
+    Value counts of one numeric column in FINE_HISTOGRAM_BINS equal-width
+    bins, counted in a single pass. Any coarser histogram is derived from the
+    fine counts without looking at the values again.
+    """
+
+    def __init__(self, counts, low, high, mean, std):
+        self.counts = counts
+        self.low = low
+        self.high = high
+        self.mean = mean
+        self.std = std
+
+    @classmethod
+    def from_values(cls, values, fine_bins=FINE_HISTOGRAM_BINS):
+        values = values[~np.isnan(values)]
+        if not len(values):
+            raise ChartError("No Data", "The column has no values to plot.")
+        low, high = float(values.min()), float(values.max())
+        if high <= low:
+            low, high = low - 0.5, high + 0.5
+        index = np.minimum(((values - low) * (fine_bins / (high - low))).astype(np.int64),
+                           fine_bins - 1)
+        counts = np.bincount(index, minlength=fine_bins)
+        std = values.std(ddof=1) if len(values) > 1 else np.nan
+        return cls(counts, low, high, values.mean(), std)
+
+    @property
+    def n_values(self):
+        return int(self.counts.sum())
+
+    def coarsen(self, n_bins):
+        """
+        (edges, counts) for n_bins bins. Each edge falls on the nearest fine
+        edge, so the counts are exact for the edges returned; bins are equal
+        width when n_bins divides the fine bin count, and otherwise differ by
+        at most one fine bin.
+        """
+        fine_bins = len(self.counts)
+        n_bins = max(1, min(n_bins, fine_bins))
+        boundaries = np.round(np.linspace(0, fine_bins, n_bins + 1)).astype(np.int64)
+        counts = np.add.reduceat(self.counts, boundaries[:-1])
+        edges = self.low + boundaries * ((self.high - self.low) / fine_bins)
+        return edges, counts
+
+
+class HistogramView:
+    """Histogram bars drawn from HistogramBins, redrawn in place when the bin count changes"""
+
+    def __init__(self, ax, bins, color, n_bins):
+        self.ax = ax
+        self.bins = bins
+        self.color = color
+        self.bars = None
+        self.n_bins = None
+        self.set_bins(n_bins)
+
+    def set_bins(self, n_bins):
+        if n_bins == self.n_bins:
+            return
+        if self.bars is not None:
+            self.bars.remove()
+        edges, counts = self.bins.coarsen(n_bins)
+        self.bars = self.ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge',
+                                edgecolor='white', alpha=0.7, color=self.color)
+        self.n_bins = n_bins
+        self.ax.relim()
+        self.ax.autoscale_view()
+
+
+class ChartFigure:
+    """A built figure plus anything that has to stay alive with it"""
+
+    def __init__(self, figure, density=None, histogram=None):
+        self.figure = figure
+        # DensityScatter whose axes callbacks rebin on zoom (callbacks are weak references)
+        self.density = density
+        # HistogramView behind the bin-count slider
+        self.histogram = histogram
+
+    def render(self):
+        """Draw with Agg so layout and rasterization happen before the figure reaches Tk"""
+        FigureCanvasAgg(self.figure).draw()
+        return self
+
+
+class ChartCache:
+    """
+    Built figures keyed by (chart type, columns, options, dataset version),
+    least recently used first out once more than max_entries are held.
+    """
+
+    def __init__(self, max_entries=12):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        chart = self.entries.get(key)
+        if chart is not None:
+            self.entries.move_to_end(key)
+        return chart
+
+    def put(self, key, chart):
+        self.entries[key] = chart
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def discard_versions_before(self, version):
+        """Drop figures of data versions that can no longer be shown"""
+        for key in [key for key in self.entries if key[-1] < version]:
+            del self.entries[key]
+
+
+def new_figure(size=(10, 6)):
+    figure = Figure(figsize=size, dpi=100)
+    return figure, figure.add_subplot(111)
+
+
+def stats_box(ax, text):
+    ax.text(0.02, 0.98, text, transform=ax.transAxes, fontsize=10,
+            verticalalignment='top', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
+
+
+def build_histogram(df, col, colors, n_bins=None, bins=None):
+    """
+    bins are the column's HistogramBins when already counted for this data
+    version; n_bins defaults to default_histogram_bins.
+    """
+    if not pd.api.types.is_numeric_dtype(df[col]):
+        raise ChartError("Invalid Column", "Histogram requires numeric columns.")
+
+    if bins is None:
+        bins = HistogramBins.from_values(numeric_values(df[col]))
+    figure, ax = new_figure()
+    view = HistogramView(ax, bins, colors['primary'], n_bins or default_histogram_bins(bins.n_values))
+
+    ax.set_xlabel(col, fontsize=11)
+    ax.set_ylabel('Frequency', fontsize=11)
+    ax.set_title(f'Histogram of {col}', fontsize=13, fontweight='bold')
+    ax.grid(True, alpha=0.3)
+
+    stats_box(ax, f"Mean: {bins.mean:.2f}\nStd: {bins.std:.2f}\nN: {bins.n_values:,}")
+    return ChartFigure(figure, histogram=view)
+
+
+def build_boxplot(df, col, colors):
+    if not pd.api.types.is_numeric_dtype(df[col]):
+        raise ChartError("Invalid Column", "Box plot requires numeric columns.")
+
+    figure, ax = new_figure()
+    data = df[col].dropna()
+    bp = ax.boxplot(data, patch_artist=True, vert=False)
+
+    bp['boxes'][0].set_facecolor(colors['primary'])
+    bp['boxes'][0].set_alpha(0.7)
+    bp['medians'][0].set_color('red')
+    bp['medians'][0].set_linewidth(2)
+
+    ax.set_xlabel(col, fontsize=11)
+    ax.set_title(f'Box Plot of {col}', fontsize=13, fontweight='bold')
+    ax.grid(True, alpha=0.3)
+
+    Q1 = data.quantile(0.25)
+    Q3 = data.quantile(0.75)
+    IQR = Q3 - Q1
+    stats_box(ax, f"Q1: {Q1:.2f}\n"
+                  f"Median: {data.median():.2f}\n"
+                  f"Q3: {Q3:.2f}\n"
+                  f"IQR: {IQR:.2f}\n"
+                  f"N: {len(data):,}")
+    return ChartFigure(figure)
+
+
+def build_scatter(df, x_col, y_col, colors, schedule=None):
+    """Above DENSITY_SCATTER_ROWS the points are drawn as a zoomable density image"""
+    figure, ax = new_figure()
+
+    x = y = None
+    if len(df) > DENSITY_SCATTER_ROWS:
+        x = numeric_values(df[x_col])
+        y = numeric_values(df[y_col])
+
+    density = None
+    if x is not None and y is not None:
+        density = DensityScatter(ax, x, y, schedule=schedule)
+        figure.colorbar(density.image, ax=ax, label="Points per cell")
+        title = f'Scatter Plot: {x_col} vs {y_col} (density of {density.n_points:,} points)'
+    else:
+        ax.scatter(df[x_col], df[y_col],
+                   alpha=0.6, color=colors['primary'], edgecolors='white')
+        title = f'Scatter Plot: {x_col} vs {y_col}'
+
+    ax.set_xlabel(f"{x_col} (X-Axis)", fontsize=11)
+    ax.set_ylabel(f"{y_col} (Y-Axis)", fontsize=11)
+    ax.set_title(title, fontsize=13, fontweight='bold')
+    ax.grid(True, alpha=0.3)
+    return ChartFigure(figure, density)
+
+
+def build_line_chart(df, x_col, y_col, colors, target_points):
+    """The whole series is drawn, downsampled (min/max + LTTB) to about target_points"""
+    figure, ax = new_figure()
+
+    index = numeric_values(df.index.to_series())
+    if index is None:
+        index = np.arange(len(df), dtype="float64")
+
+    lines = [(x_col, 'o', f"{x_col} (X)", colors['primary'])]
+    if y_col:
+        lines.append((y_col, 's', f"{y_col} (Y)", colors['accent']))
+
+    plotted = 0
+    shown_points = 0
+    for col, marker, label, color in lines:
+        values = numeric_values(df[col])
+        if values is None:
+            continue
+        xs, ys = downsample_line(index, values, target_points)
+        ax.plot(xs, ys, marker=marker if len(xs) <= LINE_MARKER_POINTS else None,
+                linewidth=2 if len(xs) <= LINE_MARKER_POINTS else 1, label=label, color=color)
+        plotted += 1
+        shown_points = max(shown_points, len(xs))
+
+    if not plotted:
+        raise ChartError("Invalid Column", "Line chart requires numeric columns.")
+
+    title = f'Line Chart: {x_col} vs {y_col}' if y_col else f'Line Chart: {x_col}'
+    if shown_points < len(df):
+        title += f' ({len(df):,} rows, {shown_points:,} points drawn)'
+    if y_col:
+        ax.legend()
+
+    ax.set_xlabel('Index (X-Axis)', fontsize=11)
+    ax.set_ylabel('Value (Y-Axis)', fontsize=11)
+    ax.set_title(title, fontsize=13, fontweight='bold')
+    ax.grid(True, alpha=0.3)
+    return ChartFigure(figure)
+
+
+def build_bar_chart(df, col, colors):
+    top_values = df[col].value_counts().head(10)
+
+    figure, ax = new_figure()
+    bar_colors = colormaps["Set3"](np.linspace(0, 1, len(top_values)))
+    bars = ax.bar(range(len(top_values)), top_values.values, color=bar_colors, edgecolor='white')
+
+    ax.set_xlabel(col, fontsize=11)
+    ax.set_ylabel('Count', fontsize=11)
+    ax.set_title(f'Bar Chart: Top 10 Values in {col}', fontsize=13, fontweight='bold')
+    ax.set_xticks(range(len(top_values)))
+    ax.set_xticklabels(top_values.index, rotation=45, ha='right')
+    ax.grid(True, alpha=0.3, axis='y')
+
+    # Add value labels on bars
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
+                f'{int(height)}', ha='center', va='bottom', fontsize=9)
+    return ChartFigure(figure)
+
+
+def build_pie_chart(df, col, colors):
+    value_counts = df[col].value_counts().head(6)  # Top 6 categories
+
+    figure, ax = new_figure((8, 8))
+    pie_colors = colormaps["Pastel1"](np.linspace(0, 1, len(value_counts)))
+    ax.pie(value_counts.values,
+           labels=value_counts.index,
+           autopct='%1.1f%%',
+           colors=pie_colors,
+           startangle=90,
+           textprops={'fontsize': 10})
+
+    ax.set_title(f'Pie Chart: Distribution of {col}', fontsize=13, fontweight='bold')
+    ax.axis('equal')  # Make the pie chart circular
+    return ChartFigure(figure)
+
+
+def build_correlation_heatmap(corr, title):
+    """
+    Correlation heatmap; small matrices are drawn by seaborn with every
+    value written in, large ones as a plain image without per-cell artists.
+    """
+    n_cols = len(corr)
+    figure, ax = new_figure((9, 8))
+    if n_cols <= HEATMAP_LABELED_COLUMNS:
+        sns.heatmap(corr, ax=ax, cmap="coolwarm", vmin=-1, vmax=1, center=0, square=True,
+                    annot=n_cols <= HEATMAP_ANNOTATED_COLUMNS, fmt=".2f",
+                    annot_kws={"fontsize": 8}, xticklabels=True, yticklabels=True,
+                    cbar_kws={"label": "Correlation", "shrink": 0.8})
+        ax.tick_params(labelsize=8 if n_cols <= 40 else 6)
+    else:
+        image = ax.imshow(corr.to_numpy(), cmap="coolwarm", vmin=-1, vmax=1,
+                          interpolation="nearest")
+        figure.colorbar(image, ax=ax, label="Correlation", shrink=0.8)
+        ax.set_xlabel(f"{n_cols:,} columns")
+    ax.set_title(title, fontsize=13, fontweight='bold')
+    figure.tight_layout()
+    return ChartFigure(figure)
@@ -0,0 +1,177 @@
+"""
+Correlation matrices for wide frames. Rows are streamed through in blocks,
+accumulating the cross-product sums of all numeric columns, so the frame is
+never copied into one big float matrix; missing values are handled pairwise
+like DataFrame.corr().
+"""
+import numpy as np
+import pandas as pd
+
+METHODS = ("pearson", "spearman")
+# Size of one block of rows converted to float64 at a time
+BLOCK_BYTES = 32 * 1024 ** 2
+
+
+def correlation_positions(df):
+    """Positions of the numeric (and boolean) columns"""
+    return [i for i, dtype in enumerate(df.dtypes)
+            if pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(dtype)]
+
+
+def column_block(df, positions, start, stop):
+    return df.iloc[start:stop, positions].to_numpy(dtype="float64", na_value=np.nan)
+
+
+def rank_columns(df, positions):
+    """
+    Average ranks of every column (missing values stay missing). Unlike the
+    block-wise Pearson pass this needs all ranks at once; they are kept as
+    float32 while that represents them exactly, half the size of the data.
+    """
+    dtype = "float32" if len(df) < 2 ** 23 else "float64"
+    ranks = np.empty((len(df), len(positions)), dtype=dtype)
+    for i, position in enumerate(positions):
+        ranks[:, i] = df.iloc[:, position].rank().to_numpy(dtype="float64", na_value=np.nan)
+    return ranks
+
+
+def correlation_matrix(df, method="pearson", job=None):
+    """
+    Pearson or Spearman correlation of every numeric column, as a DataFrame.
+    Spearman is Pearson over each column's ranks; with missing values the
+    ranks are taken over each column's own values rather than pairwise.
+    job.check_cancelled() is called between blocks when a job is given.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown correlation method: {method}")
+    positions = correlation_positions(df)
+    columns = df.columns[positions]
+    n_rows, n_cols = len(df), len(positions)
+
+    if method == "spearman":
+        ranks = rank_columns(df, positions)
+        get_block = lambda start, stop: ranks[start:stop].astype("float64")
+    else:
+        get_block = lambda start, stop: column_block(df, positions, start, stop)
+
+    # First pass: column means and which columns have missing values.
+    # Centering keeps the sums small, which avoids cancellation in the final formula.
+    sums = np.zeros(n_cols)
+    counts = np.zeros(n_cols)
+    block_rows = max(1024, BLOCK_BYTES // (8 * max(n_cols, 1)))
+    for start in range(0, n_rows, block_rows):
+        block = get_block(start, start + block_rows)
+        valid = ~np.isnan(block)
+        sums += np.where(valid, block, 0.0).sum(axis=0)
+        counts += valid.sum(axis=0)
+        if job is not None:
+            job.check_cancelled()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.nan_to_num(sums / counts)
+    # Only pairs involving a column with missing values need sums over their
+    # shared rows; every other pair uses all rows
+    gaps = np.flatnonzero(counts < n_rows)
+
+    cross = np.zeros((n_cols, n_cols))
+    sums = np.zeros(n_cols)
+    squares = np.zeros(n_cols)
+    gap_counts = np.zeros((n_cols, len(gaps)))
+    gap_sums = np.zeros((n_cols, len(gaps)))
+    gap_squares = np.zeros((n_cols, len(gaps)))
+    for start in range(0, n_rows, block_rows):
+        block = get_block(start, start + block_rows) - means
+        if len(gaps):
+            valid = ~np.isnan(block)
+            block[~valid] = 0.0
+            gap_valid = valid[:, gaps].astype("float64")
+            gap_counts += valid.T.astype("float64") @ gap_valid
+            gap_sums += block.T @ gap_valid
+            gap_squares += (block * block).T @ gap_valid
+        sums += block.sum(axis=0)
+        squares += (block * block).sum(axis=0)
+        cross += block.T @ block
+        if job is not None:
+            job.check_cancelled()
+
+    # pair_sums[i, j] is the sum of column i over the rows where column j is present
+    pair_counts = np.broadcast_to(counts[:, None], (n_cols, n_cols)).copy()
+    pair_sums = np.broadcast_to(sums[:, None], (n_cols, n_cols)).copy()
+    pair_squares = np.broadcast_to(squares[:, None], (n_cols, n_cols)).copy()
+    pair_counts[:, gaps] = gap_counts
+    pair_sums[:, gaps] = gap_sums
+    pair_squares[:, gaps] = gap_squares
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        n = pair_counts
+        covariance = n * cross - pair_sums * pair_sums.T
+        variance = n * pair_squares - pair_sums * pair_sums
+        corr = covariance / np.sqrt(variance * variance.T)
+    corr[n < 2] = np.nan
+    corr = np.clip(corr, -1.0, 1.0)
+    # Rounding leaves the diagonal a hair off 1 for columns that vary at all
+    diagonal = np.diag(corr).copy()
+    np.fill_diagonal(corr, np.where(np.isnan(diagonal), np.nan, 1.0))
+    return pd.DataFrame(corr, index=columns, columns=columns)
+
+
+def cluster_order(corr):
+    """
+    Column order that puts correlated columns next to each other: the leaf
+    order of average-linkage clustering on 1 - |r|. Each row's nearest
+    cluster is tracked so a merge only rescans the rows it affected.
+    """
+    n = len(corr)
+    if n < 3:
+        return np.arange(n)
+
+    distance = 1.0 - np.abs(np.nan_to_num(np.asarray(corr, dtype="float64")))
+    np.fill_diagonal(distance, np.inf)
+    sizes = np.ones(n)
+    members = [[i] for i in range(n)]
+    nearest = distance.argmin(axis=1)
+    nearest_distance = distance[np.arange(n), nearest]
+
+    for _ in range(n - 1):
+        i = int(nearest_distance.argmin())
+        j = int(nearest[i])
+        if i > j:
+            i, j = j, i
+        # Cluster j joins i; the distance to every other cluster is the size-weighted average
+        merged = (distance[i] * sizes[i] + distance[j] * sizes[j]) / (sizes[i] + sizes[j])
+        merged[[i, j]] = np.inf
+        distance[i, :] = distance[:, i] = merged
+        distance[j, :] = distance[:, j] = np.inf
+        sizes[i] += sizes[j]
+        members[i] += members[j]
+        members[j] = []
+        nearest_distance[j] = np.inf
+
+        stale = np.flatnonzero((nearest == i) | (nearest == j))
+        for k in np.append(stale, i):
+            if k == j:
+                continue
+            nearest[k] = distance[k].argmin()
+            nearest_distance[k] = distance[k, nearest[k]]
+        closer = merged < nearest_distance
+        nearest[closer] = i
+        nearest_distance[closer] = merged[closer]
+    return np.array(max(members, key=len))
+
+
+def top_pairs(corr, n=20):
+    """The n column pairs with the strongest correlation (by absolute value)"""
+    values = np.asarray(corr, dtype="float64")
+    rows, cols = np.triu_indices(len(values), k=1)
+    pair_values = values[rows, cols]
+    strength = np.nan_to_num(np.abs(pair_values), nan=-1.0)
+    n = min(n, len(strength))
+    if n == 0:
+        return pd.DataFrame(columns=["column_a", "column_b", "correlation"])
+    top = np.argpartition(-strength, n - 1)[:n]
+    top = top[np.argsort(-strength[top], kind="stable")]
+    top = top[strength[top] >= 0]
+    return pd.DataFrame({
+        "column_a": corr.index[rows[top]],
+        "column_b": corr.columns[cols[top]],
+        "correlation": pair_values[top],
+    })
@@ -0,0 +1,126 @@
+"""Virtualized table widget that only renders the rows currently on screen"""
+import tkinter as tk
+from tkinter import ttk
+
+import pandas as pd
+
+
+class VirtualGrid(tk.Frame):
+    """
+    A ttk.Treeview holding a fixed number of item rows that are refilled
+    from a DataFrame slice whenever the user scrolls. Memory use and redraw
+    time depend on the window height, not on the number of rows in the data.
+    """
+
+    def __init__(self, parent, height=15, column_width=120, show_row_numbers=True, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.df = None
+        self.offset = 0
+        self.visible_rows = height
+        self.column_width = column_width
+        self.show_row_numbers = show_row_numbers
+
+        self.h_scrollbar = ttk.Scrollbar(self, orient="horizontal")
+        self.v_scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.on_scrollbar)
+
+        self.tree = ttk.Treeview(
+            self,
+            show="headings",
+            xscrollcommand=self.h_scrollbar.set,
+            height=height
+        )
+        self.h_scrollbar.config(command=self.tree.xview)
+
+        self.h_scrollbar.pack(side="bottom", fill="x")
+        self.v_scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+
+        # Mouse wheel (Windows/macOS use <MouseWheel>, X11 uses buttons 4 and 5)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll_by(-1 if e.delta > 0 else 1, "units"))
+        self.tree.bind("<Button-4>", lambda e: self.scroll_by(-1, "units"))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_by(1, "units"))
+        self.tree.bind("<Prior>", lambda e: self.scroll_by(-1, "pages"))
+        self.tree.bind("<Next>", lambda e: self.scroll_by(1, "pages"))
+        self.tree.bind("<Home>", lambda e: self.scroll_to(0))
+        self.tree.bind("<End>", lambda e: self.scroll_to(self.row_count()))
+        self.tree.bind("<Configure>", self.on_resize)
+
+    def row_count(self):
+        return 0 if self.df is None else len(self.df)
+
+    def set_data(self, df, keep_position=False):
+        """Show a new DataFrame; only the visible window is ever read from it"""
+        columns_changed = self.df is None or list(self.df.columns) != list(df.columns)
+        self.df = df
+        if not keep_position:
+            self.offset = 0
+
+        if columns_changed:
+            columns = list(df.columns)
+            if self.show_row_numbers:
+                columns = ["#"] + columns
+            # Treeview column ids must be strings, headings show the real names
+            self.tree["columns"] = [str(i) for i in range(len(columns))]
+            for i, col in enumerate(columns):
+                self.tree.heading(str(i), text=str(col))
+                width = 70 if self.show_row_numbers and i == 0 else self.column_width
+                self.tree.column(str(i), width=width, anchor="center", minwidth=50, stretch=False)
+
+        self.render()
+
+    def on_resize(self, event):
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        # Leave room for the heading row
+        rows = max(1, (event.height - row_height) // row_height)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.render()
+
+    def on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * self.row_count()))
+        elif args[0] == "scroll":
+            self.scroll_by(int(args[1]), args[2])
+
+    def scroll_by(self, amount, what="units"):
+        step = self.visible_rows if what == "pages" else 3
+        self.scroll_to(self.offset + amount * step)
+        return "break"
+
+    def scroll_to(self, offset):
+        max_offset = max(0, self.row_count() - self.visible_rows)
+        offset = min(max(0, int(offset)), max_offset)
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+        return "break"
+
+    def render(self):
+        """Refill the item rows from the visible slice of the DataFrame"""
+        total = self.row_count()
+        self.offset = min(self.offset, max(0, total - self.visible_rows))
+        window = self.df.iloc[self.offset:self.offset + self.visible_rows] if total else None
+
+        rows = []
+        if window is not None:
+            for position, values in enumerate(window.itertuples(index=False, name=None)):
+                values = ["" if pd.isna(value) else value for value in values]
+                if self.show_row_numbers:
+                    values = [f"{self.offset + position + 1:,}"] + values
+                rows.append(values)
+
+        # Reuse existing items so scrolling does not create or destroy widgets
+        items = self.tree.get_children()
+        for i, values in enumerate(rows):
+            if i < len(items):
+                self.tree.item(items[i], values=values)
+            else:
+                self.tree.insert("", "end", values=values)
+        if len(items) > len(rows):
+            self.tree.delete(*items[len(rows):])
+
+        if total:
+            self.v_scrollbar.set(self.offset / total,
+                                 min(1.0, (self.offset + len(rows)) / total))
+        else:
+            self.v_scrollbar.set(0, 1)
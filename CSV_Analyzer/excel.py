@@ -0,0 +1,179 @@
+"""
+Streaming Excel support on openpyxl: read-only workbooks are parsed a block
+of rows at a time, and exports go through a write-only workbook that streams
+rows to disk instead of building every cell in memory.
+"""
+import os
+
+import pandas as pd
+
+from loader import LoadCancelled
+
+try:
+    import openpyxl
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+# Workbooks openpyxl can stream; legacy .xls goes through pandas and xlrd instead
+STREAMING_SUFFIXES = (".xlsx", ".xlsm")
+EXCEL_SUFFIXES = STREAMING_SUFFIXES + (".xls",)
+# Rows per sheet in the xlsx format, the header included
+MAX_SHEET_ROWS = 1_048_576
+DEFAULT_CHUNKSIZE = 50_000
+
+
+class ExcelError(Exception):
+    """The workbook cannot be read or written as asked"""
+
+
+def is_excel_file(path):
+    return path.lower().endswith(EXCEL_SUFFIXES)
+
+
+def require_openpyxl():
+    if not OPENPYXL_AVAILABLE:
+        raise ExcelError("Excel support needs the openpyxl package (pip install openpyxl).")
+
+
+def open_workbook(path):
+    require_openpyxl()
+    try:
+        return openpyxl.load_workbook(path, read_only=True, data_only=True)
+    except Exception as e:
+        raise ExcelError(f"Cannot open {os.path.basename(path)}: {e}") from e
+
+
+def list_sheets(path):
+    """[(sheet name, data rows)] in workbook order; rows is None when the file does not say"""
+    if not path.lower().endswith(STREAMING_SUFFIXES):
+        with pd.ExcelFile(path) as workbook:
+            return [(name, None) for name in workbook.sheet_names]
+
+    workbook = open_workbook(path)
+    try:
+        sheets = []
+        for sheet in workbook.worksheets:
+            rows = sheet.max_row
+            sheets.append((sheet.title, None if rows is None else max(rows - 1, 0)))
+        return sheets
+    finally:
+        workbook.close()
+
+
+def header_names(values):
+    """Column names from the header row, named and deduplicated the way read_csv does"""
+    names = []
+    seen = {}
+    for i, value in enumerate(values):
+        name = f"Unnamed: {i}" if value is None or value == "" else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def read_excel_chunks(path, sheet=None, first_row=1, last_row=None,
+                      chunksize=DEFAULT_CHUNKSIZE, cancel_event=None):
+    """
+    Yield (chunk, rows_read, total_rows) while streaming one sheet. The first
+    sheet row is the header; first_row and last_row count data rows from 1
+    (inclusive), last_row None meaning the end of the sheet. Blank rows are
+    skipped. total_rows is the number of rows in the range, or None when the
+    workbook does not record the sheet size.
+    """
+    workbook = open_workbook(path)
+    try:
+        worksheet = workbook[sheet] if sheet is not None else workbook.worksheets[0]
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        # Trailing unnamed header cells are usually formatting, not data
+        width = len(header)
+        while width and header[width - 1] in (None, ""):
+            width -= 1
+        columns = header_names(header[:width])
+
+        max_row = worksheet.max_row
+        end = last_row if last_row is not None else (max_row - 1 if max_row else None)
+        total_rows = None if end is None else max(end - first_row + 1, 0)
+
+        rows = worksheet.iter_rows(min_row=first_row + 1,
+                                   max_row=None if last_row is None else last_row + 1,
+                                   max_col=width, values_only=True)
+        block = []
+        rows_read = 0
+        for row in rows:
+            rows_read += 1
+            if any(value is not None for value in row):
+                block.append(row)
+            if len(block) == chunksize:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise LoadCancelled(f"Loading of {os.path.basename(path)} was cancelled")
+                yield pd.DataFrame.from_records(block, columns=columns), rows_read, total_rows
+                block = []
+        if block or rows_read == 0:
+            yield pd.DataFrame.from_records(block, columns=columns), rows_read, total_rows
+    finally:
+        workbook.close()
+
+
+def load_excel_streaming(path, sheet=None, first_row=1, last_row=None, on_chunk=None,
+                         cancel_event=None, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Read a sheet chunk by chunk and return the concatenated DataFrame.
+    on_chunk(index, chunk, rows_read, total_rows) is called after every chunk.
+    Legacy .xls files are read in one go with pandas.
+    """
+    if not path.lower().endswith(STREAMING_SUFFIXES):
+        skip = range(1, first_row)
+        nrows = None if last_row is None else max(last_row - first_row + 1, 0)
+        df = pd.read_excel(path, sheet_name=sheet or 0, skiprows=skip, nrows=nrows)
+        if on_chunk is not None:
+            on_chunk(0, df, len(df), len(df))
+        return df
+
+    chunks = []
+    for index, (chunk, rows_read, total_rows) in enumerate(
+            read_excel_chunks(path, sheet, first_row, last_row, chunksize, cancel_event)):
+        chunks.append(chunk)
+        if on_chunk is not None:
+            on_chunk(index, chunk, rows_read, total_rows)
+
+    if not chunks:
+        return pd.DataFrame()
+    if len(chunks) == 1:
+        return chunks[0].infer_objects()
+    return pd.concat(chunks, ignore_index=True).infer_objects()
+
+
+def excel_rows(block):
+    """Rows of a frame as cell values openpyxl accepts (missing values as empty cells)"""
+    block = block.copy()
+    for col in block.columns:
+        series = block[col]
+        if isinstance(series.dtype, pd.DatetimeTZDtype):
+            # Excel has no time zones
+            block[col] = series.dt.tz_localize(None)
+    values = block.astype(object).where(block.notna(), None)
+    return values.itertuples(index=False, name=None)
+
+
+def write_excel(path, columns, blocks, sheet_name="Sheet1"):
+    """
+    Write a header and then the rows of every frame in blocks to a new
+    workbook. The write-only workbook streams rows to disk as they are
+    appended, so memory stays flat however many rows are written.
+    """
+    require_openpyxl()
+    workbook = openpyxl.Workbook(write_only=True)
+    worksheet = workbook.create_sheet(sheet_name)
+    worksheet.append([str(col) for col in columns])
+    for block in blocks:
+        for row in excel_rows(block):
+            worksheet.append(row)
+    workbook.save(path)
@@ -0,0 +1,146 @@
+"""
+Chunked export of DataFrames. Rows are converted and written a block at a
+time, so an export needs about one block of extra memory whatever the size
+of the frame, and can report progress and stop between blocks.
+"""
+import bz2
+import gzip
+import lzma
+import os
+
+from excel import MAX_SHEET_ROWS, write_excel
+
+# Rows converted per block; large frames get fewer rows per block when they are wide
+DEFAULT_BLOCK_ROWS = 100_000
+BLOCK_BYTES = 64 * 1024 ** 2
+
+COMPRESSION_OPENERS = {"gz": gzip.open, "bz2": bz2.open, "xz": lzma.open}
+# Suffix -> (format, compression). Dates are written as ISO 8601 text in both JSON formats.
+EXPORT_SUFFIXES = {
+    ".csv": ("csv", None),
+    ".csv.gz": ("csv", "gz"),
+    ".csv.bz2": ("csv", "bz2"),
+    ".csv.xz": ("csv", "xz"),
+    ".ndjson": ("ndjson", None),
+    ".jsonl": ("ndjson", None),
+    ".ndjson.gz": ("ndjson", "gz"),
+    ".jsonl.gz": ("ndjson", "gz"),
+    ".json": ("json", None),
+    ".xlsx": ("xlsx", None),
+}
+FILE_TYPE_NAMES = {"csv": "CSV", "ndjson": "NDJSON", "json": "JSON", "xlsx": "Excel"}
+
+
+class ExportCancelled(Exception):
+    """Raised when the user cancels an export"""
+
+
+def export_format(path):
+    """(format, compression) for a path, by its longest matching suffix; unknown suffixes write CSV"""
+    lower = path.lower()
+    for suffix in sorted(EXPORT_SUFFIXES, key=len, reverse=True):
+        if lower.endswith(suffix):
+            return EXPORT_SUFFIXES[suffix]
+    return "csv", None
+
+
+def describe_format(path):
+    file_format, compression = export_format(path)
+    name = FILE_TYPE_NAMES[file_format]
+    return f"{name} ({compression})" if compression else name
+
+
+def block_rows(df):
+    """Rows per block so that one block stays around BLOCK_BYTES in memory"""
+    if len(df) == 0 or df.shape[1] == 0:
+        return DEFAULT_BLOCK_ROWS
+    row_bytes = df.memory_usage(index=False, deep=False).sum() / len(df)
+    # Text is several times larger once formatted, so leave room for it
+    return int(max(1_000, min(DEFAULT_BLOCK_ROWS, BLOCK_BYTES // max(4 * row_bytes, 1))))
+
+
+def open_text(path, compression):
+    if compression is None:
+        return open(path, "w", encoding="utf-8", newline="")
+    return COMPRESSION_OPENERS[compression](path, "wt", encoding="utf-8", newline="")
+
+
+def iter_blocks(df, rows, cancel_event=None):
+    for start in range(0, len(df), rows):
+        if cancel_event is not None and cancel_event.is_set():
+            raise ExportCancelled("Export was cancelled")
+        yield start, df.iloc[start:start + rows]
+
+
+def write_csv(df, handle, rows, on_block, cancel_event):
+    df.iloc[:0].to_csv(handle, index=False)
+    for start, block in iter_blocks(df, rows, cancel_event):
+        block.to_csv(handle, index=False, header=False)
+        on_block(start + len(block))
+
+
+def write_ndjson(df, handle, rows, on_block, cancel_event):
+    for start, block in iter_blocks(df, rows, cancel_event):
+        text = block.to_json(orient="records", lines=True, date_format="iso")
+        handle.write(text if text.endswith("\n") else text + "\n")
+        on_block(start + len(block))
+
+
+def write_json(df, handle, rows, on_block, cancel_event):
+    """One JSON array of records, as DataFrame.to_json(orient='records') writes it"""
+    handle.write("[")
+    for start, block in iter_blocks(df, rows, cancel_event):
+        if start:
+            handle.write(",")
+        # Each block is an array of its own; only its elements go into the file
+        handle.write(block.to_json(orient="records", date_format="iso")[1:-1])
+        on_block(start + len(block))
+    handle.write("]")
+
+
+def write_xlsx(df, path, rows, on_block, cancel_event):
+    if len(df) >= MAX_SHEET_ROWS:
+        raise ValueError(f"{len(df):,} rows do not fit in an Excel sheet "
+                         f"(at most {MAX_SHEET_ROWS - 1:,}); export as CSV instead.")
+
+    def blocks():
+        for start, block in iter_blocks(df, rows, cancel_event):
+            yield block
+            on_block(start + len(block))
+
+    write_excel(path, df.columns, blocks())
+
+
+TEXT_WRITERS = {"csv": write_csv, "ndjson": write_ndjson, "json": write_json}
+
+
+def export_frame(df, path, on_progress=None, cancel_event=None, rows=None):
+    """
+    Write df to path in the format its suffix names (see EXPORT_SUFFIXES).
+    on_progress(rows_written, total_rows) is called after every block. The
+    data goes to a temporary file that replaces path only once complete, so
+    a cancelled or failed export leaves no partial file behind.
+    """
+    file_format, compression = export_format(path)
+    rows = rows or block_rows(df)
+    total = len(df)
+
+    def on_block(written):
+        if on_progress is not None:
+            on_progress(written, total)
+
+    # Keep the real suffix last so the partial file is still recognizably Excel
+    root, ext = os.path.splitext(path)
+    temp_path = f"{root}.partial{ext}" if file_format == "xlsx" else f"{path}.partial"
+    try:
+        if file_format == "xlsx":
+            write_xlsx(df, temp_path, rows, on_block, cancel_event)
+        else:
+            with open_text(temp_path, compression) as handle:
+                TEXT_WRITERS[file_format](df, handle, rows, on_block, cancel_event)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return file_format
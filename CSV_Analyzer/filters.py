@@ -0,0 +1,402 @@
+"""
+Row filters for the cleaned dataset, answered from per-column indexes.
+
+A filter is a list of column predicates joined with "and" (or ";"):
+
+    price >= 10 and price < 20
+    10 <= price < 20
+    age between 30 and 40
+    city == "New York"          city != Paris
+    city in (Paris, "New York")  city not in (Rome)
+    name contains smith         (case-insensitive)
+    email is null               email is not null
+
+Column names with spaces go in backticks: `unit price` > 5. As in pandas,
+negated predicates (!=, not in, not contains) keep missing values; add
+"and x is not null" to drop them.
+"""
+import re
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Categorical columns with at most this many distinct values keep one packed
+# bitmap per value, so IN lists are answered by OR-ing bitmaps
+MAX_BITMAP_CODES = 1024
+# IN lists longer than this are matched with np.isin on the codes instead
+MAX_BITMAP_VALUES = 32
+
+TOKEN = re.compile(r"""\s*(?:
+    (?P<name>`[^`]+`) |
+    (?P<string>"[^"]*"|'[^']*') |
+    (?P<op><=|>=|==|!=|<|>|=) |
+    (?P<punct>[(),;]) |
+    (?P<word>[^\s(),;<>=!"'`]+)
+)""", re.VERBOSE)
+
+
+class FilterError(Exception):
+    """The filter text cannot be parsed or does not fit the data"""
+
+
+class Literal:
+    """A value as typed: the text for text columns, the number for numeric ones"""
+
+    def __init__(self, text, quoted=False):
+        self.text = text
+        self.number = None
+        if not quoted:
+            try:
+                self.number = float(text)
+            except ValueError:
+                pass
+
+    def __repr__(self):
+        return repr(self.text)
+
+
+class Predicate:
+    """
+    One column condition. kind is "range" (low/high bounds, either may be
+    None), "in" (values), "contains" (values[0]) or "null"; negate inverts it.
+    """
+
+    def __init__(self, column, kind, values=(), low=None, high=None,
+                 low_inclusive=True, high_inclusive=True, negate=False):
+        self.column = column
+        self.kind = kind
+        self.values = list(values)
+        self.low = low
+        self.high = high
+        self.low_inclusive = low_inclusive
+        self.high_inclusive = high_inclusive
+        self.negate = negate
+
+    def describe(self):
+        col = self.column
+        if self.kind == "null":
+            return f"{col} is {'not ' if self.negate else ''}null"
+        if self.kind == "contains":
+            return f"{col} {'not ' if self.negate else ''}contains {self.values[0].text!r}"
+        if self.kind == "in":
+            values = ", ".join(repr(value.text) for value in self.values)
+            return f"{col} {'not ' if self.negate else ''}in ({values})"
+        parts = []
+        if self.low is not None:
+            parts.append(f"{self.low.text} {'<=' if self.low_inclusive else '<'}")
+        parts.append(col)
+        if self.high is not None:
+            parts.append(f"{'<=' if self.high_inclusive else '<'} {self.high.text}")
+        return ("not " if self.negate else "") + " ".join(parts)
+
+
+def tokenize(text):
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if match is None or match.end() == position:
+            raise FilterError(f"Cannot read the filter at: {text[position:position + 20]!r}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind in ("name", "string"):
+            value = value[1:-1]
+        tokens.append((kind, value))
+        position = match.end()
+    return tokens
+
+
+class Parser:
+    def __init__(self, text):
+        self.tokens = tokenize(text)
+        self.position = 0
+
+    def peek(self, offset=0):
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def next(self):
+        token = self.peek()
+        if token[0] is None:
+            raise FilterError("The filter ends too early")
+        self.position += 1
+        return token
+
+    def keyword(self, word, offset=0):
+        kind, value = self.peek(offset)
+        return kind == "word" and value.lower() == word
+
+    def expect_keyword(self, word):
+        if not self.keyword(word):
+            raise FilterError(f"Expected '{word}' after {self.tokens[self.position - 1][1]!r}")
+        self.position += 1
+
+    def column(self):
+        kind, value = self.next()
+        if kind not in ("name", "word"):
+            raise FilterError(f"Expected a column name, found {value!r}")
+        return value
+
+    def literal(self):
+        kind, value = self.next()
+        if kind not in ("string", "word"):
+            raise FilterError(f"Expected a value, found {value!r}")
+        return Literal(value, quoted=kind == "string")
+
+    def comparison(self):
+        kind, value = self.next()
+        if kind != "op":
+            raise FilterError(f"Expected a comparison, found {value!r}")
+        return value
+
+    def parse(self):
+        predicates = []
+        while self.peek()[0] is not None:
+            predicates.append(self.clause())
+            if self.peek()[0] is None:
+                break
+            if self.peek() == ("punct", ";") or self.keyword("and"):
+                self.position += 1
+            else:
+                raise FilterError(f"Expected 'and' between conditions, found {self.peek()[1]!r}")
+        return predicates
+
+    def clause(self):
+        # Chained range: 10 <= price < 20
+        if self.peek(1)[0] == "op" and self.peek()[0] in ("word", "string") \
+                and self.peek(3)[0] == "op":
+            low = self.literal()
+            low_op = self.comparison()
+            column = self.column()
+            high_op = self.comparison()
+            high = self.literal()
+            if low_op not in ("<", "<=") or high_op not in ("<", "<="):
+                raise FilterError("A range needs the form: low < column < high")
+            return Predicate(column, "range", low=low, high=high,
+                             low_inclusive=low_op == "<=", high_inclusive=high_op == "<=")
+
+        column = self.column()
+        if self.peek()[0] == "op":
+            return self.compare(column, self.comparison(), self.literal())
+
+        negate = False
+        if self.keyword("not"):
+            negate = True
+            self.position += 1
+        if self.keyword("in"):
+            self.position += 1
+            return Predicate(column, "in", self.value_list(), negate=negate)
+        if self.keyword("contains"):
+            self.position += 1
+            return Predicate(column, "contains", [self.literal()], negate=negate)
+        if self.keyword("between"):
+            self.position += 1
+            low = self.literal()
+            self.expect_keyword("and")
+            return Predicate(column, "range", low=low, high=self.literal(), negate=negate)
+        if not negate and self.keyword("is"):
+            self.position += 1
+            if self.keyword("not"):
+                negate = True
+                self.position += 1
+            self.expect_keyword("null")
+            return Predicate(column, "null", negate=negate)
+        raise FilterError(f"Expected a condition after column {column!r}")
+
+    def compare(self, column, op, value):
+        if op in ("=", "=="):
+            return Predicate(column, "in", [value])
+        if op == "!=":
+            return Predicate(column, "in", [value], negate=True)
+        if op in ("<", "<="):
+            return Predicate(column, "range", high=value, high_inclusive=op == "<=")
+        return Predicate(column, "range", low=value, low_inclusive=op == ">=")
+
+    def value_list(self):
+        kind, value = self.next()
+        if (kind, value) != ("punct", "("):
+            raise FilterError("Expected '(' to start a value list")
+        values = [self.literal()]
+        while self.peek() == ("punct", ","):
+            self.position += 1
+            values.append(self.literal())
+        kind, value = self.next()
+        if (kind, value) != ("punct", ")"):
+            raise FilterError("Expected ')' to close the value list")
+        return values
+
+
+def parse_filter(text):
+    """Predicates for a filter string; an empty string means no filter"""
+    return Parser(text).parse()
+
+
+def is_numeric_column(series):
+    return ((pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series))
+            or pd.api.types.is_datetime64_any_dtype(series))
+
+
+class NumericIndex:
+    """
+    Row positions sorted by value. A range is two binary searches plus one
+    scatter of the matching positions into a mask.
+    """
+
+    def __init__(self, series):
+        self.datetime = pd.api.types.is_datetime64_any_dtype(series)
+        if self.datetime:
+            values = series.to_numpy(dtype="datetime64[ns]")
+            valid = ~np.isnat(values)
+            values = values.view("int64").astype("float64")
+        else:
+            values = series.to_numpy(dtype="float64", na_value=np.nan)
+            valid = ~np.isnan(values)
+        self.n_rows = len(values)
+        self.null_positions = np.flatnonzero(~valid)
+        positions = np.flatnonzero(valid)
+        order = np.argsort(values[positions], kind="stable")
+        self.order = positions[order]
+        self.sorted = values[self.order]
+
+    def value(self, literal, column):
+        if self.datetime:
+            try:
+                return float(pd.Timestamp(literal.text).value)
+            except ValueError:
+                raise FilterError(f"'{column}' holds dates; {literal.text!r} is not a date")
+        if literal.number is None:
+            raise FilterError(f"'{column}' is numeric; {literal.text!r} is not a number")
+        return literal.number
+
+    def positions_mask(self, start, stop):
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[self.order[start:stop]] = True
+        return mask
+
+    def range_mask(self, predicate):
+        start, stop = 0, len(self.sorted)
+        if predicate.low is not None:
+            side = "left" if predicate.low_inclusive else "right"
+            start = np.searchsorted(self.sorted, self.value(predicate.low, predicate.column), side)
+        if predicate.high is not None:
+            side = "right" if predicate.high_inclusive else "left"
+            stop = np.searchsorted(self.sorted, self.value(predicate.high, predicate.column), side)
+        return self.positions_mask(start, max(start, stop))
+
+    def in_mask(self, predicate):
+        mask = np.zeros(self.n_rows, dtype=bool)
+        for literal in predicate.values:
+            value = self.value(literal, predicate.column)
+            start = np.searchsorted(self.sorted, value, "left")
+            stop = np.searchsorted(self.sorted, value, "right")
+            mask[self.order[start:stop]] = True
+        return mask
+
+    def contains_mask(self, predicate):
+        raise FilterError(f"'contains' works on text columns; '{predicate.column}' is numeric")
+
+    def null_mask(self):
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[self.null_positions] = True
+        return mask
+
+
+class CategoryIndex:
+    """
+    Text, boolean and categorical columns as integer codes into their
+    distinct values. Conditions are evaluated once per distinct value and
+    mapped back to rows through the codes, or through per-value bitmaps when
+    there are few distinct values.
+    """
+
+    def __init__(self, series):
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        self.n_rows = len(codes)
+        self.codes = codes
+        self.labels = pd.Index(uniques).astype(str)
+        self.bitmaps = {}
+
+    def bitmap(self, code):
+        if code not in self.bitmaps:
+            self.bitmaps[code] = np.packbits(self.codes == code)
+        return self.bitmaps[code]
+
+    def codes_mask(self, selected):
+        if len(self.labels) <= MAX_BITMAP_CODES and len(selected) <= MAX_BITMAP_VALUES:
+            bits = np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+            for code in selected:
+                bits |= self.bitmap(code)
+            return np.unpackbits(bits, count=self.n_rows).astype(bool)
+        return np.isin(self.codes, selected)
+
+    def range_mask(self, predicate):
+        raise FilterError(f"Ranges work on numeric and date columns; '{predicate.column}' is not one")
+
+    def in_mask(self, predicate):
+        texts = [literal.text for literal in predicate.values]
+        return self.codes_mask(np.flatnonzero(self.labels.isin(texts)))
+
+    def contains_mask(self, predicate):
+        matches = self.labels.str.contains(predicate.values[0].text, case=False, regex=False)
+        return self.codes_mask(np.flatnonzero(matches))
+
+    def null_mask(self):
+        return self.codes == -1
+
+
+class FilterEngine:
+    """
+    Answers filters over one version of the cleaned DataFrame. The index of
+    a column is built the first time a filter mentions it and reused by every
+    later filter on the same data; recent filter masks are cached as well.
+    """
+
+    def __init__(self, df, version, max_cached=16):
+        self.df = df
+        self.version = version
+        self.indexes = {}
+        self.max_cached = max_cached
+        self.masks = OrderedDict()
+
+    def index(self, column):
+        if column not in self.df.columns:
+            raise FilterError(f"No column named {column!r}")
+        if column not in self.indexes:
+            series = self.df[column]
+            self.indexes[column] = (NumericIndex(series) if is_numeric_column(series)
+                                    else CategoryIndex(series))
+        return self.indexes[column]
+
+    def predicate_mask(self, predicate):
+        index = self.index(predicate.column)
+        if predicate.kind == "range":
+            mask = index.range_mask(predicate)
+        elif predicate.kind == "in":
+            mask = index.in_mask(predicate)
+        elif predicate.kind == "contains":
+            mask = index.contains_mask(predicate)
+        else:
+            mask = index.null_mask()
+        if predicate.negate:
+            # Missing values match "x != 5" and "x not in (...)", as they do in pandas
+            mask = ~mask
+        return mask
+
+    def mask(self, text):
+        """Boolean row mask for a filter string (None for an empty filter)"""
+        key = " ".join(text.split())
+        if not key:
+            return None
+        if key in self.masks:
+            self.masks.move_to_end(key)
+            return self.masks[key]
+
+        mask = np.ones(len(self.df), dtype=bool)
+        for predicate in parse_filter(key):
+            mask &= self.predicate_mask(predicate)
+        self.masks[key] = mask
+        while len(self.masks) > self.max_cached:
+            self.masks.popitem(last=False)
+        return mask
@@ -0,0 +1,178 @@
+"""Undo/redo history for cleaning steps, stored as compact deltas"""
+import numpy as np
+import pandas as pd
+
+DEFAULT_BUDGET_BYTES = 256 * 1024 * 1024
+
+
+class RowsDropped:
+    """
+    A step that kept only some rows. Holds the keep mask as a packed bitmap
+    plus the dropped rows themselves, so undo can put them back in place.
+    """
+
+    def __init__(self, keep, dropped):
+        self.n_rows = len(keep)
+        self.bits = np.packbits(keep)
+        self.dropped = dropped
+
+    @classmethod
+    def capture(cls, df, keep):
+        keep = np.asarray(keep, dtype=bool)
+        return cls(keep, df[~keep])
+
+    def keep_mask(self):
+        return np.unpackbits(self.bits, count=self.n_rows).astype(bool)
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes + int(self.dropped.memory_usage(deep=True).sum())
+
+    def undo(self, df):
+        keep = self.keep_mask()
+        positions = np.concatenate([np.flatnonzero(keep), np.flatnonzero(~keep)])
+        combined = pd.concat([df, self.dropped])
+        return combined.iloc[np.argsort(positions, kind="stable")]
+
+    def redo(self, df):
+        return df[self.keep_mask()]
+
+
+class CellsChanged:
+    """A step that filled missing cells in one column; only those cells are kept"""
+
+    def __init__(self, column, positions, old_values, new_values, old_dtype, new_dtype):
+        self.column = column
+        self.positions = positions
+        self.old_values = old_values
+        self.new_values = new_values
+        self.old_dtype = old_dtype
+        self.new_dtype = new_dtype
+
+    @classmethod
+    def capture(cls, column, old, new):
+        positions = np.flatnonzero((old.isnull() & new.notna()).to_numpy())
+        return cls(column, positions, old.iloc[positions].to_numpy(),
+                   new.iloc[positions].to_numpy(), old.dtype, new.dtype)
+
+    @property
+    def nbytes(self):
+        return self.positions.nbytes + self.old_values.nbytes + self.new_values.nbytes
+
+    def apply(self, df, values, dtype):
+        # Work on a new frame; the one passed in may still be read elsewhere
+        df = df.copy(deep=False)
+        column = df[self.column]
+        if column.dtype != dtype:
+            column = column.astype(dtype)
+        column = column.copy()
+        column.iloc[self.positions] = values
+        df[self.column] = column
+        return df
+
+    def undo(self, df):
+        return self.apply(df, self.old_values, self.old_dtype)
+
+    def redo(self, df):
+        return self.apply(df, self.new_values, self.new_dtype)
+
+
+class Replaced:
+    """
+    The whole dataset was swapped for another (a replayed pipeline, or any
+    out-of-core step). For a ColumnStore the old store's column files are
+    still on disk, so keeping it costs no memory.
+    """
+
+    def __init__(self, before):
+        self.before = before
+        self.after = None
+
+    @staticmethod
+    def size_of(data):
+        if isinstance(data, pd.DataFrame):
+            return int(data.memory_usage(deep=True).sum())
+        return 0
+
+    @property
+    def nbytes(self):
+        return self.size_of(self.before) + self.size_of(self.after)
+
+    def undo(self, data):
+        self.after = data
+        return self.before
+
+    def redo(self, data):
+        return self.after
+
+
+class HistoryEntry:
+    def __init__(self, label, delta, steps_before):
+        self.label = label
+        self.delta = delta
+        # Recorded pipeline steps on either side of this step
+        self.steps_before = steps_before
+        self.steps_after = None
+
+
+class CleaningHistory:
+    """
+    Undo and redo stacks of cleaning deltas. The total size of all deltas is
+    kept under budget_bytes by forgetting the oldest undo steps first; a
+    single step larger than the whole budget is not kept at all.
+    """
+
+    def __init__(self, budget_bytes=DEFAULT_BUDGET_BYTES):
+        self.budget_bytes = budget_bytes
+        self.undo_stack = []
+        self.redo_stack = []
+
+    @property
+    def nbytes(self):
+        return sum(entry.delta.nbytes for entry in self.undo_stack + self.redo_stack)
+
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def clear(self):
+        self.undo_stack = []
+        self.redo_stack = []
+
+    def push(self, label, delta, steps):
+        """Record a new step; returns False if it was too large to keep"""
+        self.redo_stack = []
+        self.undo_stack.append(HistoryEntry(label, delta, list(steps)))
+        self.trim()
+        return bool(self.undo_stack) and self.undo_stack[-1].delta is delta
+
+    def trim(self):
+        total = self.nbytes
+        while self.undo_stack and total > self.budget_bytes:
+            total -= self.undo_stack.pop(0).delta.nbytes
+
+    def set_budget(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.trim()
+
+    def undo(self, data, steps):
+        """Returns (restored data, pipeline steps before the step, entry) or None"""
+        if not self.undo_stack:
+            return None
+        entry = self.undo_stack.pop()
+        data = entry.delta.undo(data)
+        entry.steps_after = list(steps)
+        self.redo_stack.append(entry)
+        self.trim()
+        return data, list(entry.steps_before), entry
+
+    def redo(self, data):
+        """Returns (data with the step re-applied, pipeline steps after it, entry) or None"""
+        if not self.redo_stack:
+            return None
+        entry = self.redo_stack.pop()
+        data = entry.delta.redo(data)
+        self.undo_stack.append(entry)
+        return data, list(entry.steps_after), entry
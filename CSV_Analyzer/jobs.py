@@ -0,0 +1,211 @@
+"""
+Background jobs for the app: a small thread pool that runs loads, profiles,
+cleaning and charts off the Tk thread and hands results back to it.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+# Finished against a dataset version that has since been replaced
+OUTDATED = "outdated"
+
+FINISHED = (DONE, FAILED, CANCELLED, OUTDATED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job function that noticed its cancel request"""
+
+
+class DatasetSnapshot:
+    """
+    The data as it stood at one data_version. Frames are never modified in
+    place (every cleaning step builds a new frame and ColumnStore operations
+    return new stores), so a snapshot only holds references and stays valid
+    however the app's data moves on while a job reads it.
+    """
+
+    def __init__(self, version, cleaned, cleaned_store=None, original=None, original_store=None,
+                 view=None, filter_text=""):
+        self.version = version
+        self.cleaned = cleaned
+        self.cleaned_store = cleaned_store
+        self.original = original
+        self.original_store = original_store
+        # The cleaned rows matching filter_text (all of them without a filter)
+        self.view = cleaned if view is None else view
+        self.filter_text = filter_text
+
+
+class Job:
+    def __init__(self, job_id, name, kind, version=None):
+        self.id = job_id
+        self.name = name
+        self.kind = kind
+        # Dataset version the job works on; None for jobs that do not depend on one
+        self.version = version
+        self.status = QUEUED
+        # (on_done, on_error, on_cancel, on_finish), run on the UI thread
+        self.callbacks = (None, None, None, None)
+        self.cancel_event = threading.Event()
+        self.future = None
+        self.error = None
+        self.submitted = time.perf_counter()
+        self.started = None
+        self.finished = None
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def check_cancelled(self):
+        """Call between units of work so a cancel request stops the job early"""
+        if self.cancel_event.is_set():
+            raise JobCancelled(self.name)
+
+    @property
+    def wait_seconds(self):
+        end = self.started or self.finished or time.perf_counter()
+        return end - self.submitted
+
+    @property
+    def run_seconds(self):
+        if self.started is None:
+            return None
+        return (self.finished or time.perf_counter()) - self.started
+
+    def result(self, timeout=None):
+        """Block until the job function returns and give back its value"""
+        return self.future.result(timeout)
+
+
+class JobScheduler:
+    """
+    Runs job functions on a pool of worker threads. A job function is called
+    as fn(job, *args, **kwargs); its return value goes to on_done, an
+    exception to on_error. Workers never touch the UI: callbacks are queued
+    with post() and run by drain(), which the UI thread calls periodically.
+    Queueing never blocks, so the UI thread may wait on a job's result. A job
+    that was cancelled, or whose version no longer matches current_version(),
+    has its result dropped.
+    """
+
+    def __init__(self, current_version=None, max_workers=None, keep_finished=50):
+        self.callbacks = queue.SimpleQueue()
+        self.current_version = current_version
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                           thread_name_prefix="job")
+        self.keep_finished = keep_finished
+        self.jobs = []
+        self.listeners = []
+        self.next_id = 1
+
+    def post(self, callback, *args):
+        """Queue callback(*args) for the UI thread; safe to call from any thread"""
+        self.callbacks.put((callback, args))
+
+    def drain(self):
+        """Run every queued callback; call from the UI thread"""
+        while True:
+            try:
+                callback, args = self.callbacks.get_nowait()
+            except queue.Empty:
+                return
+            callback(*args)
+
+    def submit(self, name, fn, *args, kind="task", version=None, on_done=None, on_error=None,
+               on_cancel=None, on_finish=None, **kwargs):
+        job = Job(self.next_id, name, kind, version)
+        self.next_id += 1
+        job.callbacks = (on_done, on_error, on_cancel, on_finish)
+        self.jobs.append(job)
+        job.future = self.executor.submit(self.run, job, fn, args, kwargs)
+        self.notify()
+        return job
+
+    def run(self, job, fn, args, kwargs):
+        """Worker side; the outcome is handed to finish() on the UI thread"""
+        if job.cancelled:
+            self.post(self.finish, job, CANCELLED, None)
+            return None
+
+        job.status = RUNNING
+        job.started = time.perf_counter()
+        self.post(self.notify)
+        try:
+            result = fn(job, *args, **kwargs)
+        except Exception as e:
+            job.finished = time.perf_counter()
+            # Cancellation surfaces as whatever the job function raises when it stops
+            self.post(self.finish, job, CANCELLED if job.cancelled else FAILED, e)
+            raise
+        job.finished = time.perf_counter()
+        self.post(self.finish, job, CANCELLED if job.cancelled else DONE, result)
+        return result
+
+    def finish(self, job, status, value):
+        if job.status in FINISHED:
+            return
+        on_done, on_error, on_cancel, on_finish = job.callbacks
+        if job.finished is None:
+            job.finished = time.perf_counter()
+        if (status == DONE and job.version is not None and self.current_version is not None
+                and job.version != self.current_version()):
+            status = OUTDATED
+        job.status = status
+
+        try:
+            if status == DONE and on_done is not None:
+                on_done(value)
+            elif status == FAILED:
+                job.error = f"{type(value).__name__}: {value}"
+                if on_error is not None:
+                    on_error(value)
+            elif status in (CANCELLED, OUTDATED) and on_cancel is not None:
+                on_cancel()
+        finally:
+            if on_finish is not None:
+                on_finish()
+            self.trim()
+            self.notify()
+
+    def cancel(self, job):
+        """Ask a job to stop; one that has not started yet is dropped straight away"""
+        if job.status in FINISHED:
+            return
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            self.finish(job, CANCELLED, None)
+
+    def cancel_kind(self, kind):
+        for job in self.active(kind):
+            self.cancel(job)
+
+    def active(self, kind=None):
+        return [job for job in self.jobs
+                if job.status not in FINISHED and (kind is None or job.kind == kind)]
+
+    def clear_finished(self):
+        self.jobs = [job for job in self.jobs if job.status not in FINISHED]
+        self.notify()
+
+    def trim(self):
+        finished = [job for job in self.jobs if job.status in FINISHED]
+        for job in finished[:max(0, len(finished) - self.keep_finished)]:
+            self.jobs.remove(job)
+
+    def notify(self):
+        for listener in self.listeners:
+            listener()
+
+    def shutdown(self):
+        for job in self.active():
+            job.cancel_event.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,265 @@
+"""Helpers for reading data files into pandas DataFrames"""
+import codecs
+import csv
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from importlib.util import find_spec
+
+import numpy as np
+import pandas as pd
+
+# Rows parsed per chunk when streaming a large file
+DEFAULT_CHUNKSIZE = 100_000
+
+PYARROW_AVAILABLE = find_spec("pyarrow") is not None
+# read_csv engines to choose from; "auto" is the multithreaded pyarrow parser when it is
+# installed and the file is read in one go, and the C parser otherwise
+PARSER_ENGINES = ("auto", "pyarrow", "c", "python")
+# Dialect sniffing looks at the start of the file only
+SNIFF_BYTES = 64 * 1024
+SNIFF_LINES = 50
+SNIFF_DELIMITERS = ",;\t|"
+SNIFF_ENCODINGS = ("utf-8", "cp1252", "latin-1")
+
+
+class LoadCancelled(Exception):
+    """Raised when the user cancels a streaming load"""
+
+
+def read_csv_chunks(path, chunksize=DEFAULT_CHUNKSIZE, cancel_event=None, **read_kwargs):
+    """
+    Yield (chunk, bytes_read, total_bytes) while parsing a CSV file in chunks.
+    bytes_read is taken from the underlying file handle, so it runs slightly
+    ahead of the parser by the size of its read buffer.
+    """
+    total_bytes = os.path.getsize(path)
+    with open(path, "rb") as handle:
+        with pd.read_csv(handle, chunksize=chunksize, **read_kwargs) as reader:
+            for chunk in reader:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise LoadCancelled(f"Loading of {os.path.basename(path)} was cancelled")
+                yield chunk, handle.tell(), total_bytes
+
+
+def load_csv_streaming(path, on_chunk=None, cancel_event=None,
+                       chunksize=DEFAULT_CHUNKSIZE, **read_kwargs):
+    """
+    Read a CSV file chunk by chunk and return the concatenated DataFrame.
+    on_chunk(index, chunk, bytes_read, total_bytes) is called after every chunk.
+    """
+    chunks = []
+    for index, (chunk, bytes_read, total_bytes) in enumerate(
+            read_csv_chunks(path, chunksize, cancel_event, **read_kwargs)):
+        chunks.append(chunk)
+        if on_chunk is not None:
+            on_chunk(index, chunk, bytes_read, total_bytes)
+
+    if not chunks:
+        return pd.read_csv(path, nrows=0, **read_kwargs)
+    if len(chunks) == 1:
+        return chunks[0]
+    return pd.concat(chunks, ignore_index=True)
+
+
+def sniff_encoding(raw):
+    if raw.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    for encoding in SNIFF_ENCODINGS:
+        try:
+            raw.decode(encoding)
+            return encoding
+        except UnicodeDecodeError as e:
+            # The sample may end in the middle of a multi-byte character
+            if encoding == "utf-8" and e.start >= len(raw) - 3 and e.reason == "unexpected end of data":
+                return encoding
+    return "latin-1"
+
+
+def is_number(text):
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+
+def sniff_csv(path, sample_bytes=SNIFF_BYTES):
+    """
+    Guess the delimiter, encoding and header row of a CSV file from its first
+    lines. Returns read_csv options: {"sep", "encoding", "header"}, plus
+    generated "names" for a file without a header row.
+    """
+    with open(path, "rb") as handle:
+        raw = handle.read(sample_bytes)
+    encoding = sniff_encoding(raw)
+    lines = raw.decode(encoding, errors="replace").splitlines()
+    if len(raw) == sample_bytes and len(lines) > 1:
+        # The last line is probably cut off by the sample boundary
+        lines = lines[:-1]
+    sample = "\n".join(lines[:SNIFF_LINES])
+
+    options = {"sep": ",", "encoding": encoding, "header": 0}
+    if not sample.strip():
+        return options
+    sniffer = csv.Sniffer()
+    try:
+        options["sep"] = sniffer.sniff(sample, delimiters=SNIFF_DELIMITERS).delimiter
+    except csv.Error:
+        # A single column, or no delimiter stands out; keep the comma
+        pass
+
+    # Header names are rarely numbers, so only a first row with numbers in it
+    # that also looks like the rows below it is read as data
+    first_row = next(csv.reader([lines[0]], delimiter=options["sep"]), [])
+    if any(is_number(cell.strip()) for cell in first_row):
+        try:
+            if not sniffer.has_header(sample):
+                options["header"] = None
+                options["names"] = [f"column_{i + 1}" for i in range(len(first_row))]
+        except csv.Error:
+            pass
+    return options
+
+
+def resolve_engine(engine="auto", chunked=False):
+    """
+    Parser engine to use: pyarrow when asked for (or "auto") and installed,
+    except for chunked reads, which it does not support; the C parser otherwise.
+    """
+    if engine in ("auto", "pyarrow"):
+        return "pyarrow" if PYARROW_AVAILABLE and not chunked else "c"
+    return engine
+
+
+def csv_read_options(dialect, engine="auto", chunked=False):
+    """read_csv keyword arguments for a sniffed dialect and a parser engine"""
+    return dict(dialect, engine=resolve_engine(engine, chunked))
+
+
+def dialect_variant(read_kwargs):
+    """Dataset cache variant for a file parsed with these options (the engine aside)"""
+    return "|".join(f"{key}={read_kwargs[key]!r}" for key in sorted(read_kwargs) if key != "engine")
+
+
+def format_throughput(n_bytes, seconds):
+    return f"{n_bytes / 1024 / 1024 / max(seconds, 1e-6):,.0f} MB/s"
+
+
+def parse_csv_file(path, read_kwargs):
+    """Parse one file in a worker process; returns (df, seconds)"""
+    start = time.perf_counter()
+    df = pd.read_csv(path, **read_kwargs)
+    return df, time.perf_counter() - start
+
+
+def common_dtype(dtypes, has_gaps=False):
+    """
+    dtype a column is stored as after concatenating frames where it has the
+    given dtypes. has_gaps means some frames lack the column entirely, so the
+    result must be able to hold NaN.
+    """
+    dtypes = list(dict.fromkeys(dtypes))
+    if all(pd.api.types.is_bool_dtype(dtype) for dtype in dtypes):
+        return dtypes[0] if not has_gaps else np.dtype(object)
+    if all(pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+           for dtype in dtypes):
+        target = np.result_type(*[np.dtype(dtype) for dtype in dtypes])
+        if has_gaps and target.kind in "iu":
+            target = np.dtype("float64")
+        return target
+    if all(pd.api.types.is_datetime64_dtype(dtype) for dtype in dtypes):
+        return dtypes[0] if len(dtypes) == 1 else np.dtype("datetime64[ns]")
+    if len(dtypes) == 1:
+        return dtypes[0]
+    return np.dtype(object)
+
+
+def union_frames(frames, names=None):
+    """
+    Concatenate frames whose columns differ. The result has the union of all
+    columns (in first-seen order); a column missing from a frame is null for
+    its rows, and columns whose dtypes disagree are promoted to a common one
+    (ints and floats to float, anything mixed with text to object).
+
+    Returns (df, schema) where schema["missing"] maps a column to the names of
+    the frames that lacked it and schema["promoted"] maps a column to
+    (original dtypes, final dtype).
+    """
+    names = names or [str(i) for i in range(len(frames))]
+    columns = list(dict.fromkeys(col for frame in frames for col in frame.columns))
+    schema = {"missing": {}, "promoted": {}}
+
+    targets = {}
+    for col in columns:
+        lacking = [name for name, frame in zip(names, frames) if col not in frame.columns]
+        dtypes = [frame[col].dtype for frame in frames if col in frame.columns]
+        target = common_dtype(dtypes, has_gaps=bool(lacking))
+        targets[col] = target
+        if lacking:
+            schema["missing"][col] = lacking
+        if any(dtype != target for dtype in dtypes):
+            schema["promoted"][col] = ([str(dtype) for dtype in dict.fromkeys(dtypes)], str(target))
+
+    aligned = []
+    for frame in frames:
+        frame = frame.reindex(columns=columns)
+        changed = {col: target for col, target in targets.items() if frame[col].dtype != target}
+        aligned.append(frame.astype(changed) if changed else frame)
+
+    if not aligned:
+        return pd.DataFrame(), schema
+    df = pd.concat(aligned, ignore_index=True, sort=False) if len(aligned) > 1 else aligned[0]
+    return df, schema
+
+
+def load_csv_files(paths, workers=None, on_file=None, cancel_event=None, file_kwargs=None,
+                   **read_kwargs):
+    """
+    Parse several CSV files concurrently in worker processes and union them
+    into one DataFrame, in the order the paths were given. file_kwargs maps
+    a path to read_csv options for that file only, e.g. its sniffed dialect.
+    on_file(done, total, timing) is called as each file finishes, where
+    timing is {"file", "rows", "bytes", "seconds"}.
+
+    Returns (df, timings, schema); see union_frames for schema.
+    """
+    frames = {}
+    timings = {}
+    pool = ProcessPoolExecutor(max_workers=workers)
+    cancelled = False
+    try:
+        file_kwargs = file_kwargs or {}
+        pending = {pool.submit(parse_csv_file, path, dict(read_kwargs, **file_kwargs.get(path, {}))): path
+                   for path in paths}
+        while pending:
+            done, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            if cancel_event is not None and cancel_event.is_set():
+                cancelled = True
+                raise LoadCancelled(f"Loading of {len(paths)} files was cancelled")
+            for future in done:
+                path = pending.pop(future)
+                frames[path], seconds = future.result()
+                timings[path] = {"file": path, "rows": len(frames[path]),
+                                 "bytes": os.path.getsize(path), "seconds": seconds}
+                if on_file is not None:
+                    on_file(len(frames), len(paths), timings[path])
+    finally:
+        # Files still being parsed are abandoned, not waited for, on cancel
+        pool.shutdown(wait=not cancelled, cancel_futures=True)
+
+    df, schema = union_frames([frames[path] for path in paths],
+                              [os.path.basename(path) for path in paths])
+    return df, [timings[path] for path in paths], schema
+
+
+def format_duration(seconds):
+    """Format a number of seconds as a short human readable string"""
+    seconds = int(max(seconds, 0))
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m"
@@ -0,0 +1,110 @@
+"""Shrink the memory footprint of a loaded DataFrame by choosing tighter dtypes"""
+import re
+
+import numpy as np
+import pandas as pd
+
+# Text columns with at most this share of distinct values become categoricals
+CATEGORY_RATIO = 0.5
+
+# Only ISO style values are treated as "obvious" dates
+DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?$")
+DATE_SAMPLE_SIZE = 1000
+
+
+def is_text_column(series):
+    """True for object and string columns, which is how pandas stores raw text"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return False
+    return pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)
+
+
+def looks_like_dates(series):
+    """Check a sample of non-null values against the ISO date pattern"""
+    sample = series.dropna().head(DATE_SAMPLE_SIZE)
+    if sample.empty:
+        return False
+    return all(isinstance(value, str) and DATE_PATTERN.match(value) for value in sample)
+
+
+def downcast_numeric(series):
+    """Downcast integers to the smallest type and floats to float32 when lossless"""
+    if pd.api.types.is_bool_dtype(series):
+        return series
+
+    if pd.api.types.is_integer_dtype(series):
+        if series.min() >= 0:
+            return pd.to_numeric(series, downcast="unsigned")
+        return pd.to_numeric(series, downcast="integer")
+
+    if pd.api.types.is_float_dtype(series) and series.dtype != np.float32:
+        values = series.to_numpy()
+        with np.errstate(over="ignore", invalid="ignore"):
+            narrowed = values.astype(np.float32)
+        if np.array_equal(narrowed.astype(values.dtype), values, equal_nan=True):
+            return pd.Series(narrowed, index=series.index, name=series.name)
+
+    return series
+
+
+def optimize_column(series, category_ratio=CATEGORY_RATIO, parse_dates=True):
+    """Return the column converted to a more compact dtype, or unchanged"""
+    if pd.api.types.is_numeric_dtype(series):
+        return downcast_numeric(series)
+
+    if not is_text_column(series):
+        return series
+
+    if parse_dates and looks_like_dates(series):
+        parsed = pd.to_datetime(series, errors="coerce")
+        # Keep the text if any value failed to parse
+        if parsed.isnull().sum() == series.isnull().sum():
+            return parsed
+
+    if len(series) and series.nunique(dropna=True) <= max(1, len(series) * category_ratio):
+        return series.astype("category")
+
+    return series
+
+
+def optimize_dtypes(df, category_ratio=CATEGORY_RATIO, parse_dates=True):
+    """
+    Convert low-cardinality text to categoricals, downcast numerics and parse
+    ISO dates. Returns (optimized_df, report) where report holds the memory
+    before and after in bytes and the {column: (old_dtype, new_dtype)} changes.
+    """
+    memory_before = int(df.memory_usage(deep=True).sum())
+
+    columns = {}
+    converted = {}
+    for col in df.columns:
+        series = df[col]
+        optimized = optimize_column(series, category_ratio, parse_dates)
+        if optimized.dtype != series.dtype:
+            converted[col] = (str(series.dtype), str(optimized.dtype))
+        columns[col] = optimized
+
+    optimized_df = pd.DataFrame(columns, index=df.index)
+
+    report = {
+        "memory_before": memory_before,
+        "memory_after": int(optimized_df.memory_usage(deep=True).sum()),
+        "converted": converted
+    }
+    return optimized_df, report
+
+
+def describe_report(report):
+    """Single line summary of an optimization report for the dashboard"""
+    before = report["memory_before"] / 1024 / 1024
+    after = report["memory_after"] / 1024 / 1024
+    saved = before - after
+    percent = (saved / before * 100) if before else 0
+
+    categories = sum(1 for _, new in report["converted"].values() if new == "category")
+    dates = sum(1 for _, new in report["converted"].values() if new.startswith("datetime"))
+    downcasts = len(report["converted"]) - categories - dates
+
+    return (f"{len(report['converted'])} columns converted "
+            f"({categories} → category, {downcasts} downcast, {dates} → date) • "
+            f"{before:.2f} MB → {after:.2f} MB, saved {saved:.2f} MB ({percent:.0f}%)")
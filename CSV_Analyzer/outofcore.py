@@ -0,0 +1,610 @@
+"""
+Out-of-core storage for datasets larger than RAM.
+
+A ColumnStore keeps every column in its own flat binary file: numeric
+columns as raw NumPy arrays and text columns as integer category codes.
+The files are memory-mapped, so a DataFrame built from a store only pulls
+the pages it touches into memory and everything else stays on disk.
+Row-level operations stream over the store chunk by chunk and write a new
+set of column files instead of materializing the dataset.
+"""
+import json
+import os
+import shutil
+import tempfile
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from loader import DEFAULT_CHUNKSIZE, read_csv_chunks
+
+STORE_FILE = "store.json"
+
+# Rows processed per block when streaming over a store
+BLOCK_ROWS = 1_000_000
+
+
+def physical_memory():
+    """Total physical memory in bytes, or None when it cannot be detected"""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def should_use_out_of_core(path, ram_fraction=0.5):
+    """True when a file is larger than the given share of physical memory"""
+    memory = physical_memory()
+    return memory is not None and os.path.getsize(path) > memory * ram_fraction
+
+
+def codes_dtype(n_categories):
+    """Smallest code dtype pandas uses for a categorical of this size"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def new_workspace():
+    """Create a temporary directory to hold column files"""
+    return tempfile.mkdtemp(prefix="csv_analyzer_store_")
+
+
+class StoreWriter:
+    """Append DataFrame chunks to a set of column files"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.n_rows = 0
+        self.specs = {}
+        self.category_ids = {}
+        self.dtype_mappings = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def new_file(self):
+        return f"{uuid.uuid4().hex}.bin"
+
+    def path(self, spec):
+        return os.path.join(self.directory, spec["file"])
+
+    def append(self, chunk):
+        if not self.specs and not self.n_rows:
+            for col in chunk.columns:
+                self.specs[col] = self.initial_spec(col, chunk[col])
+
+        for col in chunk.columns:
+            spec = self.specs[col]
+            values = chunk[col]
+
+            if spec["kind"] == "numeric" and pd.api.types.is_numeric_dtype(values):
+                dtype = np.result_type(np.dtype(spec["dtype"]), values.dtype)
+                if dtype != np.dtype(spec["dtype"]):
+                    self.promote_numeric(col, dtype)
+                data = values.to_numpy(dtype=dtype)
+            else:
+                if spec["kind"] == "numeric":
+                    self.numeric_to_category(col)
+                data = self.encode(col, values)
+
+            with open(self.path(spec), "ab") as handle:
+                np.ascontiguousarray(data).tofile(handle)
+
+        self.n_rows += len(chunk)
+
+    def initial_spec(self, col, values):
+        if pd.api.types.is_numeric_dtype(values) and not isinstance(values.dtype, pd.CategoricalDtype):
+            spec = {"kind": "numeric", "dtype": values.to_numpy().dtype.str}
+        else:
+            spec = {"kind": "category", "dtype": np.dtype(np.int32).str, "categories": []}
+            self.category_ids[col] = {}
+        spec["file"] = self.new_file()
+        return spec
+
+    def encode(self, col, values):
+        """Map text values to global integer codes, -1 for missing"""
+        ids = self.category_ids[col]
+        categories = self.specs[col]["categories"]
+
+        cached = None
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            local_codes = values.cat.codes.to_numpy()
+            uniques = values.cat.categories
+            # Chunks streamed from a store share one dtype, so map it only once
+            cached = self.dtype_mappings.get(col)
+            if cached is not None and cached[0] is not values.dtype:
+                cached = None
+        else:
+            local_codes, uniques = pd.factorize(values)
+
+        if cached is not None:
+            mapping = cached[1]
+        else:
+            mapping = np.empty(len(uniques), dtype=np.int32)
+            for i, value in enumerate(uniques):
+                key = str(value)
+                if key not in ids:
+                    ids[key] = len(categories)
+                    categories.append(key)
+                mapping[i] = ids[key]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                self.dtype_mappings[col] = (values.dtype, mapping)
+
+        codes = np.full(len(local_codes), -1, dtype=np.int32)
+        present = local_codes >= 0
+        codes[present] = mapping[local_codes[present]]
+        return codes
+
+    def promote_numeric(self, col, dtype):
+        """Rewrite a numeric column with a wider dtype (e.g. int64 -> float64)"""
+        spec = self.specs[col]
+        old_path = self.path(spec)
+        spec["file"] = self.new_file()
+        with open(self.path(spec), "ab") as handle:
+            for block in iter_file_blocks(old_path, spec["dtype"], self.n_rows):
+                block.astype(dtype).tofile(handle)
+        os.remove(old_path)
+        spec["dtype"] = np.dtype(dtype).str
+
+    def numeric_to_category(self, col):
+        """Convert a column that turned out to hold text into category codes"""
+        spec = self.specs[col]
+        old_path, old_dtype = self.path(spec), spec["dtype"]
+        spec.update(kind="category", dtype=np.dtype(np.int32).str, categories=[],
+                    file=self.new_file())
+        self.category_ids[col] = {}
+        with open(self.path(spec), "ab") as handle:
+            for block in iter_file_blocks(old_path, old_dtype, self.n_rows):
+                values = pd.Series(block)
+                self.encode(col, values.astype(object).where(values.notna())).tofile(handle)
+        os.remove(old_path)
+
+    def finish(self):
+        """Shrink category codes to the dtype pandas expects and return the store"""
+        for spec in self.specs.values():
+            if spec["kind"] != "category":
+                continue
+            target = codes_dtype(len(spec["categories"]))
+            if target != np.dtype(spec["dtype"]):
+                old_path = self.path(spec)
+                spec["file"] = self.new_file()
+                with open(self.path(spec), "ab") as handle:
+                    for block in iter_file_blocks(old_path, spec["dtype"], self.n_rows):
+                        block.astype(target).tofile(handle)
+                os.remove(old_path)
+                spec["dtype"] = target.str
+
+        return ColumnStore(self.directory, self.n_rows, self.specs)
+
+
+def iter_file_blocks(path, dtype, n_rows, block_rows=BLOCK_ROWS):
+    """Yield consecutive blocks of a raw column file"""
+    if n_rows == 0:
+        return
+    data = np.memmap(path, dtype=np.dtype(dtype), mode="r", shape=(n_rows,))
+    for start in range(0, n_rows, block_rows):
+        yield np.asarray(data[start:start + block_rows])
+
+
+class ColumnStore:
+    """Read-only, memory-mapped, column-wise copy of a dataset"""
+
+    def __init__(self, directory, n_rows, specs):
+        self.directory = directory
+        self.n_rows = n_rows
+        self.specs = specs
+        self.category_dtypes = {}
+
+    # ----- Building and persistence -----
+
+    @classmethod
+    def from_chunks(cls, chunks, directory):
+        writer = StoreWriter(directory)
+        for chunk in chunks:
+            writer.append(chunk)
+        return writer.finish()
+
+    @classmethod
+    def from_csv(cls, path, directory=None, on_chunk=None, cancel_event=None,
+                 chunksize=DEFAULT_CHUNKSIZE, **read_kwargs):
+        """
+        Convert a CSV file into a store, streaming it chunk by chunk.
+        on_chunk(index, chunk, bytes_read, total_bytes) reports progress.
+        """
+        directory = directory or new_workspace()
+
+        def chunks():
+            for index, (chunk, bytes_read, total_bytes) in enumerate(
+                    read_csv_chunks(path, chunksize, cancel_event, **read_kwargs)):
+                if on_chunk is not None:
+                    on_chunk(index, chunk, bytes_read, total_bytes)
+                yield chunk
+
+        try:
+            return cls.from_chunks(chunks(), directory)
+        except BaseException:
+            shutil.rmtree(directory, ignore_errors=True)
+            raise
+
+    @classmethod
+    def open(cls, directory):
+        with open(os.path.join(directory, STORE_FILE), encoding="utf-8") as handle:
+            meta = json.load(handle)
+        return cls(directory, meta["n_rows"], meta["columns"])
+
+    def save(self):
+        meta = {"n_rows": self.n_rows, "columns": self.specs}
+        with open(os.path.join(self.directory, STORE_FILE), "w", encoding="utf-8") as handle:
+            json.dump(meta, handle)
+
+    def remove(self):
+        """Delete the workspace directory and every column file in it"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    # ----- Reading -----
+
+    @property
+    def columns(self):
+        return list(self.specs)
+
+    def disk_size(self):
+        return sum(os.path.getsize(os.path.join(self.directory, spec["file"]))
+                   for spec in self.specs.values())
+
+    def raw(self, col):
+        """Memory-mapped array of a column (category codes for text columns)"""
+        spec = self.specs[col]
+        dtype = np.dtype(spec["dtype"])
+        if self.n_rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(os.path.join(self.directory, spec["file"]), dtype=dtype,
+                         mode="r", shape=(self.n_rows,))
+
+    def category_dtype(self, col):
+        if col not in self.category_dtypes:
+            self.category_dtypes[col] = pd.CategoricalDtype(self.specs[col]["categories"])
+        return self.category_dtypes[col]
+
+    def wrap(self, col, data):
+        """Turn raw column data into a pandas Series without copying it"""
+        if self.specs[col]["kind"] == "category":
+            values = pd.Categorical.from_codes(data, dtype=self.category_dtype(col))
+            return pd.Series(values, name=col, copy=False)
+        return pd.Series(data, name=col, copy=False)
+
+    def column(self, col):
+        return self.wrap(col, self.raw(col))
+
+    def to_frame(self, columns=None):
+        """DataFrame whose columns are views onto the memory-mapped files"""
+        return pd.DataFrame({col: self.column(col) for col in columns or self.columns}, copy=False)
+
+    @property
+    def dtypes(self):
+        return self.to_frame().dtypes
+
+    def iter_chunks(self, columns=None, block_rows=BLOCK_ROWS):
+        """Yield (start, DataFrame) blocks holding only the requested columns"""
+        columns = columns or self.columns
+        raws = {col: self.raw(col) for col in columns}
+        for start in range(0, self.n_rows, block_rows):
+            stop = min(start + block_rows, self.n_rows)
+            chunk = pd.DataFrame({
+                col: self.wrap(col, np.asarray(raws[col][start:stop])) for col in columns
+            })
+            chunk.index = pd.RangeIndex(start, stop)
+            yield start, chunk
+
+    # ----- Chunked summaries -----
+
+    def null_counts(self):
+        """Missing values per column, computed block by block"""
+        counts = {}
+        for col in self.columns:
+            raw, total = self.raw(col), 0
+            for start in range(0, self.n_rows, BLOCK_ROWS):
+                block = raw[start:start + BLOCK_ROWS]
+                if self.specs[col]["kind"] == "category":
+                    total += int(np.count_nonzero(block < 0))
+                elif block.dtype.kind == "f":
+                    total += int(np.count_nonzero(np.isnan(block)))
+            counts[col] = total
+        return pd.Series(counts, dtype="int64")
+
+    def numeric_columns(self):
+        return [col for col, spec in self.specs.items() if spec["kind"] == "numeric"]
+
+    def moments(self, col):
+        """count/mean/std/min/max of a numeric column in one streaming pass"""
+        raw = self.raw(col)
+        count, mean, m2 = 0, 0.0, 0.0
+        minimum, maximum = np.inf, -np.inf
+        for start in range(0, self.n_rows, BLOCK_ROWS):
+            block = np.asarray(raw[start:start + BLOCK_ROWS], dtype=np.float64)
+            block = block[~np.isnan(block)]
+            if block.size == 0:
+                continue
+            # Merge the block's moments into the running ones (Chan et al.)
+            block_mean = block.mean()
+            block_m2 = np.square(block - block_mean).sum()
+            delta = block_mean - mean
+            total = count + block.size
+            mean += delta * block.size / total
+            m2 += block_m2 + delta * delta * count * block.size / total
+            count = total
+            minimum = min(minimum, block.min())
+            maximum = max(maximum, block.max())
+
+        if count == 0:
+            return {"count": 0, "mean": np.nan, "std": np.nan, "min": np.nan, "max": np.nan}
+
+        std = np.sqrt(m2 / (count - 1)) if count > 1 else np.nan
+        return {"count": count, "mean": mean, "std": std, "min": minimum, "max": maximum}
+
+    def numeric_summary(self, col):
+        """describe()-style summary: streaming moments plus exact quartiles"""
+        summary = self.moments(col)
+        q1, q2, q3 = self.quantiles(col, [25, 50, 75])
+        return {"count": summary["count"], "mean": summary["mean"], "std": summary["std"],
+                "min": summary["min"], "25%": q1, "50%": q2, "75%": q3, "max": summary["max"]}
+
+    def quantiles(self, col, percents):
+        """Exact percentiles of a numeric column (reads that one column only)"""
+        data = np.asarray(self.raw(col), dtype=np.float64)
+        if data.size == 0 or np.isnan(data).all():
+            return [np.nan] * len(percents)
+        return list(np.nanpercentile(data, percents))
+
+    def column_mean(self, col):
+        return self.moments(col)["mean"]
+
+    def column_mode(self, col):
+        """Most frequent non-missing value, counted block by block"""
+        raw = self.raw(col)
+        if self.specs[col]["kind"] == "category":
+            counts = np.zeros(len(self.specs[col]["categories"]), dtype=np.int64)
+            for start in range(0, self.n_rows, BLOCK_ROWS):
+                block = np.asarray(raw[start:start + BLOCK_ROWS])
+                counts += np.bincount(block[block >= 0], minlength=len(counts))
+            return self.specs[col]["categories"][int(counts.argmax())] if counts.any() else None
+
+        counts = None
+        for start in range(0, self.n_rows, BLOCK_ROWS):
+            block_counts = pd.Series(raw[start:start + BLOCK_ROWS]).value_counts()
+            counts = block_counts if counts is None else counts.add(block_counts, fill_value=0)
+        return None if counts is None or counts.empty else counts.idxmax()
+
+    def unique_count(self, col):
+        """Number of distinct non-missing values in a column"""
+        raw = self.raw(col)
+        if self.specs[col]["kind"] == "category":
+            seen = np.zeros(len(self.specs[col]["categories"]), dtype=bool)
+            for start in range(0, self.n_rows, BLOCK_ROWS):
+                block = np.asarray(raw[start:start + BLOCK_ROWS])
+                seen[block[block >= 0]] = True
+            return int(seen.sum())
+
+        data = np.asarray(raw)
+        if data.dtype.kind == "f":
+            data = data[~np.isnan(data)]
+        return len(np.unique(data))
+
+    def row_hashes(self, columns=None):
+        """64-bit hash of every row, built block by block"""
+        hashes = np.empty(self.n_rows, dtype=np.uint64)
+        for start, chunk in self.iter_chunks(columns):
+            hashes[start:start + len(chunk)] = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        return hashes
+
+    def duplicate_mask(self, columns=None):
+        """Boolean array marking every repeat of an earlier row"""
+        hashes = self.row_hashes(columns)
+        _, first = np.unique(hashes, return_index=True)
+        mask = np.ones(self.n_rows, dtype=bool)
+        mask[first] = False
+        return mask
+
+    # ----- Chunked transformations (each returns a new store) -----
+
+    def filter_rows(self, keep):
+        """
+        Stream the store through keep(start, chunk) -> boolean mask and write
+        the surviving rows to new column files in the same workspace.
+        """
+        writer = StoreWriter(self.directory)
+        for start, chunk in self.iter_chunks():
+            writer.append(chunk[np.asarray(keep(start, chunk), dtype=bool)])
+        if not writer.specs:
+            writer.append(self.empty_frame())
+        return writer.finish()
+
+    def empty_frame(self):
+        return pd.DataFrame({col: self.wrap(col, np.empty(0, dtype=np.dtype(spec["dtype"])))
+                             for col, spec in self.specs.items()})
+
+    def drop_missing(self, columns=None):
+        columns = columns or self.columns
+        return self.filter_rows(lambda start, chunk: chunk[columns].notna().all(axis=1))
+
+    def drop_duplicates(self, columns=None):
+        mask = self.duplicate_mask(columns)
+        return self.filter_rows(lambda start, chunk: ~mask[start:start + len(chunk)])
+
+    def drop_outliers(self, col, lower, upper):
+        return self.filter_rows(
+            lambda start, chunk: (chunk[col] >= lower) & (chunk[col] <= upper))
+
+    def with_column(self, col, spec, data_blocks):
+        """New store sharing every column file except col, which is rewritten"""
+        spec = dict(spec, file=f"{uuid.uuid4().hex}.bin")
+        with open(os.path.join(self.directory, spec["file"]), "ab") as handle:
+            for block in data_blocks:
+                np.ascontiguousarray(block).tofile(handle)
+        specs = dict(self.specs)
+        specs[col] = spec
+        return ColumnStore(self.directory, self.n_rows, specs)
+
+    def missing_mask(self, col, block):
+        if self.specs[col]["kind"] == "category":
+            return block < 0
+        if block.dtype.kind == "f":
+            return np.isnan(block)
+        return np.zeros(len(block), dtype=bool)
+
+    def fill_value(self, col, value):
+        """Replace missing values in one column with a constant"""
+        spec = dict(self.specs[col])
+        if spec["kind"] == "category":
+            categories = list(spec["categories"])
+            if str(value) not in categories:
+                categories.append(str(value))
+            spec["categories"] = categories
+            fill = categories.index(str(value))
+            target = codes_dtype(len(categories))
+            spec["dtype"] = target.str
+        else:
+            target = np.result_type(np.dtype(spec["dtype"]), np.asarray(value).dtype)
+            spec["dtype"] = target.str
+            fill = value
+
+        def blocks():
+            for block in iter_file_blocks(os.path.join(self.directory, self.specs[col]["file"]),
+                                          self.specs[col]["dtype"], self.n_rows):
+                block = block.astype(target)
+                block[self.missing_mask(col, block)] = fill
+                yield block
+
+        return self.with_column(col, spec, blocks())
+
+    def fill_direction(self, col, backward=False):
+        """Forward (or backward) fill one column, carrying values across blocks"""
+        spec = self.specs[col]
+        raw = self.raw(col)
+        starts = list(range(0, self.n_rows, BLOCK_ROWS))
+        out_path = os.path.join(self.directory, f"{uuid.uuid4().hex}.bin")
+        out = np.memmap(out_path, dtype=raw.dtype, mode="w+", shape=(self.n_rows,)) if self.n_rows else None
+
+        carry = None
+        for start in (reversed(starts) if backward else starts):
+            block = np.array(raw[start:start + BLOCK_ROWS])
+            if backward:
+                block = block[::-1]
+            valid = ~self.missing_mask(col, block)
+            positions = np.where(valid, np.arange(len(block)), 0)
+            np.maximum.accumulate(positions, out=positions)
+            filled = block[positions]
+            # Rows before the first valid value take the carry from the previous block
+            first_valid = int(valid.argmax()) if valid.any() else len(block)
+            if carry is not None:
+                filled[:first_valid] = carry
+            if valid.any():
+                carry = filled[-1]
+            out[start:start + len(block)] = filled[::-1] if backward else filled
+
+        if out is not None:
+            out.flush()
+            del out
+        specs = dict(self.specs)
+        specs[col] = dict(spec, file=os.path.basename(out_path))
+        return ColumnStore(self.directory, self.n_rows, specs)
+
+
+class SelectedColumn:
+    """One column of a StoreSelection: the store's column file read at the selected rows"""
+
+    def __init__(self, data, rows):
+        self.data = data
+        self.rows = rows
+        self.dtype = data.dtype
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def nbytes(self):
+        return len(self.rows) * self.dtype.itemsize
+
+    def __getitem__(self, key):
+        return np.asarray(self.data[self.rows[key]])
+
+    def __array__(self, dtype=None, copy=None):
+        values = np.asarray(self.data[self.rows])
+        return values if dtype is None else values.astype(dtype, copy=False)
+
+
+class SelectionRows:
+    """iloc for a StoreSelection: a slice of its rows, optionally of some column positions"""
+
+    def __init__(self, selection):
+        self.selection = selection
+
+    def __getitem__(self, key):
+        rows, columns = key if isinstance(key, tuple) else (key, slice(None))
+        part = StoreSelection(self.selection.store, self.selection.rows[rows])
+        names = self.selection.columns[columns]
+        if isinstance(columns, (int, np.integer)):
+            return part.column(names)
+        return part.to_frame(list(names))
+
+
+class StoreSelection(ColumnStore):
+    """
+    The rows of a store at the given positions (e.g. those matching a filter),
+    read from the store's files on demand instead of copied out of them.
+    Summaries stream over it as over any store. It also stands in for the
+    filtered DataFrame (len, columns, dtypes, index, iloc and []), so a caller
+    reading one page or a few columns only pulls those into memory. It is
+    read-only; cleaning goes through the store itself.
+    """
+
+    def __init__(self, store, rows):
+        super().__init__(store.directory, len(rows), store.specs)
+        self.store = store
+        self.rows = rows
+        self.category_dtypes = store.category_dtypes
+        self.iloc = SelectionRows(self)
+
+    @property
+    def columns(self):
+        return pd.Index(list(self.specs))
+
+    def raw(self, col):
+        return SelectedColumn(self.store.raw(col), self.rows)
+
+    def column(self, col):
+        series = self.wrap(col, np.asarray(self.raw(col)))
+        series.index = self.index
+        return series
+
+    def to_frame(self, columns=None):
+        """The selected rows as an in-memory DataFrame (of the given columns only)"""
+        columns = list(self.columns) if columns is None else columns
+        return pd.DataFrame({col: self.column(col) for col in columns}, index=self.index)
+
+    def disk_size(self):
+        return sum(self.raw(col).nbytes for col in self.specs)
+
+    @property
+    def dtypes(self):
+        return self.store.dtypes
+
+    @property
+    def index(self):
+        return pd.Index(self.rows)
+
+    @property
+    def shape(self):
+        return self.n_rows, len(self.specs)
+
+    @property
+    def size(self):
+        return self.n_rows * len(self.specs)
+
+    def __len__(self):
+        return self.n_rows
+
+    def __getitem__(self, key):
+        if isinstance(key, list):
+            return self.to_frame(key)
+        return self.column(key)
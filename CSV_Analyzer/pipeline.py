@@ -0,0 +1,213 @@
+"""Recorded cleaning pipeline that can be saved, reloaded and replayed on new data"""
+import json
+
+import numpy as np
+import pandas as pd
+
+from row_index import hash_rows
+
+PIPELINE_VERSION = 1
+
+# Steps that rewrite values in one column
+FILL_METHODS = ("Mean Imputation", "Median Imputation", "Mode Imputation",
+                "Forward Fill", "Backward Fill")
+# Steps that only drop rows
+FILTER_METHODS = ("Drop Rows", "Remove Missing Rows", "Remove Duplicates", "Remove Outliers")
+
+
+class PipelineError(Exception):
+    """A recorded step cannot be applied to the data it is replayed on"""
+
+
+def describe_step(step):
+    method, column = step["method"], step.get("column")
+    if step["method"] == "Remove Duplicates":
+        subset = step["params"].get("subset")
+        return f"{method} ({', '.join(subset)})" if subset else method
+    return f"{method} on '{column}'" if column else method
+
+
+class CleaningPipeline:
+    """
+    Ordered list of cleaning steps, each a (method, column, params) record
+    using the same method names as the cleaning panel. Nothing runs when a
+    step is added; run() executes the plan against a DataFrame (or run_store()
+    against a ColumnStore) with adjacent steps fused:
+
+    - consecutive row-dropping steps are combined into one boolean mask and
+      the data is sliced once at the end of the run
+    - consecutive fill steps work on the affected columns only and swap them
+      into the frame together, so the other columns are never copied
+
+    Statistics (means, quartiles, duplicates) are still taken on the data as
+    it stands at that step, so the result matches applying the steps one by one.
+    """
+
+    def __init__(self, steps=None):
+        self.steps = list(steps or [])
+
+    def __len__(self):
+        return len(self.steps)
+
+    def add(self, method, column=None, **params):
+        if method not in FILL_METHODS + FILTER_METHODS:
+            raise PipelineError(f"Unknown cleaning method: {method}")
+        if method in FILL_METHODS + ("Drop Rows", "Remove Outliers") and not column:
+            raise PipelineError(f"{method} needs a column")
+        self.steps.append({"method": method, "column": column, "params": params})
+
+    def clear(self):
+        self.steps = []
+
+    def describe(self):
+        return [describe_step(step) for step in self.steps]
+
+    # ----- Saving and loading -----
+
+    def to_dict(self):
+        return {"version": PIPELINE_VERSION, "steps": self.steps}
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("version") != PIPELINE_VERSION:
+            raise PipelineError(f"Unsupported pipeline version: {data.get('version')}")
+        pipeline = cls()
+        for step in data.get("steps", []):
+            pipeline.add(step["method"], step.get("column"), **step.get("params", {}))
+        return pipeline
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(self.to_dict(), handle, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as handle:
+            return cls.from_dict(json.load(handle))
+
+    # ----- Execution -----
+
+    def stages(self):
+        """Group adjacent steps of the same kind: [("fill"|"filter", [steps]), ...]"""
+        stages = []
+        for step in self.steps:
+            kind = "fill" if step["method"] in FILL_METHODS else "filter"
+            if stages and stages[-1][0] == kind:
+                stages[-1][1].append(step)
+            else:
+                stages.append((kind, [step]))
+        return stages
+
+    def validate(self, columns):
+        """Raise PipelineError if a step names a column the data does not have"""
+        columns = set(columns)
+        for step in self.steps:
+            needed = [step["column"]] if step.get("column") else []
+            needed += step["params"].get("subset") or []
+            missing = [col for col in needed if col not in columns]
+            if missing:
+                raise PipelineError(
+                    f"Step '{describe_step(step)}' needs missing column(s): {', '.join(missing)}")
+
+    def run(self, df):
+        """Apply every step to df; returns (cleaned frame, one summary line per step)"""
+        self.validate(df.columns)
+        summary = []
+        for kind, steps in self.stages():
+            if kind == "filter":
+                keep = self.filter_mask(df, steps, summary)
+                if not keep.all():
+                    df = df[keep]
+            else:
+                filled = {}
+                for step in steps:
+                    col = step["column"]
+                    values = filled.get(col, df[col])
+                    filled[col] = fill_series(values, step)
+                    summary.append(f"{describe_step(step)}: filled "
+                                   f"{int(values.isnull().sum() - filled[col].isnull().sum())} values")
+                df = df.copy(deep=False)
+                for col, values in filled.items():
+                    df[col] = values
+        return df, summary
+
+    def run_store(self, store):
+        """
+        Apply every step to a ColumnStore. Each fused filter stage is one
+        streaming pass; fills rewrite only the column they touch.
+        """
+        self.validate(store.columns)
+        summary = []
+        for kind, steps in self.stages():
+            if kind == "filter":
+                keep = self.filter_mask(store.to_frame(), steps, summary, store)
+                if not keep.all():
+                    store = store.filter_rows(lambda start, chunk: keep[start:start + len(chunk)])
+                continue
+            for step in steps:
+                col = step["column"]
+                before = int(store.null_counts()[col])
+                if step["method"] in ("Forward Fill", "Backward Fill"):
+                    store = store.fill_direction(col, backward=step["method"] == "Backward Fill")
+                else:
+                    store = store.fill_value(col, store_fill_value(store, step))
+                summary.append(f"{describe_step(step)}: filled "
+                               f"{before - int(store.null_counts()[col])} values")
+        return store, summary
+
+    def filter_mask(self, df, steps, summary, store=None):
+        """Combined keep-mask for a run of row-dropping steps"""
+        keep = np.ones(len(df), dtype=bool)
+        for step in steps:
+            before = int(keep.sum())
+            method, col = step["method"], step.get("column")
+
+            if method == "Drop Rows":
+                keep &= df[col].notna().to_numpy()
+            elif method == "Remove Missing Rows":
+                keep &= df.notna().all(axis=1).to_numpy()
+            elif method == "Remove Outliers":
+                values = df[col]
+                if not pd.api.types.is_numeric_dtype(values):
+                    raise PipelineError(f"Outlier removal only works for numeric columns ('{col}')")
+                factor = step["params"].get("factor", 1.5)
+                q1, q3 = values[keep].quantile([0.25, 0.75])
+                iqr = q3 - q1
+                keep &= ((values >= q1 - factor * iqr) & (values <= q3 + factor * iqr)).to_numpy()
+            else:
+                subset = step["params"].get("subset")
+                hashes = store.row_hashes(subset) if store is not None else hash_rows(df, subset)
+                rows = np.flatnonzero(keep)
+                keep[rows[pd.Series(hashes[rows]).duplicated().to_numpy()]] = False
+
+            summary.append(f"{describe_step(step)}: removed {before - int(keep.sum())} rows")
+        return keep
+
+
+def fill_series(values, step):
+    method = step["method"]
+    if method == "Forward Fill":
+        return values.ffill()
+    if method == "Backward Fill":
+        return values.bfill()
+    if method in ("Mean Imputation", "Median Imputation"):
+        if not pd.api.types.is_numeric_dtype(values):
+            raise PipelineError(f"{method.split()[0]} imputation only works for numeric columns "
+                                f"('{step['column']}')")
+        return values.fillna(values.mean() if method == "Mean Imputation" else values.median())
+    mode = values.mode()
+    return values.fillna(mode[0] if not mode.empty else "")
+
+
+def store_fill_value(store, step):
+    col, method = step["column"], step["method"]
+    numeric = store.specs[col]["kind"] == "numeric"
+    if method in ("Mean Imputation", "Median Imputation"):
+        if not numeric:
+            raise PipelineError(f"{method.split()[0]} imputation only works for numeric columns "
+                                f"('{col}')")
+        return store.column_mean(col) if method == "Mean Imputation" else store.quantiles(col, [50])[0]
+    value = store.column_mode(col)
+    if value is None:
+        value = 0 if numeric else ""
+    return value
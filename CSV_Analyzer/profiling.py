@@ -0,0 +1,143 @@
+"""Dataset profile: the aggregates every panel needs, computed once per data version"""
+import pandas as pd
+
+from sketches import DatasetSketch
+
+
+class DatasetProfile:
+    """
+    Per-column nulls, unique counts, min/max and memory plus dataset-wide
+    duplicate and memory totals. Built once for a given data version and
+    reused until a cleaning step changes the data. The describe()-style
+    numeric summary is only computed the first time it is asked for.
+
+    An approximate profile is built from a DatasetSketch in one streaming
+    pass instead: unique counts are HyperLogLog estimates and quartiles come
+    from KLL sketches, with the error bounds available on the sketch.
+    """
+
+    def __init__(self, version, n_rows, columns, duplicate_rows, memory_bytes,
+                 on_disk=False, source=None, sketch=None):
+        self.version = version
+        self.n_rows = n_rows
+        # One row per dataset column: dtype, non_null, nulls, unique, min, max, memory
+        self.columns = columns
+        self.duplicate_rows = duplicate_rows
+        self.memory_bytes = memory_bytes
+        self.on_disk = on_disk
+        self.source = source
+        self.sketch = sketch
+        self.numeric_stats = None
+
+    @classmethod
+    def from_frame(cls, df, version, duplicate_rows=None, approximate=False):
+        if approximate:
+            return cls.from_sketch(DatasetSketch.from_frame(df), df.dtypes, len(df), version,
+                                   duplicate_rows if duplicate_rows is not None
+                                   else int(df.duplicated().sum()),
+                                   df.memory_usage(deep=True, index=False), source=df)
+
+        nulls = df.isnull().sum()
+        numeric = df.select_dtypes(include=['number'])
+
+        columns = pd.DataFrame({
+            "dtype": df.dtypes.astype(str),
+            "non_null": len(df) - nulls,
+            "nulls": nulls,
+            "unique": df.nunique(),
+            "min": numeric.min(),
+            "max": numeric.max(),
+            "memory": df.memory_usage(deep=True, index=False)
+        }, index=df.columns)
+
+        if duplicate_rows is None:
+            duplicate_rows = int(df.duplicated().sum())
+        return cls(version, len(df), columns, duplicate_rows,
+                   int(df.memory_usage(deep=True).sum()), source=df)
+
+    @classmethod
+    def from_store(cls, store, version, duplicate_rows=None, approximate=False):
+        """Profile a ColumnStore by streaming over its column files"""
+        dtypes = store.dtypes
+        if approximate:
+            return cls.from_sketch(DatasetSketch.from_store(store), dtypes, store.n_rows,
+                                   version, duplicate_rows if duplicate_rows is not None
+                                   else int(store.duplicate_mask().sum()),
+                                   pd.Series({col: store.raw(col).nbytes for col in store.columns}),
+                                   on_disk=True, source=store)
+
+        nulls = store.null_counts()
+        moments = {col: store.moments(col) for col in store.numeric_columns()}
+
+        columns = pd.DataFrame({
+            "dtype": dtypes.astype(str),
+            "non_null": store.n_rows - nulls,
+            "nulls": nulls,
+            "unique": pd.Series({col: store.unique_count(col) for col in store.columns}),
+            "min": pd.Series({col: m["min"] for col, m in moments.items()}, dtype="float64"),
+            "max": pd.Series({col: m["max"] for col, m in moments.items()}, dtype="float64"),
+            "memory": pd.Series({col: store.raw(col).nbytes for col in store.columns})
+        }, index=dtypes.index)
+
+        if duplicate_rows is None:
+            duplicate_rows = int(store.duplicate_mask().sum())
+        return cls(version, store.n_rows, columns, duplicate_rows,
+                   store.disk_size(), on_disk=True, source=store)
+
+    @classmethod
+    def from_sketch(cls, sketch, dtypes, n_rows, version, duplicate_rows, memory,
+                    on_disk=False, source=None):
+        column_sketches = sketch.columns
+        columns = pd.DataFrame({
+            "dtype": dtypes.astype(str),
+            "non_null": pd.Series({col: s.rows - s.nulls for col, s in column_sketches.items()}),
+            "nulls": pd.Series({col: s.nulls for col, s in column_sketches.items()}),
+            "unique": pd.Series({col: s.unique_estimate() for col, s in column_sketches.items()}),
+            "min": pd.Series({col: s.min for col, s in column_sketches.items() if s.numeric},
+                             dtype="float64"),
+            "max": pd.Series({col: s.max for col, s in column_sketches.items() if s.numeric},
+                             dtype="float64"),
+            "memory": memory
+        }, index=dtypes.index)
+
+        profile = cls(version, n_rows, columns, duplicate_rows,
+                      int(memory.sum()) if not on_disk else source.disk_size(),
+                      on_disk=on_disk, source=source, sketch=sketch)
+        profile.numeric_stats = sketch.describe()
+        return profile
+
+    @property
+    def approximate(self):
+        return self.sketch is not None
+
+    @property
+    def n_cols(self):
+        return len(self.columns)
+
+    @property
+    def missing_total(self):
+        return int(self.columns["nulls"].sum())
+
+    @property
+    def memory_mb(self):
+        return self.memory_bytes / 1024 / 1024
+
+    def numeric_columns(self):
+        if self.approximate:
+            return self.sketch.numeric_columns()
+        if self.on_disk:
+            return self.source.numeric_columns()
+        return list(self.source.select_dtypes(include=['number']).columns)
+
+    def numeric_summary(self):
+        """describe().T of the numeric columns, cached on the profile"""
+        if self.numeric_stats is None:
+            names = self.numeric_columns()
+            if self.on_disk:
+                self.numeric_stats = pd.DataFrame(
+                    {col: self.source.numeric_summary(col) for col in names}).T
+            elif names:
+                self.numeric_stats = self.source[names].describe().T
+            else:
+                self.numeric_stats = pd.DataFrame()
+        return self.numeric_stats
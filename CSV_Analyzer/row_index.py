@@ -0,0 +1,71 @@
+"""Row-hash index used for fast duplicate detection and removal"""
+import numpy as np
+import pandas as pd
+
+
+def hash_rows(df, columns=None):
+    """One 64-bit hash per row over all (or the given) columns"""
+    if columns is not None:
+        df = df[list(columns)]
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+class RowHashIndex:
+    """
+    One uint64 hash per row of the cleaned dataset, in row order. Duplicate
+    counts and drop masks are answered from the hashes alone. Row-dropping
+    cleaning steps filter the hash array instead of rehashing, and value
+    changes rehash only the touched rows. Hashes for column subsets are
+    computed on first use and cached alongside the full-row hashes.
+
+    Two different rows sharing a 64-bit hash is possible in principle but
+    vanishingly unlikely at any dataset size the analyzer can hold.
+    """
+
+    def __init__(self, hashes, version, subset_hashes=None):
+        self.hashes = hashes
+        self.version = version
+        self.subset_hashes = subset_hashes or {}
+
+    @classmethod
+    def build(cls, df, version):
+        return cls(hash_rows(df), version)
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def hashes_for(self, df=None, subset=None):
+        """Full-row hashes, or the cached hashes of a column subset"""
+        if not subset:
+            return self.hashes
+        key = tuple(subset)
+        if key not in self.subset_hashes:
+            if df is None:
+                raise ValueError("A DataFrame is needed to hash a new column subset")
+            self.subset_hashes[key] = hash_rows(df, key)
+        return self.subset_hashes[key]
+
+    def duplicate_mask(self, df=None, subset=None):
+        """True for every row whose hash already appeared earlier"""
+        return pd.Series(self.hashes_for(df, subset)).duplicated().to_numpy()
+
+    def duplicate_count(self, df=None, subset=None):
+        return int(self.duplicate_mask(df, subset).sum())
+
+    def filter(self, keep, version):
+        """Index for the rows left after a row-dropping step (keep is a boolean mask)"""
+        keep = np.asarray(keep, dtype=bool)
+        subsets = {key: hashes[keep] for key, hashes in self.subset_hashes.items()}
+        return RowHashIndex(self.hashes[keep], version, subsets)
+
+    def rehash_rows(self, df, positions, version):
+        """Index after the values in some rows changed; only those rows are rehashed"""
+        positions = np.flatnonzero(positions) if np.asarray(positions).dtype == bool else np.asarray(positions)
+        hashes = self.hashes.copy()
+        subsets = {key: values.copy() for key, values in self.subset_hashes.items()}
+        if len(positions):
+            changed = df.iloc[positions]
+            hashes[positions] = hash_rows(changed)
+            for key, values in subsets.items():
+                values[positions] = hash_rows(changed, key)
+        return RowHashIndex(hashes, version, subsets)
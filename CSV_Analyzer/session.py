@@ -0,0 +1,846 @@
+"""
+Headless data engine: one dataset with its cleaning history, filter,
+profiles and caches, and every data operation the app offers (load,
+profile, filter, clean, undo, chart data, statistics, export). The GUI
+holds a DataSession and delegates to it, so the same operations can be
+driven from scripts, worker processes and benchmarks without a display.
+
+    session = DataSession()
+    session.load("sales.csv")
+    session.clean_column("Median Imputation", "price")
+    session.remove_duplicates()
+    session.export("sales_clean.csv.gz")
+"""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from aggregate import GroupByEngine
+from cache import DatasetCache, DialectStore
+from charts import (build_bar_chart, build_boxplot, build_histogram, build_line_chart,
+                    build_pie_chart, build_scatter)
+from correlation import correlation_matrix
+from excel import is_excel_file, load_excel_streaming
+from exporter import export_frame
+from filters import FilterEngine, FilterError
+from history import CellsChanged, CleaningHistory, Replaced, RowsDropped
+from jobs import DatasetSnapshot
+from loader import (LoadCancelled, csv_read_options, dialect_variant, format_throughput,
+                    load_csv_files, load_csv_streaming, resolve_engine, sniff_csv)
+from optimize import optimize_dtypes
+from outofcore import ColumnStore, StoreSelection
+from pipeline import CleaningPipeline
+from profiling import DatasetProfile
+from row_index import RowHashIndex
+
+# Files at least this large are loaded in chunks with progress and cancel
+STREAMING_THRESHOLD = 20 * 1024 * 1024
+# Datasets with at least this many rows get sketch-based (approximate) statistics by default
+APPROXIMATE_STATS_ROWS = 5_000_000
+CHART_TYPES = ("Histogram", "Box Plot", "Scatter Plot", "Line Chart", "Bar Chart", "Pie Chart")
+CHART_COLORS = {"primary": "#4361ee", "accent": "#7209b7"}
+# Points a line chart is downsampled to when no canvas width says otherwise
+DEFAULT_LINE_POINTS = 2_000
+COLUMN_METHODS = ("Mean Imputation", "Median Imputation", "Mode Imputation", "Drop Rows",
+                  "Forward Fill", "Backward Fill")
+
+
+class SessionError(Exception):
+    """A data operation does not apply to the current data"""
+
+
+class LoadedData:
+    """A parsed dataset on its way into a session, with how it was loaded"""
+
+    def __init__(self, path, df, optimization_report=None, cache_status="off", store=None,
+                 shard_report=None, sheet=None, parse_info=None):
+        self.path = path
+        self.df = df
+        self.optimization_report = optimization_report
+        self.cache_status = cache_status
+        self.store = store
+        self.shard_report = shard_report
+        self.sheet = sheet
+        self.parse_info = parse_info
+        # Set by DataSession.profile_loaded on the loading thread
+        self.profile = None
+        self.row_index = None
+
+
+def should_stream(path, engine="auto", out_of_core=False):
+    """
+    Whether a CSV load goes chunk by chunk, with progress, cancel and a partial
+    preview: always out of core, and from STREAMING_THRESHOLD up otherwise.
+    "auto" then uses the C parser; only an explicit "pyarrow", which pandas
+    cannot read in chunks, parses a large file in one multithreaded call.
+    """
+    if out_of_core:
+        return True
+    return engine != "pyarrow" and os.path.getsize(path) >= STREAMING_THRESHOLD
+
+
+def describe_parse(path, read_kwargs, sniffed, seconds):
+    """Status line with parse throughput and the options used"""
+    size = os.path.getsize(path)
+    sep = {"\t": "tab", " ": "space"}.get(read_kwargs["sep"], read_kwargs["sep"])
+    return (f"Parsed {size / 1024 / 1024:,.1f} MB at {format_throughput(size, seconds)} "
+            f"({read_kwargs['engine']}, '{sep}', {read_kwargs['encoding']}"
+            f"{', sniffed' if sniffed else ''})")
+
+
+def check_cancelled(path, cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        raise LoadCancelled(f"Loading of {os.path.basename(path)} was cancelled")
+
+
+def replay_pipeline(pipeline, snapshot):
+    """Run a pipeline on a snapshot's data as loaded; returns (cleaned data, summary)"""
+    if snapshot.original_store is not None:
+        return pipeline.run_store(snapshot.original_store)
+    cleaned, summary = pipeline.run(snapshot.original)
+    # run() may share unchanged columns with the original frame
+    return cleaned.copy(), summary
+
+
+def dtype_label(dtype):
+    """Display name of a dtype, whatever its width, unit or storage (float32, datetime64[s], str...)"""
+    types = pd.api.types
+    if types.is_bool_dtype(dtype):
+        return "Boolean"
+    if isinstance(dtype, pd.CategoricalDtype):
+        return "Category"
+    if types.is_integer_dtype(dtype):
+        return "Integer"
+    if types.is_float_dtype(dtype):
+        return "Float"
+    if types.is_datetime64_any_dtype(dtype):
+        return "Date"
+    if types.is_string_dtype(dtype) or types.is_object_dtype(dtype):
+        return "Text"
+    return str(dtype)
+
+
+class DataSession:
+    """
+    The loaded dataset as originally read (df, or column_store out of core)
+    and as cleaned so far (cleaned_df / cleaned_store). data_version goes up
+    with every change, and profiles, the row-hash index, filter indexes,
+    histogram counts, group-by codes and correlation matrices are cached for
+    the current version only.
+
+    Frames are never modified in place, so snapshot() can hand the current
+    version to another thread while the session moves on. listeners are
+    called as listener(event, detail) with event "data" (detail: whether a
+    new dataset replaced the old one), "filter" (the filter stopped applying;
+    detail: why) or "history" (an undo step was recorded; detail: its label
+    if it was too large to keep, else None).
+    """
+
+    def __init__(self, dataset_cache=None, dialects=None):
+        self.dataset_cache = dataset_cache if dataset_cache is not None else DatasetCache()
+        # Sniffed delimiter / encoding / header per CSV file
+        self.dialects = dialects if dialects is not None else DialectStore()
+        self.df = None
+        self.cleaned_df = None
+        self.column_store = None
+        self.cleaned_store = None
+        self.optimization_report = None
+        self.data_version = 0
+        self.profiles = {}
+        # Single-pass sketch statistics instead of exact describe()/nunique()
+        self.approximate = False
+        self.row_index = None
+        # The filter text, the engine holding its column indexes and the filtered frame
+        self.filter_text = ""
+        self.filter_engine = None
+        self.filter_view = None
+        # Cleaning steps applied since the dataset was loaded, replayable on other files
+        self.pipeline = CleaningPipeline()
+        # Undo/redo as compact deltas, bounded by a memory budget
+        self.history = CleaningHistory()
+        # Fine-grained histogram counts by (column, filter, data version)
+        self.histogram_bins = {}
+        # Group-by codes and results for one data version and filter
+        self.groupby_engine = None
+        # Correlation matrices by (method, filter, data version)
+        self.correlations = {}
+        self.listeners = []
+
+    def notify(self, event, detail=None):
+        for listener in self.listeners:
+            listener(event, detail)
+
+    @property
+    def loaded(self):
+        return self.df is not None
+
+    # ----- Loading (read_* only parse, so they can run on a worker thread) -----
+
+    def csv_options(self, path, engine):
+        """
+        read_csv options for a file, from its remembered dialect (sniffed and
+        remembered on first load) and the parser engine. Returns (read_kwargs, sniffed).
+        """
+        dialect = self.dialects.get(path)
+        sniffed = dialect is None
+        if sniffed:
+            dialect = sniff_csv(path)
+            self.dialects.put(path, dialect)
+        return csv_read_options(dialect, engine), sniffed
+
+    def prepare_frame(self, path, df, optimize, variant="", on_status=None):
+        """
+        Optional dtype optimization and caching of a freshly parsed frame.
+        Returns (df, optimization report, cache status).
+        """
+        report = None
+        if optimize:
+            if on_status is not None:
+                on_status("Optimizing data types...")
+            df, report = optimize_dtypes(df)
+
+        cache_status = "off"
+        if self.dataset_cache.available:
+            if on_status is not None:
+                on_status("Caching parsed data...")
+            stored = self.dataset_cache.put(path, df, optimize,
+                                            {"optimization_report": report}, variant)
+            cache_status = "miss" if stored else "not cacheable"
+        return df, report, cache_status
+
+    def read_csv(self, path, engine="auto", optimize=True, out_of_core=False, streaming=None,
+                 on_chunk=None, cancel_event=None, on_status=None):
+        """
+        Parse one CSV file into LoadedData. streaming defaults to should_stream();
+        on_chunk(index, chunk, bytes_read, total_bytes) follows a streaming load.
+        Out of core, the file becomes memory-mapped column files instead.
+        """
+        start = time.perf_counter()
+        if streaming is None:
+            streaming = should_stream(path, engine, out_of_core)
+        engine = resolve_engine(engine, chunked=streaming or out_of_core)
+        read_kwargs, sniffed = self.csv_options(path, engine)
+
+        if out_of_core:
+            # The column store is already compact, so skip dtype optimization and caching
+            store = ColumnStore.from_csv(path, on_chunk=on_chunk, cancel_event=cancel_event,
+                                         **read_kwargs)
+            return LoadedData(path, store.to_frame(), store=store,
+                              parse_info=describe_parse(path, read_kwargs, sniffed,
+                                                        time.perf_counter() - start))
+
+        # The dialect is part of the key, so a file re-sniffed differently is parsed again
+        variant = dialect_variant(read_kwargs)
+        cached = self.dataset_cache.get(path, optimize, variant)
+        if cached is not None:
+            df, metadata = cached
+            return LoadedData(path, df, metadata.get("optimization_report"), "hit")
+
+        if streaming:
+            df = load_csv_streaming(path, on_chunk=on_chunk, cancel_event=cancel_event,
+                                    **read_kwargs)
+        else:
+            df = pd.read_csv(path, **read_kwargs)
+        check_cancelled(path, cancel_event)
+        parse_info = describe_parse(path, read_kwargs, sniffed, time.perf_counter() - start)
+        df, report, cache_status = self.prepare_frame(path, df, optimize, variant, on_status)
+        return LoadedData(path, df, report, cache_status, parse_info=parse_info)
+
+    def read_excel(self, path, sheet=None, first_row=1, last_row=None, optimize=True,
+                   on_chunk=None, cancel_event=None, on_status=None):
+        """
+        Stream one sheet (the first by default) of a workbook into LoadedData.
+        on_chunk(index, chunk, rows_read, total_rows) follows the load.
+        """
+        # The cache keeps one entry per sheet and row range
+        variant = f"sheet={sheet}|rows={first_row}-{last_row or ''}"
+        cached = self.dataset_cache.get(path, optimize, variant)
+        if cached is not None:
+            df, metadata = cached
+            return LoadedData(path, df, metadata.get("optimization_report"), "hit", sheet=sheet)
+
+        df = load_excel_streaming(path, sheet, first_row, last_row, on_chunk=on_chunk,
+                                  cancel_event=cancel_event)
+        check_cancelled(path, cancel_event)
+        df, report, cache_status = self.prepare_frame(path, df, optimize, variant, on_status)
+        return LoadedData(path, df, report, cache_status, sheet=sheet)
+
+    def read_csv_files(self, paths, engine="auto", optimize=True, on_file=None,
+                       cancel_event=None, on_status=None):
+        """
+        Parse several CSV files in parallel worker processes and combine them
+        into one LoadedData, taking the union of their columns.
+        on_file(done, total, timing) is called as each file finishes.
+        """
+        start = time.perf_counter()
+        # Files are already parsed in parallel processes, so "auto" keeps each one on the C parser
+        engine = "c" if engine == "auto" else resolve_engine(engine)
+        file_kwargs = {path: self.csv_options(path, engine)[0] for path in paths}
+        df, timings, schema = load_csv_files(paths, on_file=on_file, cancel_event=cancel_event,
+                                             file_kwargs=file_kwargs)
+        seconds = time.perf_counter() - start
+        total_bytes = sum(timing["bytes"] for timing in timings)
+        parse_info = (f"Parsed {total_bytes / 1024 / 1024:,.1f} MB at "
+                      f"{format_throughput(total_bytes, seconds)} ({engine})")
+
+        report = None
+        if optimize:
+            if on_status is not None:
+                on_status("Optimizing data types...")
+            df, report = optimize_dtypes(df)
+        shard_report = {"files": timings, "schema": schema, "seconds": time.perf_counter() - start}
+        return LoadedData(paths[0], df, report, shard_report=shard_report, parse_info=parse_info)
+
+    def load(self, source, **options):
+        """
+        Read a CSV file, a workbook or a list of CSV files and make it the
+        session's data. Options go to read_csv, read_excel or read_csv_files.
+        """
+        if isinstance(source, (list, tuple)):
+            loaded = self.read_csv_files(list(source), **options)
+        elif is_excel_file(source):
+            loaded = self.read_excel(source, **options)
+        else:
+            loaded = self.read_csv(source, **options)
+        self.set_data(loaded)
+        return loaded
+
+    def set_data(self, loaded):
+        """Make a loaded dataset the session's data, with a fresh filter, pipeline and history"""
+        self.release_column_store()
+        self.df = loaded.df
+        self.column_store = loaded.store
+        self.cleaned_store = loaded.store
+        # Memory-mapped frames are read-only and cleaning goes through the store, so no copy is needed
+        self.cleaned_df = loaded.df if loaded.store is not None else loaded.df.copy()
+        self.optimization_report = loaded.optimization_report
+        self.filter_text = ""
+        self.approximate = len(loaded.df) >= APPROXIMATE_STATS_ROWS
+        self.pipeline = CleaningPipeline()
+        self.history.clear()
+        self.mark_data_changed(new_dataset=True)
+        if loaded.profile is not None:
+            # Built from exactly this data before it arrived, so it is valid for the new version
+            loaded.profile.version = loaded.row_index.version = self.data_version
+            self.profiles[("cleaned", self.approximate)] = loaded.profile
+            self.row_index = loaded.row_index
+
+    def profile_loaded(self, loaded):
+        """
+        Profile freshly read data (and hash its rows) where it was read, e.g. in
+        the load job, so set_data() does not leave that work to the first caller.
+        """
+        approximate = len(loaded.df) >= APPROXIMATE_STATS_ROWS
+        if loaded.store is not None:
+            row_index = RowHashIndex(loaded.store.row_hashes(), None)
+            profile = DatasetProfile.from_store(loaded.store, None, row_index.duplicate_count(),
+                                                approximate)
+        else:
+            row_index = RowHashIndex.build(loaded.df, None)
+            profile = DatasetProfile.from_frame(loaded.df, None, row_index.duplicate_count(),
+                                                approximate)
+        loaded.profile, loaded.row_index = profile, row_index
+
+    def replace_data(self, df, cleaned_df, column_store=None, cleaned_store=None):
+        """
+        Swap the data without starting a new history, e.g. to show the first
+        chunk of a streaming load or to bring back the dataset it replaced.
+        """
+        self.df, self.cleaned_df = df, cleaned_df
+        self.column_store, self.cleaned_store = column_store, cleaned_store
+        self.optimization_report = None
+        self.mark_data_changed(new_dataset=True)
+
+    def release_column_store(self):
+        """Delete the column files backing the current out-of-core dataset"""
+        if self.column_store is not None:
+            self.column_store.remove()
+        self.column_store = None
+        self.cleaned_store = None
+
+    def close(self):
+        self.df = None
+        self.cleaned_df = None
+        self.release_column_store()
+
+    # ----- Versions, profiles and the filter -----
+
+    def snapshot(self):
+        """The current data version, for a job to read while the session moves on"""
+        return DatasetSnapshot(self.data_version, self.cleaned_df, self.cleaned_store,
+                               self.df, self.column_store, self.view(), self.filter_text)
+
+    def mark_data_changed(self, new_dataset=False, row_update=None):
+        """
+        Invalidate cached results after a cleaning step (or a new load) changed the data.
+        row_update(index, version) carries the row-hash index over to the new data
+        instead of rehashing every row.
+        """
+        index = self.row_index
+        if index is not None and index.version != self.data_version:
+            index = None
+
+        self.data_version += 1
+        self.histogram_bins = {}
+        self.groupby_engine = None
+        self.correlations = {}
+        if new_dataset:
+            self.profiles = {}
+        else:
+            self.profiles = {key: profile for key, profile in self.profiles.items()
+                             if key[0] == "original"}
+
+        if index is not None and row_update is not None and not new_dataset:
+            self.row_index = row_update(index, self.data_version)
+        else:
+            self.row_index = None
+        self.notify("data", new_dataset)
+
+    def profile(self, original=False, approximate=None, filtered=False):
+        """
+        Profile of the cleaned (or original) dataset, rebuilt only after the data changes.
+        approximate defaults to self.approximate; filtered profiles the rows
+        matching the filter instead of the whole cleaned data.
+        """
+        if approximate is None:
+            approximate = self.approximate
+        mask = self.filter_mask() if filtered and not original else None
+        if mask is not None:
+            key = (f"filtered: {self.filter_text}", approximate)
+            profile = self.profiles.get(key)
+            if profile is None or profile.version != self.data_version:
+                hashes = self.get_row_index().hashes[mask]
+                duplicates = int(pd.Series(hashes).duplicated().sum())
+                view = self.view()
+                if isinstance(view, StoreSelection):
+                    profile = DatasetProfile.from_store(view, self.data_version, duplicates,
+                                                        approximate)
+                else:
+                    profile = DatasetProfile.from_frame(view, self.data_version, duplicates,
+                                                        approximate)
+                self.profiles[key] = profile
+            return profile
+
+        key = ("original" if original else "cleaned", approximate)
+        profile = self.profiles.get(key)
+        if profile is None or profile.version != self.data_version:
+            store = self.column_store if original else self.cleaned_store
+            duplicates = None if original else self.get_row_index().duplicate_count()
+            if store is not None:
+                profile = DatasetProfile.from_store(store, self.data_version, duplicates,
+                                                    approximate)
+            else:
+                profile = DatasetProfile.from_frame(self.df if original else self.cleaned_df,
+                                                    self.data_version, duplicates, approximate)
+            self.profiles[key] = profile
+        return profile
+
+    def get_row_index(self):
+        """Row-hash index of the cleaned dataset, built on first use for each data version"""
+        if self.row_index is None or self.row_index.version != self.data_version:
+            if self.cleaned_store is not None:
+                self.row_index = RowHashIndex(self.cleaned_store.row_hashes(), self.data_version)
+            else:
+                self.row_index = RowHashIndex.build(self.cleaned_df, self.data_version)
+        return self.row_index
+
+    def get_filter_engine(self):
+        if self.filter_engine is None or self.filter_engine.version != self.data_version:
+            # Column indexes are rebuilt lazily for each data version
+            self.filter_engine = FilterEngine(self.cleaned_df, self.data_version)
+        return self.filter_engine
+
+    def set_filter(self, text):
+        """
+        Filter the cleaned data by a filter string (empty clears it) and return
+        the row mask, None without a filter. An invalid filter raises
+        FilterError and leaves the previous one in place.
+        """
+        text = " ".join(text.split())
+        mask = self.get_filter_engine().mask(text)
+        self.filter_text = text
+        return mask
+
+    def filter_mask(self):
+        """Rows of the cleaned data matching the filter, or None without a filter"""
+        if not self.filter_text:
+            return None
+        try:
+            return self.get_filter_engine().mask(self.filter_text)
+        except FilterError as e:
+            # A cleaning step changed the data so the filter no longer applies
+            self.filter_text = ""
+            self.notify("filter", str(e))
+            return None
+
+    def view(self):
+        """
+        The cleaned data with the filter applied. Out of core this is a
+        StoreSelection, the matching row positions over the column files,
+        since a copy of the rows may not fit in memory.
+        """
+        mask = self.filter_mask()
+        if mask is None:
+            return self.cleaned_df
+        key = (self.data_version, self.filter_text)
+        if self.filter_view is None or self.filter_view[0] != key:
+            if self.cleaned_store is not None:
+                view = StoreSelection(self.cleaned_store, np.flatnonzero(mask))
+            else:
+                view = self.cleaned_df[mask]
+            self.filter_view = (key, view)
+        return self.filter_view[1]
+
+    # ----- Cleaning and history -----
+
+    def rows_dropped(self, keep):
+        """Row index update for a step that kept only the rows where keep is True"""
+        return lambda index, version: index.filter(keep, version)
+
+    def rows_changed(self, positions):
+        """Row index update for a step that changed values in some rows"""
+        return lambda index, version: index.rehash_rows(self.cleaned_df, positions, version)
+
+    def push_history(self, label, delta):
+        kept = self.history.push(label, delta, self.pipeline.steps)
+        self.notify("history", None if kept else label)
+
+    def keep_rows(self, keep, label):
+        """Drop the in-memory rows where keep is False, recording an undo delta"""
+        keep = np.asarray(keep, dtype=bool)
+        if keep.all():
+            return
+        self.push_history(label, RowsDropped.capture(self.cleaned_df, keep))
+        self.cleaned_df = self.cleaned_df[keep]
+        self.mark_data_changed(row_update=self.rows_dropped(keep))
+
+    def replace_column(self, col, values, label):
+        """Swap in a filled version of an in-memory column, recording only the filled cells"""
+        delta = CellsChanged.capture(col, self.cleaned_df[col], values)
+        if len(delta.positions) == 0:
+            return
+        self.push_history(label, delta)
+        # A new frame rather than an in-place write, so snapshots held by jobs stay intact
+        df = self.cleaned_df.copy(deep=False)
+        df[col] = values
+        self.cleaned_df = df
+        self.mark_data_changed(row_update=self.rows_changed(delta.positions))
+
+    def set_cleaned_store(self, store, row_update=None, label="Cleaning step", cells_filled=None):
+        """
+        Swap in the result of an out-of-core cleaning step. Like keep_rows and
+        replace_column, a step that kept every row and filled no cells
+        (cells_filled=0) is discarded, leaving the history and caches as they were.
+        """
+        if cells_filled == 0 and store.n_rows == self.cleaned_store.n_rows:
+            # Nothing references the column files the step just wrote
+            kept = {spec["file"] for spec in self.cleaned_store.specs.values()}
+            for spec in store.specs.values():
+                if spec["file"] not in kept:
+                    os.remove(os.path.join(store.directory, spec["file"]))
+            return
+        # The previous store's column files stay on disk, so undo only keeps a reference
+        self.push_history(label, Replaced(self.cleaned_store))
+        self.cleaned_store = store
+        self.cleaned_df = store.to_frame()
+        self.mark_data_changed(row_update=row_update)
+
+    def record_step(self, method, column=None, **params):
+        """Add an applied cleaning step to the replayable pipeline"""
+        self.pipeline.add(method, column, **params)
+
+    def remove_missing_rows(self):
+        """Drop every row with a missing value; returns (rows removed, missing values removed)"""
+        original_rows = len(self.cleaned_df)
+        original_missing = self.profile().missing_total
+
+        if self.cleaned_store is not None:
+            self.set_cleaned_store(self.cleaned_store.drop_missing(), label="Remove Missing Rows",
+                                   cells_filled=0)
+        else:
+            self.keep_rows(self.cleaned_df.notna().all(axis=1).to_numpy(), "Remove Missing Rows")
+        self.record_step("Remove Missing Rows")
+        return (original_rows - len(self.cleaned_df),
+                original_missing - self.profile().missing_total)
+
+    def remove_duplicates(self, subset=None):
+        """Drop repeated rows (or repeated values of subset) using the row-hash index; returns the count"""
+        index = self.get_row_index()
+        duplicates = index.duplicate_mask(self.cleaned_df, subset)
+        duplicate_count = int(duplicates.sum())
+        if duplicate_count == 0:
+            return 0
+
+        keep = ~duplicates
+        if self.cleaned_store is not None:
+            self.set_cleaned_store(
+                self.cleaned_store.filter_rows(lambda start, chunk: keep[start:start + len(chunk)]),
+                row_update=self.rows_dropped(keep), label="Remove Duplicates"
+            )
+        else:
+            self.keep_rows(keep, "Remove Duplicates")
+        self.record_step("Remove Duplicates", subset=list(subset) if subset else None)
+        return duplicate_count
+
+    def clean_column(self, method, col):
+        """
+        Fill or drop the missing values of one column with one of COLUMN_METHODS.
+        Returns {"method", "column", "missing_before", "missing_after",
+        "rows_removed", "value"}, value being the fill value of an imputation.
+        """
+        if method not in COLUMN_METHODS:
+            raise SessionError(f"Unknown cleaning method: {method}")
+        if col not in self.cleaned_df.columns:
+            raise SessionError(f"No column named {col!r}")
+        values = self.cleaned_df[col]
+        missing_rows = values.isnull().to_numpy()
+        original_rows = len(self.cleaned_df)
+        numeric = pd.api.types.is_numeric_dtype(values)
+        if method in ("Mean Imputation", "Median Imputation") and not numeric:
+            raise SessionError(f"{method.split()[0]} imputation only works for numeric columns")
+        label = f"{method} on '{col}'"
+
+        if self.cleaned_store is not None:
+            value = self.clean_column_out_of_core(method, col, missing_rows, label)
+        elif method == "Drop Rows":
+            value = None
+            self.keep_rows(~missing_rows, label)
+        elif method in ("Forward Fill", "Backward Fill"):
+            value = None
+            self.replace_column(col, values.ffill() if method == "Forward Fill" else values.bfill(),
+                                label)
+        else:
+            if method == "Mean Imputation":
+                value = values.mean()
+            elif method == "Median Imputation":
+                value = values.median()
+            else:
+                mode = values.mode()
+                value = mode[0] if not mode.empty else ""
+            self.replace_column(col, values.fillna(value), label)
+
+        self.record_step(method, col)
+        return {
+            "method": method,
+            "column": col,
+            "missing_before": int(missing_rows.sum()),
+            "missing_after": int(self.cleaned_df[col].isnull().sum()),
+            "rows_removed": original_rows - len(self.cleaned_df),
+            "value": value,
+        }
+
+    def clean_column_out_of_core(self, method, col, missing_rows, label):
+        """clean_column against the column store; returns the fill value, if any"""
+        store = self.cleaned_store
+        changed = self.rows_changed(missing_rows)
+
+        if method == "Drop Rows":
+            self.set_cleaned_store(store.drop_missing([col]), self.rows_dropped(~missing_rows), label,
+                                   cells_filled=0)
+            return None
+        if method in ("Forward Fill", "Backward Fill"):
+            filled = store.fill_direction(col, backward=method == "Backward Fill")
+            # Values before the first (or after the last) present one stay missing
+            cells_filled = int(missing_rows.sum()) - int(filled.column(col).isnull().sum())
+            self.set_cleaned_store(filled, changed, label, cells_filled)
+            return None
+
+        if method == "Mean Imputation":
+            value = store.column_mean(col)
+        elif method == "Median Imputation":
+            value = store.quantiles(col, [50])[0]
+        else:
+            value = store.column_mode(col)
+            if value is None:
+                value = 0 if store.specs[col]["kind"] == "numeric" else ""
+        self.set_cleaned_store(store.fill_value(col, value), changed, label, int(missing_rows.sum()))
+        return value
+
+    def remove_outliers(self, col, factor=1.5):
+        """
+        Drop the rows whose value of col lies more than factor IQRs outside the
+        quartiles. Returns (rows removed, (low, high)) with the range kept.
+        """
+        if not pd.api.types.is_numeric_dtype(self.cleaned_df[col]):
+            raise SessionError("Outlier removal only works for numeric columns")
+
+        original_count = len(self.cleaned_df)
+        if self.cleaned_store is not None:
+            q1, q3 = self.cleaned_store.quantiles(col, [25, 75])
+        else:
+            q1, q3 = self.cleaned_df[col].quantile([0.25, 0.75])
+        iqr = q3 - q1
+        low, high = q1 - factor * iqr, q3 + factor * iqr
+
+        label = f"Remove Outliers on '{col}'"
+        if self.cleaned_store is not None:
+            self.set_cleaned_store(self.cleaned_store.drop_outliers(col, low, high), label=label,
+                                   cells_filled=0)
+        else:
+            keep = ((self.cleaned_df[col] >= low) & (self.cleaned_df[col] <= high)).to_numpy()
+            self.keep_rows(keep, label)
+        self.record_step("Remove Outliers", col, factor=factor)
+        return original_count - len(self.cleaned_df), (low, high)
+
+    def run_pipeline(self, pipeline):
+        """Replay a pipeline on the data as loaded, as "Run Saved Pipeline" does; returns its summary"""
+        cleaned, summary = replay_pipeline(pipeline, self.snapshot())
+        self.apply_pipeline(pipeline, cleaned)
+        return summary
+
+    def apply_pipeline(self, pipeline, cleaned):
+        """Make the result of replaying pipeline the cleaned data, as one undoable step"""
+        if isinstance(cleaned, ColumnStore):
+            self.set_cleaned_store(cleaned, label="Run Saved Pipeline")
+        else:
+            self.push_history("Run Saved Pipeline", Replaced(self.cleaned_df))
+            self.cleaned_df = cleaned
+            self.mark_data_changed()
+        self.pipeline = pipeline
+
+    def step_history(self, undo):
+        """Apply an undo or redo; returns its history entry, or None when there is none"""
+        data = self.cleaned_store if self.cleaned_store is not None else self.cleaned_df
+        if undo:
+            result = self.history.undo(data, self.pipeline.steps)
+        else:
+            result = self.history.redo(data)
+        if result is None:
+            return None
+
+        data, steps, entry = result
+        if isinstance(data, ColumnStore):
+            self.cleaned_store = data
+            self.cleaned_df = data.to_frame()
+        else:
+            self.cleaned_df = data
+        self.pipeline.steps = steps
+        self.mark_data_changed()
+        return entry
+
+    def undo(self):
+        return self.step_history(undo=True)
+
+    def redo(self):
+        return self.step_history(undo=False)
+
+    # ----- Charts, statistics, analysis and export -----
+
+    def build_chart(self, df, viz_type, x_col, y_col=None, target_points=DEFAULT_LINE_POINTS,
+                    version=None, filter_text="", colors=None, schedule=None):
+        """
+        Figure for one chart request on df, the view of data version version
+        (safe to call on a worker thread). Histogram counts kept by
+        keep_histogram_bins are reused, but only read here.
+        """
+        colors = colors or CHART_COLORS
+        if viz_type == "Histogram":
+            key = (x_col, filter_text, self.data_version if version is None else version)
+            chart = build_histogram(df, x_col, colors, bins=self.histogram_bins.get(key))
+        elif viz_type == "Box Plot":
+            chart = build_boxplot(df, x_col, colors)
+        elif viz_type == "Scatter Plot":
+            chart = build_scatter(df, x_col, y_col, colors, schedule=schedule)
+        elif viz_type == "Line Chart":
+            chart = build_line_chart(df, x_col, y_col, colors, target_points)
+        elif viz_type == "Bar Chart":
+            chart = build_bar_chart(df, x_col, colors)
+        elif viz_type == "Pie Chart":
+            chart = build_pie_chart(df, x_col, colors)
+        else:
+            raise SessionError(f"Unknown chart type: {viz_type}")
+
+        if filter_text:
+            chart.figure.text(0.01, 0.01, f"Filter: {filter_text} ({len(df):,} rows)",
+                              fontsize=8, color="#718096")
+        return chart
+
+    def keep_histogram_bins(self, chart, x_col, filter_text, version):
+        """
+        Keep the counts of a histogram built for data version version, so the
+        chart can be rebuilt with other bins cheaply. Call it on the thread that
+        changes the data, so counts of an old version are never kept as current.
+        """
+        if chart.histogram is not None and version == self.data_version:
+            self.histogram_bins[(x_col, filter_text, version)] = chart.histogram.bins
+
+    def chart(self, viz_type, x_col, y_col=None, target_points=DEFAULT_LINE_POINTS, colors=None):
+        """A chart of the current (filtered) data"""
+        chart = self.build_chart(self.view(), viz_type, x_col, y_col, target_points,
+                                 self.data_version, self.filter_text, colors)
+        self.keep_histogram_bins(chart, x_col, self.filter_text, self.data_version)
+        return chart
+
+    def column_details(self, profile=None):
+        """
+        One dict per column of the (filtered) data: column, dtype, non_null,
+        nulls, null_percent, unique and a few sample values.
+        """
+        view = self.view()
+        profile = profile or self.profile(filtered=True)
+        # Only the first rows are needed for samples
+        head = view.iloc[:1000]
+        details = []
+        for col in view.columns:
+            nulls = profile.columns.at[col, "nulls"]
+            details.append({
+                "column": col,
+                "dtype": dtype_label(view.dtypes[col]),
+                "non_null": profile.columns.at[col, "non_null"],
+                "nulls": nulls,
+                "null_percent": nulls / len(view) * 100 if len(view) > 0 else 0,
+                "unique": profile.columns.at[col, "unique"],
+                "samples": [str(value) for value in head[col].dropna().head(3)],
+            })
+        return details
+
+    def overall_statistics(self, profile=None):
+        """Size, memory, dtype mix, missing values and duplicates of the (filtered) data"""
+        view = self.view()
+        profile = profile or self.profile(filtered=True)
+        missing = profile.missing_total
+        duplicates = profile.duplicate_rows
+        # float32 and float64 (or datetime64[s] and [ns]) are one row of the table
+        dtype_counts = {}
+        for dtype in view.dtypes:
+            label = dtype_label(dtype)
+            dtype_counts[label] = dtype_counts.get(label, 0) + 1
+        return {
+            "rows": view.shape[0],
+            "columns": view.shape[1],
+            "cells": view.size,
+            "memory_mb": profile.memory_mb,
+            "dtypes": sorted(dtype_counts.items(), key=lambda item: -item[1]),
+            "missing": missing,
+            "missing_percent": missing / view.size * 100 if view.size else 0.0,
+            "duplicates": duplicates,
+            "duplicate_percent": duplicates / len(view) * 100 if len(view) else 0.0,
+        }
+
+    def get_groupby_engine(self):
+        """Group-by engine for the current data version and filter; key codes are shared between requests"""
+        engine = self.groupby_engine
+        if (engine is None or engine.version != self.data_version
+                or engine.filter_text != self.filter_text):
+            engine = GroupByEngine(self.view(), self.data_version, self.filter_text)
+            self.groupby_engine = engine
+        return engine
+
+    def group_by(self, keys, values=(), aggregations=("count",), pivot=None):
+        return self.get_groupby_engine().aggregate(keys, values, aggregations, pivot)
+
+    def correlation(self, method="pearson", job=None):
+        """Correlation matrix of the (filtered) data, cached per method, filter and version"""
+        key = (method, self.filter_text, self.data_version)
+        if key not in self.correlations:
+            self.correlations[key] = correlation_matrix(self.view(), method, job)
+        return self.correlations[key]
+
+    def export(self, path, df=None, on_progress=None, cancel_event=None):
+        """Write df (the cleaned data by default) in the format path's suffix names"""
+        if isinstance(df, StoreSelection):
+            # Filtered out-of-core rows only become a frame here
+            df = df.to_frame()
+        return export_frame(self.cleaned_df if df is None else df, path, on_progress, cancel_event)
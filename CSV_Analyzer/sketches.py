@@ -0,0 +1,265 @@
+"""
+Mergeable streaming sketches for approximate statistics in one pass:
+KLL quantile sketches and HyperLogLog distinct counts.
+"""
+import numpy as np
+import pandas as pd
+
+# Rows fed to the sketches at a time when sketching an in-memory frame
+SKETCH_BLOCK_ROWS = 1_000_000
+
+
+def kll_rank_error(k):
+    """
+    Normalized rank error of a KLL sketch at ~99% confidence, from the
+    empirical fit used by Apache DataSketches: the true rank of a returned
+    quantile is within this fraction of the row count.
+    """
+    return 2.296 / k ** 0.9723
+
+
+def hll_relative_error(precision):
+    """Two standard errors (~95% confidence) of a HyperLogLog estimate, as a fraction"""
+    return 2 * 1.04 / np.sqrt(2 ** precision)
+
+
+class QuantileSketch:
+    """
+    KLL quantile sketch (Karnin, Lang, Liberty 2016). Values enter level 0;
+    a full level is sorted and every other item (random offset) is promoted
+    to the next level with twice the weight. Memory stays around 3k items no
+    matter how many values are added, and two sketches merge by concatenating
+    their levels.
+    """
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.count = 0
+        self.rng = np.random.default_rng(seed)
+
+    def capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values):
+        values = np.asarray(values, dtype="float64")
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self.count += len(values)
+            self.compress()
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self.compress()
+
+    def compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self.capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays behind so the total weight is preserved
+                keep = items[:1] if len(items) % 2 else items[:0]
+                pairs = items[len(keep):]
+                promoted = pairs[self.rng.integers(2)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def quantiles(self, fractions):
+        """Approximate values at the given fractions (0..1) of the sorted data"""
+        fractions = np.atleast_1d(fractions)
+        if self.count == 0:
+            return np.full(len(fractions), np.nan)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level_items), 2 ** level, dtype="float64")
+                                  for level, level_items in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cumulative = items[order], np.cumsum(weights[order])
+        targets = np.clip(fractions, 0, 1) * cumulative[-1]
+        positions = np.searchsorted(cumulative, targets, side="left")
+        return items[np.minimum(positions, len(items) - 1)]
+
+    @property
+    def rank_error(self):
+        return kll_rank_error(self.k)
+
+    def quantile_bounds(self, fraction):
+        """(low, high) values bracketing the true quantile at the stated confidence"""
+        low, high = self.quantiles([fraction - self.rank_error, fraction + self.rank_error])
+        return low, high
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct-count estimator with 2**precision one-byte registers
+    (16 KB at the default precision 14), fed with 64-bit value hashes.
+    """
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.registers = np.zeros(2 ** precision, dtype=np.uint8)
+
+    def update_hashes(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if not len(hashes):
+            return
+        p = self.precision
+        index = (hashes >> np.uint64(64 - p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - p)) - 1)
+        # bit_length via frexp is exact because rest has at most 64 - p (< 53) bits
+        bit_length = np.frexp(rest.astype("float64"))[1]
+        rank = (64 - p - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def update(self, series):
+        series = series.dropna()
+        if len(series):
+            self.update_hashes(pd.util.hash_pandas_object(series, index=False).to_numpy())
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            return m * np.log(m / zeros)
+        return raw
+
+    @property
+    def relative_error(self):
+        return hll_relative_error(self.precision)
+
+
+class ColumnSketch:
+    """Exact count/mean/std/min/max plus quantile and distinct-count sketches for one column"""
+
+    def __init__(self, numeric, k=200, precision=14):
+        self.numeric = numeric
+        self.rows = 0
+        self.nulls = 0
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.nan
+        self.max = np.nan
+        self.quantiles = QuantileSketch(k) if numeric else None
+        self.distinct = HyperLogLog(precision)
+
+    def update(self, series):
+        self.rows += len(series)
+        self.nulls += int(series.isnull().sum())
+        self.distinct.update(series)
+        if not self.numeric:
+            return
+
+        values = series.to_numpy(dtype="float64", na_value=np.nan)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.quantiles.update(values)
+        self.add_moments(len(values), values.mean(), ((values - values.mean()) ** 2).sum(),
+                         values.min(), values.max())
+
+    def add_moments(self, n, mean, m2, low, high):
+        """Chan et al. parallel combination of counts, means and squared deviations"""
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta ** 2 * self.n * n / total
+        self.n = total
+        self.min = low if np.isnan(self.min) else min(self.min, low)
+        self.max = high if np.isnan(self.max) else max(self.max, high)
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.nulls += other.nulls
+        self.distinct.merge(other.distinct)
+        if self.numeric and other.n:
+            self.quantiles.merge(other.quantiles)
+            self.add_moments(other.n, other.mean, other.m2, other.min, other.max)
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else np.nan
+
+    def unique_estimate(self):
+        # Never report more distinct values than there are non-null rows
+        return int(round(min(self.distinct.estimate(), self.rows - self.nulls)))
+
+
+class DatasetSketch:
+    """One ColumnSketch per column, filled in a single pass over row chunks"""
+
+    def __init__(self, dtypes, k=200, precision=14):
+        self.k = k
+        self.precision = precision
+        self.columns = {
+            col: ColumnSketch(pd.api.types.is_numeric_dtype(dtype) and
+                              not pd.api.types.is_bool_dtype(dtype), k, precision)
+            for col, dtype in dtypes.items()
+        }
+
+    @classmethod
+    def from_chunks(cls, dtypes, chunks, k=200, precision=14):
+        sketch = cls(dtypes, k, precision)
+        for chunk in chunks:
+            sketch.update(chunk)
+        return sketch
+
+    @classmethod
+    def from_frame(cls, df, block_rows=SKETCH_BLOCK_ROWS):
+        return cls.from_chunks(df.dtypes, (df.iloc[start:start + block_rows]
+                                           for start in range(0, len(df), block_rows)))
+
+    @classmethod
+    def from_store(cls, store):
+        return cls.from_chunks(store.dtypes, (chunk for _, chunk in store.iter_chunks()))
+
+    def update(self, chunk):
+        for col, sketch in self.columns.items():
+            sketch.update(chunk[col])
+
+    def merge(self, other):
+        for col, sketch in self.columns.items():
+            sketch.merge(other.columns[col])
+
+    def numeric_columns(self):
+        return [col for col, sketch in self.columns.items() if sketch.numeric]
+
+    @property
+    def rank_error(self):
+        return kll_rank_error(self.k)
+
+    @property
+    def distinct_error(self):
+        return hll_relative_error(self.precision)
+
+    def describe(self):
+        """
+        describe().T-style frame for the numeric columns. Quartiles are
+        approximate; 25%_low/25%_high etc. bracket the true value.
+        """
+        rows = {}
+        for col in self.numeric_columns():
+            sketch = self.columns[col]
+            row = {"count": sketch.n, "mean": sketch.mean if sketch.n else np.nan,
+                   "std": sketch.std, "min": sketch.min}
+            for label, fraction in (("25%", 0.25), ("50%", 0.5), ("75%", 0.75)):
+                row[label] = sketch.quantiles.quantiles(fraction)[0]
+                row[f"{label}_low"], row[f"{label}_high"] = sketch.quantiles.quantile_bounds(fraction)
+            row["max"] = sketch.max
+            rows[col] = row
+        return pd.DataFrame.from_dict(rows, orient="index")